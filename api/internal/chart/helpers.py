@@ -1,7 +1,11 @@
-from datetime import datetime
+from datetime import date, datetime, time
+from datetime import timezone as dt_timezone
+from decimal import ROUND_HALF_UP, Decimal
+from typing import List
 
 from cerberus import Validator
 from dateutil import parser
+from dateutil.relativedelta import relativedelta
 from django.db import connection
 from django.db.models import Case, F, FloatField, Value, When
 from django.db.models.fields.json import KeyTextTransform
@@ -133,6 +137,41 @@ def apply_grouping(queryset, data):
     # should be the one with the min/max value we want to aggregate by
 
 
+GROUPING_UNIT_STEPS = {
+    "day": relativedelta(days=1),
+    "week": relativedelta(weeks=1),
+    "month": relativedelta(months=1),
+    "quarter": relativedelta(months=3),
+    "year": relativedelta(years=1),
+}
+
+
+def truncate_date(value: date, grouping_unit: str) -> date:
+    """
+    Python equivalent of Postgres' DATE_TRUNC for the supported grouping units
+    """
+    if grouping_unit == "week":
+        return value - relativedelta(days=value.weekday())
+    if grouping_unit == "month":
+        return value.replace(day=1)
+    if grouping_unit == "quarter":
+        return value.replace(month=(value.month - 1) // 3 * 3 + 1, day=1)
+    if grouping_unit == "year":
+        return value.replace(month=1, day=1)
+    return value
+
+
+def date_series(start_date: date, end_date: date, grouping_unit: str) -> List[date]:
+    """
+    Python equivalent of Postgres' `generate_series(start_date, end_date, interval)`
+    """
+    step = GROUPING_UNIT_STEPS[grouping_unit]
+    dates = []
+    while start_date + step * len(dates) <= end_date:
+        dates.append(start_date + step * len(dates))
+    return dates
+
+
 class ChartQueryRunner:
     """
     Houses the SQL query that retrieves data for analytics chart, and
@@ -227,31 +266,22 @@ class ChartQueryRunner:
     def first_complete_commit_date(self):
         """
         Date of first commit made to any repo in 'self.repoids'. Used as initial
-        date for date_spine query.
+        date for the date spine.
         """
         with connection.cursor() as cursor:
             cursor.execute(
                 f"""
-                WITH relevant_repo_branches AS (
-                    SELECT
-                        r.repoid,
-                        r.branch
-                    FROM repos r
-                    WHERE r.repoid IN {self.repoids}
-                )
-
                 SELECT
-                    DATE_TRUNC('{self.grouping_unit}', c.timestamp AT TIME ZONE 'UTC') as truncated_date
-                FROM commits c
-                INNER JOIN relevant_repo_branches r ON c.repoid = r.repoid AND c.branch = r.branch
-                WHERE c.state = 'complete'
-                ORDER BY c.timestamp ASC LIMIT 1;
+                    MIN(t.date) AS date
+                FROM commit_daily_totals t
+                INNER JOIN repos r ON r.repoid = t.repoid AND r.branch = t.branch
+                WHERE r.repoid IN {self.repoids};
                 """
             )
             date = self._dictfetchall(cursor)
 
-        if date:
-            return datetime.date(date[0]["truncated_date"])
+        if date and date[0]["date"]:
+            return truncate_date(date[0]["date"], self.grouping_unit)
 
     def _validate_parameters(self):
         params_schema = {
@@ -284,125 +314,91 @@ class ChartQueryRunner:
             raise ValidationError(v.errors)
 
     def run_query(self):
+        """
+        Sums the totals of the latest commit of each repo in every time window
+        between the first commit and 'end_date'.  Windows without a commit in a
+        repo carry forward the totals of that repo's previous window.
+
+        The latest commit of every day is kept up to date in `commit_daily_totals`
+        by triggers on `commits`, so this only needs the days in the requested
+        range (plus the last day before it to carry forward).
+        """
         # Edge cases -- no repos or no commits
         if not self.repoids:
             return []
         if not self.first_complete_commit_date:
             return []
 
+        dates = date_series(
+            self.first_complete_commit_date, self.end_date, self.grouping_unit
+        )
+        if not dates:
+            return []
+        start_date = truncate_date(self.start_date, self.grouping_unit)
+        end_date = dates[-1] + GROUPING_UNIT_STEPS[self.grouping_unit]
+
         with connection.cursor() as cursor:
             cursor.execute(
                 f"""
-                WITH date_series AS (
-                    SELECT
-                        t::date AS "date"
-                    FROM generate_series(
-                        timestamp '{self.first_complete_commit_date}',
-                        timestamp '{self.end_date}',
-                        '{self.interval}'
-                    ) t
-                ), graph_repos AS (
-                    SELECT
-                        r.repoid,
-                        r.name,
-                        r.branch
-                    FROM
-                        repos r
+                (
+                    SELECT DISTINCT ON (t.repoid)
+                        t.repoid, t.date, t.hits, t.misses, t.partials, t.lines
+                    FROM commit_daily_totals t
+                    INNER JOIN repos r ON r.repoid = t.repoid AND r.branch = t.branch
                     WHERE r.repoid IN {self.repoids}
-                ), spine AS (
-                    SELECT
-                        ds.date,
-                        r.repoid
-                    FROM date_series ds
-                    CROSS JOIN graph_repos r
-                ), t_ranked_commits AS (
-                    SELECT
-                        ROW_NUMBER() OVER (
-                            PARTITION BY c.repoid, DATE_TRUNC('{self.grouping_unit}', c.timestamp)
-                            ORDER BY timestamp DESC NULLS LAST
-                        ) AS commit_rank,
-                        DATE_TRUNC('{self.grouping_unit}', c.timestamp) AS "truncated_date",
-                        c.timestamp AS commit_timestamp,
-                        c.totals,
-                        r.repoid
-                    FROM
-                        commits c
-                    INNER JOIN graph_repos r ON r.repoid = c.repoid
-                        AND r.branch = c.branch
-                        AND c.state = 'complete'
-                ), commits_spine AS (
-                    SELECT
-                        s.date AS spine_date,
-                        trc.truncated_date AS truncated_commit_date,
-                        trc.commit_timestamp,
-                        trc.totals AS totals,
-                        s.repoid
-                    FROM spine s
-                    LEFT JOIN t_ranked_commits trc ON trc.truncated_date = s.date
-                      AND trc.repoid = s.repoid
-                      AND trc.commit_rank = 1
-                ), grouped AS (
-                    SELECT
-                        spine_date,
-                        truncated_commit_date,
-                        totals,
-                        repoid,
-                        SUM(CASE
-                            WHEN totals IS NOT NULL THEN 1 END
-                        ) OVER (
-                            PARTITION BY repoid
-                            ORDER BY spine_date
-                        ) AS grp_commit
-                    FROM commits_spine
-                ), corrected AS (
-                    SELECT
-                        spine_date,
-                        FIRST_VALUE(totals) OVER (
-                            PARTITION BY repoid, grp_commit
-                            ORDER BY spine_date
-                        ) AS corrected_totals
-                    FROM
-                        grouped
-                ), parsed_totals AS (
-                    SELECT
-                        spine_date,
-                        (CASE
-                            WHEN corrected_totals IS NOT NULL then (corrected_totals->>'h')::numeric
-                            WHEN corrected_totals IS NULL then 0 END
-                        ) as hits,
-                        (CASE
-                            WHEN corrected_totals IS NOT NULL then (corrected_totals->>'m')::numeric
-                            WHEN corrected_totals IS NULL then 0 END
-                        ) as misses,
-                        (CASE
-                            WHEN corrected_totals IS NOT NULL then (corrected_totals->>'p')::numeric
-                            WHEN corrected_totals IS NULL then 0 END
-                        ) as partials,
-                        (CASE
-                            WHEN corrected_totals IS NOT NULL then (corrected_totals->>'n')::numeric
-                            WHEN corrected_totals IS NULL then 0 END
-                        ) as lines
-                    FROM
-                        corrected
-                ), summed_totals AS (
+                        AND t.date < %(start_date)s
+                        AND t.lines IS NOT NULL
+                    ORDER BY t.repoid, t.date DESC
+                )
+                UNION ALL
+                (
                     SELECT
-                        spine_date::timestamp at time zone 'UTC' AS date,
-                        SUM(hits) AS total_hits,
-                        SUM(misses) AS total_misses,
-                        SUM(partials) AS total_partials,
-                        SUM(lines) AS total_lines,
-                        ROUND((SUM(hits) + SUM(partials)) / SUM(lines) * 100, 2) AS coverage
-                    FROM
-                        parsed_totals
-                    GROUP BY spine_date
-                    ORDER BY spine_date {self.ordering}
+                        t.repoid, t.date, t.hits, t.misses, t.partials, t.lines
+                    FROM commit_daily_totals t
+                    INNER JOIN repos r ON r.repoid = t.repoid AND r.branch = t.branch
+                    WHERE r.repoid IN {self.repoids}
+                        AND t.date >= %(start_date)s
+                        AND t.date < %(end_date)s
                 )
-
-                SELECT
-                    *
-                FROM summed_totals
-                WHERE date >= DATE_TRUNC('{self.grouping_unit}', timestamp '{self.start_date}');
-                """
+                ORDER BY date;
+                """,
+                dict(start_date=start_date, end_date=end_date),
+            )
+            daily_totals = self._dictfetchall(cursor)
+
+        results = []
+        latest_totals = {}  # repoid -> latest daily totals so far
+        i = 0
+        for window, next_window in zip(dates, dates[1:] + [end_date]):
+            while i < len(daily_totals) and daily_totals[i]["date"] < next_window:
+                totals = daily_totals[i]
+                if totals["lines"] is not None:
+                    # commits without totals carry forward the previous ones
+                    latest_totals[totals["repoid"]] = totals
+                i += 1
+            if window < start_date:
+                continue
+
+            total_hits = sum(t["hits"] or 0 for t in latest_totals.values())
+            total_misses = sum(t["misses"] or 0 for t in latest_totals.values())
+            total_partials = sum(t["partials"] or 0 for t in latest_totals.values())
+            total_lines = sum(t["lines"] or 0 for t in latest_totals.values())
+            coverage = None
+            if total_lines:
+                coverage = (
+                    Decimal(total_hits + total_partials) / Decimal(total_lines) * 100
+                ).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+            results.append(
+                {
+                    "date": datetime.combine(window, time(), tzinfo=dt_timezone.utc),
+                    "total_hits": total_hits,
+                    "total_misses": total_misses,
+                    "total_partials": total_partials,
+                    "total_lines": total_lines,
+                    "coverage": coverage,
+                }
             )
 
-            return self._dictfetchall(cursor)
+        if self.ordering == "DESC":
+            results.reverse()
+        return results
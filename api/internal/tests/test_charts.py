@@ -19,10 +19,12 @@ from api.internal.chart.helpers import (
     ChartQueryRunner,
     annotate_commits_with_totals,
     apply_grouping,
+    date_series,
+    truncate_date,
     validate_params,
 )
 from codecov.tests.base_test import InternalAPITest
-from core.models import Commit
+from core.models import Commit, CommitDailyTotals
 from core.tests.factories import OwnerFactory, RepositoryFactory
 from utils.test_utils import Client
 
@@ -647,6 +649,83 @@ class TestChartQueryRunnerQuery(TestCase):
         assert len(results) == 2
         assert results[0]["date"] > results[1]["date"]
 
+    def test_query_carries_forward_daily_totals(self):
+        self.commit1.timestamp = datetime(2023, 1, 2, 10)
+        self.commit1.save()
+        self.commit2.timestamp = datetime(2023, 1, 5, 10)
+        self.commit2.save()
+        # a later commit the same day replaces the earlier one
+        G(
+            model=Commit,
+            repository=self.repo2,
+            totals={"h": 20, "n": 25, "p": 0, "m": 5},
+            branch=self.repo2.branch,
+            state="complete",
+            timestamp=datetime(2023, 1, 5, 12),
+        )
+
+        query_runner = ChartQueryRunner(
+            user=self.user,
+            request_params={
+                "owner_username": self.org.username,
+                "service": self.org.service,
+                "start_date": "2023-01-04",
+                "end_date": "2023-01-06",
+                "grouping_unit": "day",
+            },
+        )
+        assert query_runner.first_complete_commit_date == date(2023, 1, 2)
+
+        results = query_runner.run_query()
+
+        assert [result["date"] for result in results] == [
+            datetime(2023, 1, day, tzinfo=UTC) for day in (4, 5, 6)
+        ]
+        assert results[0]["total_hits"] == 100
+        assert results[0]["total_lines"] == 120
+        assert results[0]["coverage"] == Decimal("91.67")
+        assert results[1]["total_hits"] == 120
+        assert results[1]["total_lines"] == 145
+        assert results[1]["coverage"] == Decimal("89.66")
+        assert results[2] == {**results[1], "date": datetime(2023, 1, 6, tzinfo=UTC)}
+
+    def test_daily_totals_follow_commit_changes(self):
+        daily_totals = CommitDailyTotals.objects.get(
+            repository=self.repo1, branch=self.repo1.branch
+        )
+        assert daily_totals.commitid == self.commit1.commitid
+        assert daily_totals.hits == 100
+
+        self.commit1.totals = {"h": 110, "n": 120, "p": 0, "m": 10}
+        self.commit1.save()
+        daily_totals.refresh_from_db()
+        assert daily_totals.hits == 110
+
+        self.commit1.state = "pending"
+        self.commit1.save()
+        assert not CommitDailyTotals.objects.filter(repository=self.repo1).exists()
+
+    def test_daily_totals_fall_back_to_earlier_commit_of_the_day(self):
+        self.commit1.timestamp = datetime(2023, 1, 2, 10)
+        self.commit1.save()
+        later = G(
+            model=Commit,
+            repository=self.repo1,
+            totals={"h": 20, "n": 25, "p": 0, "m": 5},
+            branch=self.repo1.branch,
+            state="complete",
+            timestamp=datetime(2023, 1, 2, 12),
+        )
+        daily_totals = CommitDailyTotals.objects.get(
+            repository=self.repo1, branch=self.repo1.branch
+        )
+        assert daily_totals.commitid == later.commitid
+
+        later.delete()
+        daily_totals.refresh_from_db()
+        assert daily_totals.commitid == self.commit1.commitid
+        assert daily_totals.hits == 100
+
     def test_query_doesnt_crash_if_no_commits(self):
         with self.subTest("no repos case"):
             self.org.repository_set.all().delete()
@@ -673,6 +752,29 @@ class TestChartQueryRunnerQuery(TestCase):
             ).run_query()
 
 
+class TestChartDateHelpers:
+    def test_truncate_date(self):
+        value = date(2023, 8, 17)  # a thursday
+        assert truncate_date(value, "day") == value
+        assert truncate_date(value, "week") == date(2023, 8, 14)
+        assert truncate_date(value, "month") == date(2023, 8, 1)
+        assert truncate_date(value, "quarter") == date(2023, 7, 1)
+        assert truncate_date(value, "year") == date(2023, 1, 1)
+
+    def test_date_series(self):
+        assert date_series(date(2023, 1, 1), date(2023, 7, 1), "quarter") == [
+            date(2023, 1, 1),
+            date(2023, 4, 1),
+            date(2023, 7, 1),
+        ]
+        assert date_series(date(2023, 1, 30), date(2023, 2, 1), "day") == [
+            date(2023, 1, 30),
+            date(2023, 1, 31),
+            date(2023, 2, 1),
+        ]
+        assert date_series(date(2023, 2, 1), date(2023, 1, 1), "month") == []
+
+
 class TestChartQueryRunnerHelperMethods(TestCase):
     """
     Tests for the non-querying-parts of the ChartQueryRunner, such
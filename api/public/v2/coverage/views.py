@@ -58,6 +58,8 @@ class CoverageViewSet(
             ),
             end_date=self.request.query_params.get("end_date", datetime.now()),
             branch=self.request.query_params.get("branch"),
+            # filtering and pagination need a queryset
+            cached=False,
         )
 
     def get_measurement_interval(self) -> Interval:
@@ -1,8 +1,9 @@
 from unittest.mock import patch
 
+import fakeredis
 import pytest
 from django.conf import settings
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from codecov_auth.tests.factories import OwnerFactory
 from core.tests.factories import RepositoryFactory
@@ -104,6 +105,44 @@ class CoverageViewSetTestCase(TestCase):
             "total_pages": 1,
         }
 
+    @override_settings(TIMESERIES_CACHE_ENABLED=True)
+    @patch("timeseries.helpers.get_redis_connection")
+    @patch("timeseries.models.Dataset.is_backfilled")
+    def test_repo_coverage_with_timeseries_cache(
+        self, is_backfilled, get_redis_connection, get_repo_permissions
+    ):
+        get_repo_permissions.return_value = (True, True)
+        is_backfilled.return_value = True
+        get_redis_connection.return_value = fakeredis.FakeStrictRedis()
+
+        DatasetFactory(
+            repository_id=self.repo.pk,
+            name=MeasurementName.COVERAGE.value,
+        )
+        MeasurementFactory(
+            name=MeasurementName.COVERAGE.value,
+            timestamp="2022-08-18T00:12:00",
+            owner_id=self.org.pk,
+            repo_id=self.repo.pk,
+            measurable_id=str(self.repo.pk),
+            branch="master",
+            value=80.0,
+        )
+
+        # the default date range is used
+        response = self.client.get(
+            f"/api/v2/github/codecov/repos/{self.repo.name}/coverage?interval=1d"
+        )
+        assert response.status_code == 200
+        assert response.json()["results"] == [
+            {
+                "timestamp": "2022-08-18T00:00:00Z",
+                "min": 80.0,
+                "max": 80.0,
+                "avg": 80.0,
+            },
+        ]
+
     @patch("timeseries.models.Dataset.is_backfilled")
     def test_repo_coverage_branch(self, get_repo_permissions, is_backfilled):
         get_repo_permissions.return_value = (True, True)
@@ -90,10 +90,10 @@ class FileReportViewSetTestCase(TestCase):
         url = f"{url}?{qs}"
         return self.client.get(url)
 
-    @patch("services.report.build_report_from_commit")
-    def test_file_report(self, build_report_from_commit, get_repo_permissions):
+    @patch("services.report.build_file_report_from_commit")
+    def test_file_report(self, build_file_report_from_commit, get_repo_permissions):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [sample_report()]
+        build_file_report_from_commit.side_effect = [sample_report()]
 
         res = self._request_file_report(path="foo/file1.py")
         assert res.status_code == 200
@@ -129,40 +129,44 @@ class FileReportViewSetTestCase(TestCase):
             "commit_file_url": f"{settings.CODECOV_DASHBOARD_URL}/{self.service}/{self.username}/{self.repo_name}/commit/{self.commit3.commitid}/blob/foo/file1.py",
         }
 
-        build_report_from_commit.assert_called_once_with(self.commit3)
+        build_file_report_from_commit.assert_called_once_with(
+            self.commit3, "foo/file1.py"
+        )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_file_report_from_commit")
     def test_file_report_no_walk_back(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_file_report_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [None, sample_report()]
+        build_file_report_from_commit.side_effect = [None, sample_report()]
 
         res = self._request_file_report(path="foo/file1.py")
         assert res.status_code == 404
 
-        build_report_from_commit.assert_called_once_with(self.commit3)
+        build_file_report_from_commit.assert_called_once_with(
+            self.commit3, "foo/file1.py"
+        )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_file_report_from_commit")
     def test_file_report_not_enough_walk_back(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_file_report_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [None, None, sample_report()]
+        build_file_report_from_commit.side_effect = [None, None, sample_report()]
 
         res = self._request_file_report(path="foo/file1.py", walk_back=1)
         assert res.status_code == 404
 
-        build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2)]
+        build_file_report_from_commit.assert_has_calls(
+            [call(self.commit3, "foo/file1.py"), call(self.commit2, "foo/file1.py")]
         )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_file_report_from_commit")
     def test_file_report_with_walk_back(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_file_report_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [None, None, sample_report()]
+        build_file_report_from_commit.side_effect = [None, None, sample_report()]
 
         res = self._request_file_report(path="foo/file1.py", walk_back=2)
         assert res.status_code == 200
@@ -198,16 +202,20 @@ class FileReportViewSetTestCase(TestCase):
             "commit_file_url": f"{settings.CODECOV_DASHBOARD_URL}/{self.service}/{self.username}/{self.repo_name}/commit/{self.commit1.commitid}/blob/foo/file1.py",
         }
 
-        build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2), call(self.commit1)]
+        build_file_report_from_commit.assert_has_calls(
+            [
+                call(self.commit3, "foo/file1.py"),
+                call(self.commit2, "foo/file1.py"),
+                call(self.commit1, "foo/file1.py"),
+            ]
         )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_file_report_from_commit")
     def test_file_report_with_walk_back_oldest_sha(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_file_report_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [None, None, sample_report()]
+        build_file_report_from_commit.side_effect = [None, None, sample_report()]
 
         res = self._request_file_report(
             path="foo/file1.py", walk_back=2, oldest_sha=self.commit2.commitid
@@ -215,40 +223,44 @@ class FileReportViewSetTestCase(TestCase):
         assert res.status_code == 404
 
         # does not walk back to commit1
-        build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2)]
+        build_file_report_from_commit.assert_has_calls(
+            [call(self.commit3, "foo/file1.py"), call(self.commit2, "foo/file1.py")]
         )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_file_report_from_commit")
     def test_file_report_large_walk_back(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_file_report_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [sample_report()]
+        build_file_report_from_commit.side_effect = [sample_report()]
 
         res = self._request_file_report(path="foo/file1.py", walk_back=21)
         assert res.status_code == 400
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_file_report_from_commit")
     def test_file_report_walk_back_no_parent(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_file_report_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [None, None, None]
+        build_file_report_from_commit.side_effect = [None, None, None]
 
         res = self._request_file_report(path="foo/file1.py", walk_back=20)
         assert res.status_code == 404
 
-        build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2), call(self.commit1)]
+        build_file_report_from_commit.assert_has_calls(
+            [
+                call(self.commit3, "foo/file1.py"),
+                call(self.commit2, "foo/file1.py"),
+                call(self.commit1, "foo/file1.py"),
+            ]
         )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_file_report_from_commit")
     def test_file_report_walk_back_commit_not_found(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_file_report_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [None, None, None]
+        build_file_report_from_commit.side_effect = [None, None, None]
 
         self.commit3.parent_commit_id = "wrong"
         self.commit3.save()
@@ -256,18 +268,20 @@ class FileReportViewSetTestCase(TestCase):
         res = self._request_file_report(path="foo/file1.py", walk_back=20)
         assert res.status_code == 404
 
-        build_report_from_commit.assert_has_calls([call(self.commit3)])
+        build_file_report_from_commit.assert_has_calls(
+            [call(self.commit3, "foo/file1.py")]
+        )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_file_report_from_commit")
     def test_file_report_walk_back_commit_not_complete(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_file_report_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
 
         self.commit1.state = "pending"
         self.commit1.save()
 
-        build_report_from_commit.side_effect = [
+        build_file_report_from_commit.side_effect = [
             sample_report(),  # skips since the state is pending
             None,  # skips since there's no report
             sample_report(),  # found
@@ -307,28 +321,34 @@ class FileReportViewSetTestCase(TestCase):
             "commit_file_url": f"{settings.CODECOV_DASHBOARD_URL}/{self.service}/{self.username}/{self.repo_name}/commit/{self.commit3.commitid}/blob/foo/file1.py",
         }
 
-        build_report_from_commit.assert_has_calls([call(self.commit3)])
+        build_file_report_from_commit.assert_has_calls(
+            [call(self.commit3, "foo/file1.py")]
+        )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_file_report_from_commit")
     def test_file_report_walk_back_found(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_file_report_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [None, sample_report(), sample_report()]
+        build_file_report_from_commit.side_effect = [
+            None,
+            sample_report(),
+            sample_report(),
+        ]
 
         res = self._request_file_report(path="foo/file1.py", walk_back=20)
         assert res.status_code == 200
 
-        build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2)]
+        build_file_report_from_commit.assert_has_calls(
+            [call(self.commit3, "foo/file1.py"), call(self.commit2, "foo/file1.py")]
         )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_file_report_from_commit")
     def test_file_report_missing_file(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_file_report_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [
+        build_file_report_from_commit.side_effect = [
             sample_report(),
             sample_report(),
             sample_report(),
@@ -337,16 +357,20 @@ class FileReportViewSetTestCase(TestCase):
         res = self._request_file_report(path="bar/file1.py", walk_back=20)
         assert res.status_code == 404
 
-        build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2), call(self.commit1)]
+        build_file_report_from_commit.assert_has_calls(
+            [
+                call(self.commit3, "bar/file1.py"),
+                call(self.commit2, "bar/file1.py"),
+                call(self.commit1, "bar/file1.py"),
+            ]
         )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_file_report_from_commit")
     def test_file_report_missing_parent_commit(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_file_report_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [
+        build_file_report_from_commit.side_effect = [
             sample_report(),
             sample_report(),
             sample_report(),
@@ -358,4 +382,6 @@ class FileReportViewSetTestCase(TestCase):
         res = self._request_file_report(path="bar/file1.py", walk_back=20)
         assert res.status_code == 404
 
-        build_report_from_commit.assert_has_calls([call(self.commit3)])
+        build_file_report_from_commit.assert_has_calls(
+            [call(self.commit3, "bar/file1.py")]
+        )
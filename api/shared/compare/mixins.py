@@ -77,7 +77,9 @@ class CompareViewSetMixin(CompareSlugMixin, viewsets.GenericViewSet):
                 state=CommitComparison.CommitComparisonStates.PENDING,
             )
             new_comparison.save()
-            TaskService().compute_comparison(new_comparison.pk)
+            TaskService().compute_comparison(
+                new_comparison.pk, repoid=comparison.head_commit.repository_id
+            )
             log.info(
                 "CommitComparison not found, creating and request to compute new entry"
             )
@@ -87,6 +89,7 @@ class CompareViewSetMixin(CompareSlugMixin, viewsets.GenericViewSet):
     @torngit_safe
     def retrieve(self, request, *args, **kwargs):
         comparison = self.get_object()
+        comparison.prefetch()
 
         # Some checks here for pseudo-comparisons. Basically, when pseudo-comparing,
         # we sometimes might need to tweak the base report if the user allows us to
@@ -122,6 +125,7 @@ class CompareViewSetMixin(CompareSlugMixin, viewsets.GenericViewSet):
     @torngit_safe
     def file(self, request, *args, **kwargs):
         comparison = self.get_object()
+        comparison.prefetch()
         file_path = file_path = kwargs.get("file_path")
         if file_path not in comparison.head_report:
             raise NotFound("File not found in head report.")
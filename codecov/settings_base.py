@@ -136,6 +136,19 @@ TIMESERIES_ENABLED = get_config("setup", "timeseries", "enabled", default=False)
 TIMESERIES_REAL_TIME_AGGREGATES = get_config(
     "setup", "timeseries", "real_time_aggregates", default=False
 )
+# aligned coverage measurement series are cached in redis
+# (see `timeseries.helpers.cached_coverage_measurements`)
+TIMESERIES_CACHE_ENABLED = get_config(
+    "setup", "timeseries", "cache_enabled", default=True
+)
+TIMESERIES_CACHE_TTL = get_config(
+    "setup", "timeseries", "cache_ttl", default=60 * 60 * 24
+)
+# the continuous aggregates are refreshed hourly so cached bins are only considered
+# final once they ended this many seconds ago
+TIMESERIES_CACHE_AGGREGATE_LAG = get_config(
+    "setup", "timeseries", "cache_aggregate_lag", default=2 * 60 * 60
+)
 
 timeseries_database_url = get_config("services", "timeseries_database_url")
 if timeseries_database_url:
@@ -473,8 +486,45 @@ CORS_ALLOWED_ORIGINS = []
 
 GRAPHQL_PLAYGROUND = True
 
+# number of parsed and validated operations kept in memory
+# (see `graphql_api.helpers.persisted_queries`)
+GRAPHQL_OPERATION_CACHE_SIZE = get_config(
+    "setup", "graphql", "operation_cache_size", default=1000
+)
+
+# operations are statically costed before execution (see `graphql_api.helpers.query_cost`)
+# and rejected if a single operation costs more than `GRAPHQL_QUERY_MAX_COST` or if the
+# owner spent more than `GRAPHQL_QUERY_COST_BUDGET` within the last budget window.
+# Operations with more than `GRAPHQL_QUERY_COST_MAX_NODES` selections (counting every
+# fragment once) are rejected without being costed.
+GRAPHQL_QUERY_MAX_COST_ENABLED = get_config(
+    "setup", "graphql", "query_max_cost_enabled", default=True
+)
+GRAPHQL_QUERY_MAX_COST = get_config(
+    "setup", "graphql", "query_max_cost", default=50_000
+)
+GRAPHQL_QUERY_COST_MAX_NODES = get_config(
+    "setup", "graphql", "query_cost_max_nodes", default=10_000
+)
+GRAPHQL_QUERY_COST_BUDGET_ENABLED = get_config(
+    "setup", "graphql", "query_cost_budget_enabled", default=True
+)
+GRAPHQL_QUERY_COST_BUDGET = get_config(
+    "setup", "graphql", "query_cost_budget", default=500_000
+)
+GRAPHQL_QUERY_COST_BUDGET_WINDOW = get_config(
+    "setup", "graphql", "query_cost_budget_window", default=60
+)
+
 UPLOAD_THROTTLING_ENABLED = True
 
+# upload counts used for throttling are kept in redis and recounted from the
+# database once they expire (see `upload.counters`)
+UPLOAD_COUNTERS_ENABLED = get_config(
+    "setup", "upload_counters", "enabled", default=True
+)
+UPLOAD_COUNTERS_TTL = get_config("setup", "upload_counters", "ttl", default=300)
+
 SENTRY_JWT_SHARED_SECRET = get_config(
     "sentry", "jwt_shared_secret", default=None
 ) or get_config("setup", "sentry", "jwt_shared_secret", default=None)
@@ -506,6 +556,83 @@ SHELTER_SHARED_SECRET = get_config("setup", "shelter_shared_secret", default=Non
 # TODO: we can eventually get rid of this once it's confirmed working well for many repos
 REPORT_BUILDER_REPO_IDS = get_config("setup", "report_builder", "repo_ids", default=[])
 
+# parsed report data is cached in-process (bounded by size) and in redis
+# (see `services.report.ReportDataCache`)
+REPORT_CACHE_ENABLED = get_config("setup", "report_cache", "enabled", default=True)
+REPORT_CACHE_MAX_BYTES = get_config(
+    "setup", "report_cache", "max_bytes", default=256 * 1024 * 1024
+)
+REPORT_CACHE_REDIS_TTL = get_config(
+    "setup", "report_cache", "redis_ttl", default=60 * 60
+)
+REPORT_CACHE_REDIS_MAX_BYTES = get_config(
+    "setup", "report_cache", "redis_max_bytes", default=32 * 1024 * 1024
+)
+
+# file sources fetched from the git provider are cached in-process (bounded by
+# size) and in redis (see `services.source.SourceCache`)
+SOURCE_CACHE_ENABLED = get_config("setup", "source_cache", "enabled", default=True)
+SOURCE_CACHE_MAX_BYTES = get_config(
+    "setup", "source_cache", "max_bytes", default=64 * 1024 * 1024
+)
+SOURCE_CACHE_REDIS_TTL = get_config(
+    "setup", "source_cache", "redis_ttl", default=60 * 60 * 24
+)
+SOURCE_CACHE_REDIS_MAX_BYTES = get_config(
+    "setup", "source_cache", "redis_max_bytes", default=4 * 1024 * 1024
+)
+
+# rendered badges and graphs are cached in redis (see `graphs.mixins.GraphBadgeAPIMixin`)
+# and clients/proxies may reuse them for as long via `Cache-Control`
+GRAPHS_CACHE_ENABLED = get_config("setup", "graphs_cache", "enabled", default=True)
+GRAPHS_CACHE_TTL = get_config("setup", "graphs_cache", "ttl", default=60)
+
+# authentication token lookups are cached in redis and evicted whenever the token,
+# repository or owner is saved (see `codecov_auth.authentication.cache`)
+AUTH_TOKEN_CACHE_ENABLED = get_config(
+    "setup", "auth_token_cache", "enabled", default=True
+)
+AUTH_TOKEN_CACHE_TTL = get_config("setup", "auth_token_cache", "ttl", default=60)
+
+# the final yaml of a commit is cached in redis (see `services.yaml.final_commit_yaml`)
+COMMIT_YAML_CACHE_ENABLED = get_config(
+    "setup", "commit_yaml_cache", "enabled", default=True
+)
+COMMIT_YAML_CACHE_TTL = get_config(
+    "setup", "commit_yaml_cache", "ttl", default=60 * 60 * 24
+)
+# how long concurrent cache misses wait for the request fetching the yaml before
+# fetching it themselves (must be less than the 30s lock expiry)
+COMMIT_YAML_CACHE_LOCK_TIMEOUT = get_config(
+    "setup", "commit_yaml_cache", "lock_timeout", default=5
+)
+
+# how long concurrent requests for a commit's stale flag totals wait for the one
+# rebuilding the rollup (see `services.report.commit_flag_totals`) before building
+# the report themselves (must be less than the 60s lock expiry)
+FLAG_TOTALS_ROLLUP_LOCK_TIMEOUT = get_config(
+    "setup", "flag_totals_rollup", "lock_timeout", default=5
+)
+
+# git provider comparisons between two shas are cached in redis
+# (see `services.comparison.get_git_comparisons`)
+COMPARE_CACHE_ENABLED = get_config("setup", "compare_cache", "enabled", default=True)
+COMPARE_CACHE_TTL = get_config(
+    "setup", "compare_cache", "ttl", default=60 * 60 * 24 * 7
+)
+
+# the plan celery tasks are routed by is cached in memory per owner/repository
+# (see `services.task.task_router`)
+TASK_ROUTING_PLAN_CACHE_ENABLED = get_config(
+    "setup", "task_routing_plan_cache", "enabled", default=True
+)
+TASK_ROUTING_PLAN_CACHE_SIZE = get_config(
+    "setup", "task_routing_plan_cache", "size", default=10000
+)
+TASK_ROUTING_PLAN_CACHE_TTL = get_config(
+    "setup", "task_routing_plan_cache", "ttl", default=60
+)
+
 SENTRY_ENV = os.environ.get("CODECOV_ENV", False)
 SENTRY_DSN = os.environ.get("SERVICES__SENTRY__SERVER_DSN", None)
 if SENTRY_DSN is not None:
@@ -35,3 +35,15 @@ CORS_ALLOWED_ORIGINS = [
 
 COOKIES_DOMAIN = "localhost"
 SESSION_COOKIE_DOMAIN = "localhost"
+
+REPORT_CACHE_ENABLED = False
+COMMIT_YAML_CACHE_ENABLED = False
+TIMESERIES_CACHE_ENABLED = False
+GRAPHQL_QUERY_MAX_COST_ENABLED = False
+GRAPHQL_QUERY_COST_BUDGET_ENABLED = False
+GRAPHS_CACHE_ENABLED = False
+AUTH_TOKEN_CACHE_ENABLED = False
+UPLOAD_COUNTERS_ENABLED = False
+COMPARE_CACHE_ENABLED = False
+SOURCE_CACHE_ENABLED = False
+TASK_ROUTING_PLAN_CACHE_ENABLED = False
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import logging
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+from django.db.models import Model, QuerySet
+from redis.exceptions import RedisError
+
+from services.redis_configuration import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+
+def token_cache_key(kind: str, token) -> str:
+    # tokens are hashed so that they're never stored in redis in plain text
+    digest = hashlib.sha256(str(token).encode()).hexdigest()
+    return f"auth/{kind}/{digest}"
+
+
+def principal_cache_key(instance: Model) -> str:
+    """
+    Set of the token cache keys whose cached value depends on `instance`
+    """
+    return f"auth/principal/{instance._meta.label_lower}/{instance.pk}"
+
+
+def _get_cached(key: str):
+    try:
+        cached = get_redis_connection().get(key)
+    except RedisError:
+        log.warning("Unable to read auth token cache", exc_info=True)
+        return None
+    if cached is not None:
+        try:
+            return json.loads(cached)
+        except ValueError:
+            # not written by this version, treated as a miss
+            return None
+
+
+def _set_cached(key: str, value, principals: Iterable[Model]):
+    ttl = settings.AUTH_TOKEN_CACHE_TTL
+    try:
+        pipeline = get_redis_connection().pipeline()
+        pipeline.set(key, json.dumps(value), ex=ttl)
+        for instance in principals:
+            principal_key = principal_cache_key(instance)
+            pipeline.sadd(principal_key, key)
+            pipeline.expire(principal_key, ttl)
+        pipeline.execute()
+    except RedisError:
+        log.warning("Unable to write auth token cache", exc_info=True)
+
+
+def cached_pk_lookup(
+    kind: str,
+    token,
+    queryset: QuerySet,
+    lookup: Callable[[], Optional[Model]],
+    principals: Callable[[Model], Iterable[Model]],
+) -> Optional[Model]:
+    """
+    Returns the result of `lookup` (ex. the `Repository` an upload token belongs to)
+    for `token`.  Only its primary key is cached in redis, for `AUTH_TOKEN_CACHE_TTL`
+    seconds: the instance itself is always read from `queryset` so it's never stale,
+    even when it's updated outside of Django (ex. owners by the worker).
+
+    `principals` returns the model instances the result was built from.  Saving or
+    deleting any of them (ex. regenerating the token or deactivating the repo) evicts
+    the cached key (see `codecov_auth.signals`).  Failed lookups aren't cached.
+    """
+    if not settings.AUTH_TOKEN_CACHE_ENABLED:
+        return lookup()
+
+    key = token_cache_key(kind, token)
+    pk = _get_cached(key)
+    if pk is not None:
+        instance = queryset.filter(pk=pk).first()
+        if instance is not None:
+            return instance
+
+    instance = lookup()
+    if instance is not None:
+        _set_cached(key, instance.pk, principals(instance))
+    return instance
+
+
+def evict_principal(instance: Model):
+    """
+    Evicts every cached token lookup that depends on `instance`
+    """
+    if not settings.AUTH_TOKEN_CACHE_ENABLED:
+        return
+
+    principal_key = principal_cache_key(instance)
+    try:
+        redis = get_redis_connection()
+        keys = redis.smembers(principal_key)
+        redis.delete(principal_key, *keys)
+    except RedisError:
+        log.warning(
+            "Unable to evict auth token cache",
+            extra=dict(principal=principal_key),
+            exc_info=True,
+        )
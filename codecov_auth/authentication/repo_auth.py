@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
 from django.conf import settings
@@ -7,6 +7,7 @@ from django.db.models import QuerySet
 from django.utils import timezone
 from rest_framework import authentication, exceptions
 
+from codecov_auth.authentication.cache import cached_pk_lookup
 from codecov_auth.authentication.types import RepositoryAsUser, RepositoryAuthInterface
 from codecov_auth.models import OrganizationLevelToken, Owner, RepositoryToken
 from core.models import Repository
@@ -66,6 +67,19 @@ class OrgLevelTokenRepositoryAuth(RepositoryAuthInterface):
         return list(Repository.objects.filter(author=self._org).all())
 
 
+def repository_by_upload_token(token: UUID) -> Optional[Repository]:
+    repositories = Repository.objects.select_related("author").filter(
+        upload_token=token
+    )
+    return cached_pk_lookup(
+        "upload_token",
+        token,
+        repositories,
+        lambda: repositories.first(),
+        principals=lambda repository: [repository, repository.author],
+    )
+
+
 class RepositoryLegacyQueryTokenAuthentication(authentication.BaseAuthentication):
     def authenticate(self, request):
         token = request.GET.get("token")
@@ -75,9 +89,8 @@ class RepositoryLegacyQueryTokenAuthentication(authentication.BaseAuthentication
             token = UUID(token)
         except ValueError:
             return None
-        try:
-            repository = Repository.objects.get(upload_token=token)
-        except Repository.DoesNotExist:
+        repository = repository_by_upload_token(token)
+        if repository is None:
             return None
         return (
             RepositoryAsUser(repository),
@@ -91,9 +104,8 @@ class RepositoryLegacyTokenAuthentication(authentication.TokenAuthentication):
             token = UUID(token)
         except (ValueError, TypeError):
             raise exceptions.AuthenticationFailed("Invalid token.")
-        try:
-            repository = Repository.objects.get(upload_token=token)
-        except Repository.DoesNotExist:
+        repository = repository_by_upload_token(token)
+        if repository is None:
             raise exceptions.AuthenticationFailed("Invalid token.")
         return (
             RepositoryAsUser(repository),
@@ -105,9 +117,15 @@ class RepositoryTokenAuthentication(authentication.TokenAuthentication):
     keyword = "Repotoken"
 
     def authenticate_credentials(self, key):
-        try:
-            token = RepositoryToken.objects.select_related("repository").get(key=key)
-        except RepositoryToken.DoesNotExist:
+        tokens = RepositoryToken.objects.select_related("repository").filter(key=key)
+        token = cached_pk_lookup(
+            "repository_token",
+            key,
+            tokens,
+            lambda: tokens.first(),
+            principals=lambda token: [token, token.repository],
+        )
+        if token is None:
             raise exceptions.AuthenticationFailed("Invalid token.")
 
         if not token.repository.active:
@@ -31,7 +31,9 @@ class OnboardUserInteractor(BaseInteractor):
         self.current_owner.onboarding_completed = True
         self.current_owner.business_email = params.get("business_email")
         self.current_owner.email = params.get("email")
-        self.current_owner.save()
+        self.current_owner.save(
+            update_fields=["onboarding_completed", "business_email", "email"]
+        )
 
         OwnerProfile.objects.update_or_create(
             owner=self.current_owner,
@@ -30,5 +30,5 @@ class UpdateProfileInteractor(BaseInteractor):
         self.validate(**kwargs)
         self.update_field("email", **kwargs)
         self.update_field("name", **kwargs)
-        self.current_owner.save()
+        self.current_owner.save(update_fields=["email", "name"])
         return self.current_owner
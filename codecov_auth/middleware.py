@@ -13,6 +13,7 @@ from django.urls import resolve
 from django.utils.deprecation import MiddlewareMixin
 from rest_framework import exceptions
 
+from codecov_auth.authentication.cache import cached_pk_lookup
 from codecov_auth.models import Owner, Service
 from utils.services import get_long_service_name
 
@@ -52,19 +53,29 @@ class CurrentOwnerMiddleware(MiddlewareMixin):
             return
 
         current_user = request.user
+        current_owner_id = request.session.get("current_owner_id")
+        service = get_service(request)
+
+        request.current_owner = cached_pk_lookup(
+            "current_owner",
+            (current_user.pk, current_owner_id, service),
+            Owner.objects.all(),
+            lambda: self.get_current_owner(current_user, current_owner_id, service),
+            principals=lambda owner: [owner],
+        )
+
+    def get_current_owner(self, current_user, current_owner_id, service):
         current_owner = None
 
-        current_owner_id = request.session.get("current_owner_id")
         if current_owner_id is not None:
             current_owner = current_user.owners.filter(pk=current_owner_id).first()
 
-        service = get_service(request)
         if service and (current_owner is None or service != current_owner.service):
             # FIXME: this is OK (for now) since we're only allowing a single owner of a given
             # service to be linked to any 1 user
             current_owner = current_user.owners.filter(service=service).first()
 
-        request.current_owner = current_owner
+        return current_owner
 
 
 class ImpersonationMiddleware(MiddlewareMixin):
@@ -3,11 +3,18 @@ import logging
 from datetime import datetime
 
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from google.cloud import pubsub_v1
 
-from codecov_auth.models import OrganizationLevelToken, Owner, OwnerProfile
+from codecov_auth.authentication.cache import evict_principal
+from codecov_auth.models import (
+    OrganizationLevelToken,
+    Owner,
+    OwnerProfile,
+    RepositoryToken,
+)
+from core.models import Repository
 
 
 @receiver(post_save, sender=Owner)
@@ -47,3 +54,19 @@ def update_repository(sender, instance: OrganizationLevelToken, **kwargs):
                 }
             ).encode("utf-8"),
         )
+
+
+@receiver(post_save, sender=Owner, dispatch_uid="auth_cache_owner_saved")
+@receiver(post_delete, sender=Owner, dispatch_uid="auth_cache_owner_deleted")
+@receiver(post_save, sender=Repository, dispatch_uid="auth_cache_repo_saved")
+@receiver(post_delete, sender=Repository, dispatch_uid="auth_cache_repo_deleted")
+@receiver(post_save, sender=RepositoryToken, dispatch_uid="auth_cache_repo_token_saved")
+@receiver(
+    post_delete, sender=RepositoryToken, dispatch_uid="auth_cache_repo_token_deleted"
+)
+def evict_cached_auth(sender, instance, **kwargs):
+    """
+    Regenerating, revoking or deleting a token (or changing the repo/owner it
+    belongs to) evicts any cached authentication built from it.
+    """
+    evict_principal(instance)
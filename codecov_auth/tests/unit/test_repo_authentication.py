@@ -2,13 +2,16 @@ import uuid
 from datetime import datetime, timedelta
 from unittest.mock import patch
 
+import fakeredis
 import pytest
 from django.db.models import QuerySet
 from django.test import override_settings
 from django.utils import timezone
+from redis.exceptions import RedisError
 from rest_framework import exceptions
 from rest_framework.test import APIRequestFactory
 
+from codecov_auth.authentication.cache import token_cache_key
 from codecov_auth.authentication.repo_auth import (
     GlobalTokenAuthentication,
     OrgLevelTokenAuthentication,
@@ -16,7 +19,8 @@ from codecov_auth.authentication.repo_auth import (
     RepositoryLegacyTokenAuthentication,
     RepositoryTokenAuthentication,
 )
-from codecov_auth.models import OrganizationLevelToken, RepositoryToken
+from codecov_auth.middleware import CurrentOwnerMiddleware
+from codecov_auth.models import OrganizationLevelToken, Owner, RepositoryToken
 from codecov_auth.tests.factories import OwnerFactory
 from core.tests.factories import RepositoryFactory, RepositoryTokenFactory
 
@@ -341,3 +345,103 @@ class TestOrgLevelTokenAuthentication(object):
         assert auth.allows_repo(repository)
         assert auth.allows_repo(other_repo_from_owner)
         assert not auth.allows_repo(random_repo)
+
+
+@override_settings(AUTH_TOKEN_CACHE_ENABLED=True, AUTH_TOKEN_CACHE_TTL=60)
+class TestAuthTokenCache(object):
+    @pytest.fixture(autouse=True)
+    def redis(self, mocker):
+        redis = fakeredis.FakeStrictRedis()
+        mocker.patch(
+            "codecov_auth.authentication.cache.get_redis_connection",
+            return_value=redis,
+        )
+        return redis
+
+    def test_upload_token_lookup_is_cached(self, db, django_assert_num_queries, redis):
+        repo = RepositoryFactory.create()
+        authentication = RepositoryLegacyTokenAuthentication()
+        authentication.authenticate_credentials(str(repo.upload_token))
+
+        # only the primary key is cached, the repository is read by it
+        assert (
+            redis.get(token_cache_key("upload_token", repo.upload_token))
+            == str(repo.pk).encode()
+        )
+        with django_assert_num_queries(1):
+            user, auth = authentication.authenticate_credentials(str(repo.upload_token))
+            assert user._repository == repo
+            assert user._repository.author == repo.author
+
+    def test_unreadable_cached_values_are_ignored(self, db, redis):
+        repo = RepositoryFactory.create()
+        redis.set(token_cache_key("upload_token", repo.upload_token), b"\x80\x04K\x01.")
+        authentication = RepositoryLegacyTokenAuthentication()
+        user, auth = authentication.authenticate_credentials(str(repo.upload_token))
+        assert user._repository == repo
+
+    def test_failed_lookups_are_not_cached(self, db):
+        token = uuid.uuid4()
+        authentication = RepositoryLegacyTokenAuthentication()
+        with pytest.raises(exceptions.AuthenticationFailed):
+            authentication.authenticate_credentials(str(token))
+
+        repo = RepositoryFactory.create(upload_token=token)
+        user, auth = authentication.authenticate_credentials(str(token))
+        assert user._repository == repo
+
+    def test_regenerating_token_evicts_cache(self, db):
+        repo = RepositoryFactory.create()
+        old_token = repo.upload_token
+        authentication = RepositoryLegacyTokenAuthentication()
+        authentication.authenticate_credentials(str(old_token))
+
+        repo.upload_token = uuid.uuid4()
+        repo.save()
+
+        with pytest.raises(exceptions.AuthenticationFailed):
+            authentication.authenticate_credentials(str(old_token))
+        user, auth = authentication.authenticate_credentials(str(repo.upload_token))
+        assert user._repository == repo
+
+    def test_deactivating_repo_evicts_repository_token(self, db):
+        token = RepositoryTokenFactory.create(
+            repository__active=True, token_type="profiling"
+        )
+        authentication = RepositoryTokenAuthentication()
+        authentication.authenticate_credentials(token.key)
+
+        token.repository.active = False
+        token.repository.save()
+
+        with pytest.raises(exceptions.AuthenticationFailed):
+            authentication.authenticate_credentials(token.key)
+
+    def test_current_owner_is_read_from_the_database(
+        self, db, django_assert_num_queries
+    ):
+        owner = OwnerFactory.create(service="github")
+        middleware = CurrentOwnerMiddleware(lambda request: None)
+
+        def current_owner():
+            request = APIRequestFactory().get("/graphql/gh")
+            request.user = owner.user
+            request.session = {"current_owner_id": owner.pk}
+            middleware.process_request(request)
+            return request.current_owner
+
+        assert current_owner() == owner
+
+        # the worker updates owners without going through django signals
+        Owner.objects.filter(pk=owner.pk).update(permission=[1, 2])
+        with django_assert_num_queries(1):
+            owner_from_cache = current_owner()
+        assert owner_from_cache == owner
+        assert owner_from_cache.permission == [1, 2]
+
+    def test_redis_errors_fall_back_to_database(self, db, mocker, redis):
+        mocker.patch.object(redis, "get", side_effect=RedisError)
+        repo = RepositoryFactory.create()
+        authentication = RepositoryLegacyTokenAuthentication()
+        user, auth = authentication.authenticate_credentials(str(repo.upload_token))
+        assert user._repository == repo
@@ -3,24 +3,49 @@ import datetime
 from dateutil import parser
 from django.db.models import (
     Avg,
+    Case,
     Count,
     DateTimeField,
     F,
     FloatField,
     IntegerField,
+    JSONField,
     Manager,
     OuterRef,
     Q,
     QuerySet,
     Subquery,
     Sum,
+    TextField,
     Value,
+    When,
 )
 from django.db.models.fields.json import KeyTextTransform
 from django.db.models.functions import Cast, Coalesce
 from django.utils import timezone
 
 
+def _from_commit_summary(conditions, fallback, output_field):
+    """
+    Picks a value from the repository's `RepositoryCommitSummary` according to the
+    given list of `(condition, field name)` and falls back to `fallback` (typically
+    a correlated subquery over `commits`) if none match.  Postgres only evaluates
+    the fallback for the rows that need it.
+    """
+    return Coalesce(
+        Case(
+            *[
+                When(condition, then=F(f"commit_summary__{field}"))
+                for condition, field in conditions
+            ],
+            default=None,
+            output_field=output_field,
+        ),
+        fallback,
+        output_field=output_field,
+    )
+
+
 class RepositoryQuerySet(QuerySet):
     def viewable_repos(self, owner):
         """
@@ -65,31 +90,62 @@ class RepositoryQuerySet(QuerySet):
             KeyTextTransform("c", "recent_commit_totals"),
             output_field=FloatField(),
         )
-        hits = Cast(
-            KeyTextTransform("h", "recent_commit_totals"),
-            output_field=IntegerField(),
-        )
-        misses = Cast(
-            KeyTextTransform("m", "recent_commit_totals"),
-            output_field=IntegerField(),
-        )
-        lines = Cast(
-            KeyTextTransform("n", "recent_commit_totals"),
-            output_field=IntegerField(),
-        )
+
+        # the summary's latest/previous heads can be used as long as they're more
+        # than an hour old, otherwise we need to look further back
+        summary_is_current = Q(commit_summary__branch=F("branch"))
+        summary_heads = [
+            (
+                summary_is_current & Q(commit_summary__latest_timestamp__lte=timestamp),
+                "latest",
+            ),
+            (
+                summary_is_current
+                & Q(commit_summary__previous_timestamp__lte=timestamp),
+                "previous",
+            ),
+        ]
+
+        # the latest head has typed copies of its totals, any other commit's
+        # totals are cast from json
+        latest_is_recent = summary_heads[0][0]
+
+        def totals_value(key, field):
+            return Case(
+                When(latest_is_recent, then=F(f"commit_summary__latest_{field}")),
+                default=Cast(
+                    KeyTextTransform(key, "recent_commit_totals"),
+                    output_field=IntegerField(),
+                ),
+                output_field=IntegerField(),
+            )
 
         return self.annotate(
-            recent_commit_totals=Subquery(commits_queryset.values("totals")[:1]),
-            coverage_sha=Subquery(commits_queryset.values("commitid")[:1]),
-            recent_coverage=coverage,
-            coverage=Coalesce(
+            recent_commit_totals=_from_commit_summary(
+                [(condition, f"{head}_totals") for condition, head in summary_heads],
+                Subquery(commits_queryset.values("totals")[:1]),
+                output_field=JSONField(),
+            ),
+            coverage_sha=_from_commit_summary(
+                [(condition, f"{head}_commitid") for condition, head in summary_heads],
+                Subquery(commits_queryset.values("commitid")[:1]),
+                output_field=TextField(),
+            ),
+        ).annotate(
+            recent_coverage=_from_commit_summary(
+                [(condition, f"{head}_coverage") for condition, head in summary_heads],
                 coverage,
+                output_field=FloatField(),
+            ),
+            coverage=Coalesce(
+                F("recent_coverage"),
                 Value(-1),
                 output_field=FloatField(),
             ),
-            hits=hits,
-            misses=misses,
-            lines=lines,
+            hits=totals_value("h", "hits"),
+            misses=totals_value("m", "misses"),
+            partials=totals_value("p", "partials"),
+            lines=totals_value("n", "lines"),
         )
 
     def with_latest_commit_totals_before(
@@ -113,13 +169,35 @@ class RepositoryQuerySet(QuerySet):
             timestamp__date__lte=timestamp,
         ).order_by("-timestamp")
 
+        if branch:
+            summary_is_current = Q(commit_summary__branch=branch)
+        else:
+            summary_is_current = Q(commit_summary__branch=F("branch"))
+        latest_before = summary_is_current & Q(
+            commit_summary__latest_timestamp__date__lte=timestamp
+        )
+        previous_before = summary_is_current & Q(
+            commit_summary__previous_timestamp__date__lte=timestamp
+        )
+
         queryset = self.annotate(
-            latest_commit_totals=Subquery(commit_query_set.values("totals")[:1])
+            latest_commit_totals=_from_commit_summary(
+                [
+                    (latest_before, "latest_totals"),
+                    (previous_before, "previous_totals"),
+                ],
+                Subquery(commit_query_set.values("totals")[:1]),
+                output_field=JSONField(),
+            )
         )
 
         if include_previous_totals:
             queryset = queryset.annotate(
-                prev_commit_totals=Subquery(commit_query_set.values("totals")[1:2])
+                prev_commit_totals=_from_commit_summary(
+                    [(latest_before, "previous_totals")],
+                    Subquery(commit_query_set.values("totals")[1:2]),
+                    output_field=JSONField(),
+                )
             )
         return queryset
 
@@ -242,10 +320,13 @@ class RepositoryQuerySet(QuerySet):
         """
         from core.models import Commit
 
-        latest_commit_at = Subquery(
-            Commit.objects.filter(repository_id=OuterRef("pk"))
-            .order_by("-timestamp")
-            .values("timestamp")[:1]
+        latest_commit_at = Coalesce(
+            F("commit_summary__latest_commit_at"),
+            Subquery(
+                Commit.objects.filter(repository_id=OuterRef("pk"))
+                .order_by("-timestamp")
+                .values("timestamp")[:1]
+            ),
         )
         return self.annotate(
             true_latest_commit_at=latest_commit_at,
@@ -264,7 +345,10 @@ class RepositoryQuerySet(QuerySet):
             "timestamp"
         )
         return self.annotate(
-            oldest_commit_at=Subquery(commits.values("timestamp")[:1]),
+            oldest_commit_at=Coalesce(
+                F("commit_summary__oldest_commit_at"),
+                Subquery(commits.values("timestamp")[:1]),
+            ),
         )
 
     def get_or_create_from_git_repo(self, git_repo, owner):
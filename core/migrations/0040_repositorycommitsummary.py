@@ -0,0 +1,275 @@
+# Generated by Django 4.2.3 on 2023-11-06 14:02
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+import core.models
+from utils.migrations import RiskyRunSQL
+
+create_functions = """
+-- totals are written by the worker as json, a value we don't expect must not abort
+-- the write to `commits` so it's stored as null instead
+create or replace function commit_totals_numeric(_value text) returns numeric as $$
+    select case
+        when _value ~ '^\\s*[-+]?([0-9]+(\\.[0-9]*)?|\\.[0-9]+)\\s*$' then _value::numeric
+    end
+$$ language sql immutable;
+
+create or replace function commit_totals_bigint(_value text) returns bigint as $$
+    select case
+        when n between -9223372036854775808 and 9223372036854775807 then round(n)::bigint
+    end
+    from (select commit_totals_numeric(_value) as n) as _
+$$ language sql immutable;
+
+
+-- recomputes the whole summary row of a repository from the commits table
+create or replace function refresh_repository_commit_summary(_repoid int) returns void as $$
+declare _branch text;
+begin
+    select branch into _branch from repos where repoid = _repoid;
+    if not found then
+        delete from repository_commit_summaries where repoid = _repoid;
+        return;
+    end if;
+
+    insert into repository_commit_summaries (repoid, branch, latest_commit_at, oldest_commit_at, updatestamp)
+    select _repoid, _branch, max(timestamp), min(timestamp), now()
+    from commits
+    where repoid = _repoid
+    on conflict (repoid) do update
+    set branch = excluded.branch,
+        latest_commit_at = excluded.latest_commit_at,
+        oldest_commit_at = excluded.oldest_commit_at,
+        updatestamp = excluded.updatestamp;
+
+    -- like the queries this summary replaces (see `core.managers`), deleted commits
+    -- are not filtered out
+    with heads as (
+        select commitid, timestamp, totals, row_number() over (order by timestamp desc) as n
+        from commits
+        where repoid = _repoid
+            and branch = _branch
+            and state = 'complete'
+        order by timestamp desc
+        limit 2
+    )
+    update repository_commit_summaries
+    set latest_commitid = latest.commitid,
+        latest_timestamp = latest.timestamp,
+        latest_totals = latest.totals,
+        latest_coverage = commit_totals_numeric(latest.totals->>'c')::float,
+        latest_hits = commit_totals_bigint(latest.totals->>'h'),
+        latest_misses = commit_totals_bigint(latest.totals->>'m'),
+        latest_partials = commit_totals_bigint(latest.totals->>'p'),
+        latest_lines = commit_totals_bigint(latest.totals->>'n'),
+        previous_commitid = previous.commitid,
+        previous_timestamp = previous.timestamp,
+        previous_totals = previous.totals,
+        previous_coverage = commit_totals_numeric(previous.totals->>'c')::float
+    from (select 1) as _
+    left join heads latest on latest.n = 1
+    left join heads previous on previous.n = 2
+    where repoid = _repoid;
+end;
+$$ language plpgsql;
+
+
+-- Keeps the summary up to date as commits are written.  The summary row is never
+-- locked up front: every change is a single statement guarded by the timestamps
+-- it compares against, so it's a no-op (and doesn't lock the row) unless the
+-- commit actually moves a bound or a head.  Postgres re-checks the guard against
+-- the latest row version if a concurrent write updated it first.
+create or replace function commits_update_repository_summary() returns trigger as $$
+declare
+    _summary repository_commit_summaries;
+begin
+    select * into _summary from repository_commit_summaries where repoid = new.repoid;
+    if not found then
+        -- first commit we see for this repository
+        perform refresh_repository_commit_summary(new.repoid);
+        return null;
+    end if;
+
+    if new.commitid in (_summary.latest_commitid, _summary.previous_commitid) then
+        -- one of the heads changed (ex. new totals or state)
+        perform refresh_repository_commit_summary(new.repoid);
+        return null;
+    end if;
+
+    update repository_commit_summaries
+    set latest_commit_at = greatest(latest_commit_at, new.timestamp),
+        oldest_commit_at = least(oldest_commit_at, new.timestamp),
+        updatestamp = now()
+    where repoid = new.repoid
+        and (
+            latest_commit_at is null
+            or oldest_commit_at is null
+            or new.timestamp > latest_commit_at
+            or new.timestamp < oldest_commit_at
+        );
+
+    if new.state is distinct from 'complete' then
+        return null;
+    end if;
+
+    -- new head, the current head becomes the previous one
+    update repository_commit_summaries
+    set previous_commitid = latest_commitid,
+        previous_timestamp = latest_timestamp,
+        previous_totals = latest_totals,
+        previous_coverage = latest_coverage,
+        latest_commitid = new.commitid,
+        latest_timestamp = new.timestamp,
+        latest_totals = new.totals,
+        latest_coverage = commit_totals_numeric(new.totals->>'c')::float,
+        latest_hits = commit_totals_bigint(new.totals->>'h'),
+        latest_misses = commit_totals_bigint(new.totals->>'m'),
+        latest_partials = commit_totals_bigint(new.totals->>'p'),
+        latest_lines = commit_totals_bigint(new.totals->>'n'),
+        updatestamp = now()
+    where repoid = new.repoid
+        and branch = new.branch
+        and latest_commitid is distinct from new.commitid
+        and (latest_timestamp is null or new.timestamp >= latest_timestamp);
+    if found then
+        return null;
+    end if;
+
+    -- new previous head
+    update repository_commit_summaries
+    set previous_commitid = new.commitid,
+        previous_timestamp = new.timestamp,
+        previous_totals = new.totals,
+        previous_coverage = commit_totals_numeric(new.totals->>'c')::float,
+        updatestamp = now()
+    where repoid = new.repoid
+        and branch = new.branch
+        and latest_commitid is distinct from new.commitid
+        and previous_commitid is distinct from new.commitid
+        and new.timestamp < latest_timestamp
+        and (previous_timestamp is null or new.timestamp > previous_timestamp);
+
+    return null;
+end;
+$$ language plpgsql;
+
+
+-- statement level so that deleting many commits (ex. with their repository)
+-- refreshes each summary at most once
+create or replace function commits_delete_repository_summary() returns trigger as $$
+declare _repoid int;
+begin
+    for _repoid in
+        select distinct deleted_commits.repoid
+        from deleted_commits
+        join repository_commit_summaries summary on summary.repoid = deleted_commits.repoid
+        where deleted_commits.commitid in (summary.latest_commitid, summary.previous_commitid)
+            or deleted_commits.timestamp in (summary.latest_commit_at, summary.oldest_commit_at)
+    loop
+        perform refresh_repository_commit_summary(_repoid);
+    end loop;
+    return null;
+end;
+$$ language plpgsql;
+
+
+create or replace function repos_update_commit_summary() returns trigger as $$
+begin
+    perform refresh_repository_commit_summary(new.repoid);
+    return null;
+end;
+$$ language plpgsql;
+
+
+create trigger commits_insert_repository_summary after insert on commits
+for each row
+execute procedure commits_update_repository_summary();
+
+create trigger commits_update_repository_summary after update on commits
+for each row
+when (
+    new.state is distinct from old.state
+    or new.totals is distinct from old.totals
+    or new.branch is distinct from old.branch
+    or new.timestamp is distinct from old.timestamp
+)
+execute procedure commits_update_repository_summary();
+
+create trigger commits_delete_repository_summary after delete on commits
+referencing old table as deleted_commits
+for each statement
+execute procedure commits_delete_repository_summary();
+
+-- the summary's heads are on the repository's default branch
+create trigger repos_update_commit_summary after update on repos
+for each row
+when (new.branch is distinct from old.branch)
+execute procedure repos_update_commit_summary();
+"""
+
+drop_functions = """
+drop trigger repos_update_commit_summary on repos;
+drop trigger commits_delete_repository_summary on commits;
+drop trigger commits_update_repository_summary on commits;
+drop trigger commits_insert_repository_summary on commits;
+drop function repos_update_commit_summary();
+drop function commits_delete_repository_summary();
+drop function commits_update_repository_summary();
+drop function refresh_repository_commit_summary(int);
+drop function commit_totals_bigint(text);
+drop function commit_totals_numeric(text);
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0039_pull_pulls_repoid_id"),
+        ("legacy_migrations", "0004_auto_20231024_1937"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RepositoryCommitSummary",
+            fields=[
+                (
+                    "repository",
+                    models.OneToOneField(
+                        db_column="repoid",
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="commit_summary",
+                        serialize=False,
+                        to="core.repository",
+                    ),
+                ),
+                ("branch", models.TextField(null=True)),
+                ("latest_commitid", models.TextField(null=True)),
+                ("latest_timestamp", core.models.DateTimeWithoutTZField(null=True)),
+                ("latest_totals", models.JSONField(null=True)),
+                ("latest_coverage", models.FloatField(null=True)),
+                ("latest_hits", models.BigIntegerField(null=True)),
+                ("latest_misses", models.BigIntegerField(null=True)),
+                ("latest_partials", models.BigIntegerField(null=True)),
+                ("latest_lines", models.BigIntegerField(null=True)),
+                ("previous_commitid", models.TextField(null=True)),
+                ("previous_timestamp", core.models.DateTimeWithoutTZField(null=True)),
+                ("previous_totals", models.JSONField(null=True)),
+                ("previous_coverage", models.FloatField(null=True)),
+                ("latest_commit_at", core.models.DateTimeWithoutTZField(null=True)),
+                ("oldest_commit_at", core.models.DateTimeWithoutTZField(null=True)),
+                (
+                    "updatestamp",
+                    core.models.DateTimeWithoutTZField(
+                        default=django.utils.timezone.now
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "repository_commit_summaries",
+            },
+        ),
+        RiskyRunSQL(create_functions, reverse_sql=drop_functions),
+    ]
@@ -0,0 +1,158 @@
+# Generated by Django 4.2.7 on 2023-11-21 09:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import core.models
+from utils.migrations import RiskyRunSQL
+
+create_functions = """
+-- recomputes the row of a single day from the commits table
+create or replace function refresh_commit_daily_totals(_repoid int, _branch text, _date date) returns void as $$
+begin
+    insert into commit_daily_totals (repoid, branch, date, commitid, timestamp, hits, misses, partials, lines)
+    select repoid, branch, _date, commitid, timestamp,
+        commit_totals_bigint(totals->>'h'),
+        commit_totals_bigint(totals->>'m'),
+        commit_totals_bigint(totals->>'p'),
+        commit_totals_bigint(totals->>'n')
+    from commits
+    where repoid = _repoid
+        and branch = _branch
+        and state = 'complete'
+        and timestamp >= _date
+        and timestamp < _date + 1
+    order by timestamp desc
+    limit 1
+    on conflict (repoid, branch, date) do update
+    set commitid = excluded.commitid,
+        timestamp = excluded.timestamp,
+        hits = excluded.hits,
+        misses = excluded.misses,
+        partials = excluded.partials,
+        lines = excluded.lines;
+
+    if not found then
+        -- no complete commit left on that day
+        delete from commit_daily_totals
+        where repoid = _repoid and branch = _branch and date = _date;
+    end if;
+end;
+$$ language plpgsql;
+
+
+create or replace function commits_update_daily_totals() returns trigger as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') and old.state = 'complete' and exists (
+        select 1
+        from commit_daily_totals
+        where repoid = old.repoid
+            and branch = old.branch
+            and date = old.timestamp::date
+            and commitid = old.commitid
+    ) then
+        -- this was the latest commit of its day, it may not be anymore
+        perform refresh_commit_daily_totals(old.repoid, old.branch, old.timestamp::date);
+    end if;
+
+    if tg_op in ('INSERT', 'UPDATE')
+        and new.state = 'complete'
+        and new.branch is not null
+        and new.timestamp is not null then
+        insert into commit_daily_totals (repoid, branch, date, commitid, timestamp, hits, misses, partials, lines)
+        values (
+            new.repoid,
+            new.branch,
+            new.timestamp::date,
+            new.commitid,
+            new.timestamp,
+            commit_totals_bigint(new.totals->>'h'),
+            commit_totals_bigint(new.totals->>'m'),
+            commit_totals_bigint(new.totals->>'p'),
+            commit_totals_bigint(new.totals->>'n')
+        )
+        on conflict (repoid, branch, date) do update
+        set commitid = excluded.commitid,
+            timestamp = excluded.timestamp,
+            hits = excluded.hits,
+            misses = excluded.misses,
+            partials = excluded.partials,
+            lines = excluded.lines
+        where commit_daily_totals.timestamp <= excluded.timestamp;
+    end if;
+
+    return null;
+end;
+$$ language plpgsql;
+
+
+create trigger commits_insert_daily_totals after insert on commits
+for each row
+execute procedure commits_update_daily_totals();
+
+create trigger commits_update_daily_totals after update on commits
+for each row
+when (
+    new.state is distinct from old.state
+    or new.totals is distinct from old.totals
+    or new.branch is distinct from old.branch
+    or new.timestamp is distinct from old.timestamp
+)
+execute procedure commits_update_daily_totals();
+
+create trigger commits_delete_daily_totals after delete on commits
+for each row
+execute procedure commits_update_daily_totals();
+"""
+
+drop_functions = """
+drop trigger commits_delete_daily_totals on commits;
+drop trigger commits_update_daily_totals on commits;
+drop trigger commits_insert_daily_totals on commits;
+drop function commits_update_daily_totals();
+drop function refresh_commit_daily_totals(int, text, date);
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0040_repositorycommitsummary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CommitDailyTotals",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("branch", models.TextField()),
+                ("date", models.DateField()),
+                ("commitid", models.TextField()),
+                ("timestamp", core.models.DateTimeWithoutTZField()),
+                ("hits", models.BigIntegerField(null=True)),
+                ("misses", models.BigIntegerField(null=True)),
+                ("partials", models.BigIntegerField(null=True)),
+                ("lines", models.BigIntegerField(null=True)),
+                (
+                    "repository",
+                    models.ForeignKey(
+                        db_column="repoid",
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_totals",
+                        to="core.repository",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "commit_daily_totals",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="commitdailytotals",
+            constraint=models.UniqueConstraint(
+                fields=("repository", "branch", "date"),
+                name="commit_daily_totals_repoid_branch_date",
+            ),
+        ),
+        RiskyRunSQL(create_functions, reverse_sql=drop_functions),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.7 on 2023-11-21 09:45
+
+from django.db import migrations, transaction
+
+from utils.migrations import RiskyRunPython
+
+# repositories backfilled per transaction
+BATCH_SIZE = 500
+
+backfill_sql = """
+insert into commit_daily_totals (repoid, branch, date, commitid, timestamp, hits, misses, partials, lines)
+select distinct on (repoid, branch, timestamp::date)
+    repoid,
+    branch,
+    timestamp::date,
+    commitid,
+    timestamp,
+    commit_totals_bigint(totals->>'h'),
+    commit_totals_bigint(totals->>'m'),
+    commit_totals_bigint(totals->>'p'),
+    commit_totals_bigint(totals->>'n')
+from commits
+where repoid = any(%s)
+    and state = 'complete'
+    and branch is not null
+    and timestamp is not null
+order by repoid, branch, timestamp::date, timestamp desc
+on conflict (repoid, branch, date) do update
+set commitid = excluded.commitid,
+    timestamp = excluded.timestamp,
+    hits = excluded.hits,
+    misses = excluded.misses,
+    partials = excluded.partials,
+    lines = excluded.lines
+where commit_daily_totals.timestamp <= excluded.timestamp;
+"""
+
+
+def backfill_commit_daily_totals(apps, schema_editor):
+    """
+    Fills `commit_daily_totals` from the existing commits, a batch of repositories
+    at a time.  Commits written meanwhile are handled by the triggers created in
+    the previous migration and the upsert keeps whichever commit is the latest.
+    """
+    connection = schema_editor.connection
+    last_repoid = -1
+    while True:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "select repoid from repos where repoid > %s order by repoid limit %s",
+                    [last_repoid, BATCH_SIZE],
+                )
+                repoids = [repoid for (repoid,) in cursor.fetchall()]
+                if not repoids:
+                    return
+                cursor.execute(backfill_sql, [repoids])
+        last_repoid = repoids[-1]
+
+
+class Migration(migrations.Migration):
+    # every batch is committed on its own
+    atomic = False
+
+    dependencies = [
+        ("core", "0041_commitdailytotals"),
+    ]
+
+    operations = [
+        RiskyRunPython(
+            backfill_commit_daily_totals, reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2023-11-23 10:12
+
+from django.db import migrations, transaction
+
+from utils.migrations import RiskyRunPython
+
+# repositories backfilled per transaction
+BATCH_SIZE = 500
+
+
+def backfill_repository_commit_summaries(apps, schema_editor):
+    """
+    Builds the `repository_commit_summaries` row of every existing repository, a
+    batch of repositories at a time.  The triggers created in
+    `0040_repositorycommitsummary` only maintain the rows of repositories that
+    have been written to since, the others fall back to querying `commits`.
+    """
+    connection = schema_editor.connection
+    last_repoid = -1
+    while True:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "select repoid from repos where repoid > %s order by repoid limit %s",
+                    [last_repoid, BATCH_SIZE],
+                )
+                repoids = [repoid for (repoid,) in cursor.fetchall()]
+                if not repoids:
+                    return
+                cursor.execute(
+                    "select refresh_repository_commit_summary(repoid) from unnest(%s) as repoid",
+                    [repoids],
+                )
+        last_repoid = repoids[-1]
+
+
+class Migration(migrations.Migration):
+    # every batch is committed on its own
+    atomic = False
+
+    dependencies = [
+        ("core", "0042_backfill_commitdailytotals"),
+    ]
+
+    operations = [
+        RiskyRunPython(
+            backfill_repository_commit_summaries,
+            reverse_code=migrations.RunPython.noop,
+        ),
+    ]
@@ -317,6 +317,95 @@ class Commit(ExportModelOperationsMixin("core.commit"), models.Model):
     )
 
 
+class RepositoryCommitSummary(
+    ExportModelOperationsMixin("core.repository_commit_summary"), models.Model
+):
+    """
+    Latest commit data for a repository, maintained by triggers on the `commits`
+    table (see `core/migrations/0040_repositorycommitsummary.py`) so that repository
+    listings don't need correlated subqueries over `commits`.
+
+    The `latest_*` and `previous_*` fields describe the two most recent complete
+    commits on `branch` (the repository's default branch when they were recorded).
+    """
+
+    repository = models.OneToOneField(
+        "core.Repository",
+        db_column="repoid",
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="commit_summary",
+        # rows are written by triggers and repositories can be deleted outside
+        # of Django, so we don't want a (non-cascading) foreign key constraint
+        db_constraint=False,
+    )
+    branch = models.TextField(null=True)
+
+    latest_commitid = models.TextField(null=True)
+    latest_timestamp = DateTimeWithoutTZField(null=True)
+    latest_totals = models.JSONField(null=True)
+    latest_coverage = models.FloatField(null=True)
+    latest_hits = models.BigIntegerField(null=True)
+    latest_misses = models.BigIntegerField(null=True)
+    latest_partials = models.BigIntegerField(null=True)
+    latest_lines = models.BigIntegerField(null=True)
+
+    previous_commitid = models.TextField(null=True)
+    previous_timestamp = DateTimeWithoutTZField(null=True)
+    previous_totals = models.JSONField(null=True)
+    previous_coverage = models.FloatField(null=True)
+
+    # newest and oldest commits on any branch
+    latest_commit_at = DateTimeWithoutTZField(null=True)
+    oldest_commit_at = DateTimeWithoutTZField(null=True)
+
+    updatestamp = DateTimeWithoutTZField(default=timezone.now)
+
+    class Meta:
+        db_table = "repository_commit_summaries"
+
+
+class CommitDailyTotals(
+    ExportModelOperationsMixin("core.commit_daily_totals"), models.Model
+):
+    """
+    Totals of the latest complete commit of each day on each branch of a
+    repository, maintained by triggers on the `commits` table (see
+    `core/migrations/0041_commitdailytotals.py`) so that coverage charts don't
+    need to rank every commit of every repository.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    repository = models.ForeignKey(
+        "core.Repository",
+        db_column="repoid",
+        on_delete=models.CASCADE,
+        related_name="daily_totals",
+        # rows are removed by the triggers along with the commits they were
+        # copied from, a foreign key constraint would only make every commit
+        # write also check (and key-share lock) the repository's row
+        db_constraint=False,
+    )
+    branch = models.TextField()
+    date = models.DateField()
+
+    commitid = models.TextField()
+    timestamp = DateTimeWithoutTZField()
+    hits = models.BigIntegerField(null=True)
+    misses = models.BigIntegerField(null=True)
+    partials = models.BigIntegerField(null=True)
+    lines = models.BigIntegerField(null=True)
+
+    class Meta:
+        db_table = "commit_daily_totals"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["repository", "branch", "date"],
+                name="commit_daily_totals_repoid_branch_date",
+            )
+        ]
+
+
 class PullStates(models.TextChoices):
     OPEN = "open"
     MERGED = "merged"
@@ -4,7 +4,7 @@ from django.test import TestCase
 from django.utils import timezone
 
 from codecov_auth.tests.factories import OwnerFactory
-from core.models import Repository
+from core.models import Repository, RepositoryCommitSummary
 
 from .factories import CommitFactory, RepositoryFactory
 
@@ -139,3 +139,115 @@ class RepositoryQuerySetTests(TestCase):
             repoids = repos.values_list("repoid", flat=True)
             assert public_repo.repoid in repoids
             assert deleted_repo.repoid not in repoids
+
+    def test_commit_summary_tracks_latest_commits(self):
+        older = CommitFactory(
+            repository=self.repo1,
+            timestamp=timezone.now() - timezone.timedelta(days=3),
+            totals={"c": "50.00000", "h": 5, "m": 5, "p": 0, "n": 10},
+        )
+        latest = CommitFactory(
+            repository=self.repo1,
+            timestamp=timezone.now() - timezone.timedelta(days=2),
+            totals={"c": "80.00000", "h": 8, "m": 2, "p": 0, "n": 10},
+        )
+        # not on the default branch
+        other = CommitFactory(
+            repository=self.repo1,
+            branch="other",
+            timestamp=timezone.now() - timezone.timedelta(days=1),
+        )
+
+        older.refresh_from_db()
+        other.refresh_from_db()
+
+        summary = RepositoryCommitSummary.objects.get(repository=self.repo1)
+        assert summary.branch == self.repo1.branch
+        assert summary.latest_commitid == latest.commitid
+        assert summary.latest_coverage == 80.0
+        assert summary.latest_hits == 8
+        assert summary.latest_lines == 10
+        assert summary.previous_commitid == older.commitid
+        assert summary.previous_coverage == 50.0
+        assert summary.latest_commit_at == other.timestamp
+        assert summary.oldest_commit_at == older.timestamp
+
+        latest.totals = {"c": "90.00000", "h": 9, "m": 1, "p": 0, "n": 10}
+        latest.save()
+
+        summary.refresh_from_db()
+        assert summary.latest_commitid == latest.commitid
+        assert summary.latest_coverage == 90.0
+
+        latest.delete()
+
+        summary.refresh_from_db()
+        assert summary.latest_commitid == older.commitid
+        assert summary.previous_commitid is None
+        assert summary.latest_commit_at == other.timestamp
+
+        self.repo1.branch = "other"
+        self.repo1.save()
+
+        summary.refresh_from_db()
+        assert summary.branch == "other"
+        assert summary.latest_commitid == other.commitid
+
+    def test_commit_summary_unexpected_totals(self):
+        commit = CommitFactory(
+            repository=self.repo1,
+            totals={"c": "", "h": "12.0", "m": "n/a", "p": 0, "n": 2**40},
+        )
+
+        summary = RepositoryCommitSummary.objects.get(repository=self.repo1)
+        assert summary.latest_commitid == commit.commitid
+        assert summary.latest_coverage is None
+        assert summary.latest_hits == 12
+        assert summary.latest_misses is None
+        assert summary.latest_lines == 2**40
+
+    def test_with_recent_coverage_uses_commit_summary(self):
+        older = CommitFactory(
+            repository=self.repo1,
+            timestamp=timezone.now() - timezone.timedelta(days=1),
+            totals={"c": "50.00000", "h": 5, "m": 5, "p": 0, "n": 10},
+        )
+        # less than an hour old, so the previous commit should be used
+        CommitFactory(
+            repository=self.repo1,
+            timestamp=timezone.now() - timezone.timedelta(minutes=5),
+            totals={"c": "80.00000", "h": 8, "m": 2, "p": 0, "n": 10},
+        )
+
+        repo = Repository.objects.filter(
+            repoid=self.repo1.repoid
+        ).with_recent_coverage()[0]
+        assert repo.coverage_sha == older.commitid
+        assert repo.recent_coverage == 50.0
+        assert repo.hits == 5
+
+        # without a summary we fall back to querying the commits
+        RepositoryCommitSummary.objects.filter(repository=self.repo1).delete()
+        repo = Repository.objects.filter(
+            repoid=self.repo1.repoid
+        ).with_recent_coverage()[0]
+        assert repo.coverage_sha == older.commitid
+        assert repo.recent_coverage == 50.0
+        assert repo.hits == 5
+
+    def test_with_recent_coverage_reads_typed_latest_totals(self):
+        # totals the json cast can't read are stored typed in the summary
+        commit = CommitFactory(
+            repository=self.repo1,
+            timestamp=timezone.now() - timezone.timedelta(days=1),
+            totals={"c": "60.00000", "h": "6.0", "m": 4, "p": 1, "n": 2**40},
+        )
+
+        repo = Repository.objects.filter(
+            repoid=self.repo1.repoid
+        ).with_recent_coverage()[0]
+        assert repo.coverage_sha == commit.commitid
+        assert repo.hits == 6
+        assert repo.misses == 4
+        assert repo.partials == 1
+        assert repo.lines == 2**40
@@ -0,0 +1,12 @@
+from core.models import Branch
+
+from .loader import BaseLoader, grouped_keys_filter
+
+
+class BranchLoader(BaseLoader):
+    @classmethod
+    def key(cls, branch):
+        return (branch.repository_id, branch.name)
+
+    def batch_queryset(self, keys):
+        return Branch.objects.filter(grouped_keys_filter(keys, "repository_id", "name"))
@@ -133,4 +133,4 @@ class ComparisonLoader(BaseLoader):
             CommitComparison.objects.filter(pk__in=comparison_ids).update(
                 state=CommitComparison.CommitComparisonStates.PENDING
             )
-            TaskService().compute_comparisons(comparison_ids)
+            TaskService().compute_comparisons(comparison_ids, repoid=self.repository_id)
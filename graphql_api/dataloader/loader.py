@@ -1,8 +1,34 @@
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+from typing import Hashable, Iterable, Tuple
+
 from aiodataloader import DataLoader
+from django.db.models import Q
 
 from codecov.db import sync_to_async
 
 
+def grouped_keys_filter(
+    keys: Iterable[Tuple[Hashable, Hashable]], group_field: str, key_field: str
+) -> Q:
+    """
+    Builds a filter matching the records for a list of `(group, key)` tuples, ex.
+    `(repoid, name)`, with a single `key_field IN (...)` per group.
+    """
+    groups = defaultdict(set)
+    for group, key in keys:
+        groups[group].add(key)
+
+    return reduce(
+        or_,
+        (
+            Q(**{group_field: group, f"{key_field}__in": group_keys})
+            for group, group_keys in groups.items()
+        ),
+    )
+
+
 class BaseLoader(DataLoader):
     @classmethod
     def loader(cls, info, *args):
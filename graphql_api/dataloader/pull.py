@@ -0,0 +1,12 @@
+from core.models import Pull
+
+from .loader import BaseLoader, grouped_keys_filter
+
+
+class PullLoader(BaseLoader):
+    @classmethod
+    def key(cls, pull):
+        return (pull.repository_id, pull.pullid)
+
+    def batch_queryset(self, keys):
+        return Pull.objects.filter(grouped_keys_filter(keys, "repository_id", "pullid"))
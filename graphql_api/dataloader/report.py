@@ -0,0 +1,67 @@
+from collections import defaultdict
+
+import services.report as report_service
+from codecov.db import sync_to_async
+
+from .loader import BaseLoader
+
+
+class ReportLoader(BaseLoader):
+    """
+    Builds commit reports once per request.  Keys are `(commit, path)` tuples where
+    `path=None` loads the full report and a path loads a report that only needs to
+    answer for that file (see `build_file_report_from_commit`).
+
+    Results are cached by commitid rather than by `Commit` instance since resolvers
+    get their commits from different places.  Once the full report of a commit has
+    been built it's used to answer any later per-file loads for that commit too.
+    """
+
+    def __init__(self, info, repository_id, report_class=None, *args, **kwargs):
+        self.repository_id = repository_id
+        self.report_class = report_class
+        self.full_reports = {}
+        return super().__init__(info, *args, get_cache_key=self.cache_key, **kwargs)
+
+    @classmethod
+    def cache_key(cls, key):
+        commit, path = key
+        return (commit.commitid, path)
+
+    def load_report(self, commit):
+        return self.load((commit, None))
+
+    def load_file_report(self, commit, path):
+        return self.load((commit, path))
+
+    @sync_to_async
+    def batch_load_fn(self, keys):
+        paths_by_commitid = defaultdict(set)
+        for commit, path in keys:
+            paths_by_commitid[commit.commitid].add(path)
+
+        file_reports = {}
+        for commit, path in keys:
+            commitid = commit.commitid
+            if commitid in self.full_reports or (commitid, path) in file_reports:
+                continue
+
+            paths = paths_by_commitid[commitid]
+            if None in paths or len(paths) > 1:
+                # building the full report once beats reading several chunks
+                report = report_service.build_report_from_commit(
+                    commit, report_class=self.report_class
+                )
+                self.full_reports[commitid] = report
+            else:
+                report = report_service.build_file_report_from_commit(
+                    commit, path, report_class=self.report_class
+                )
+                file_reports[(commitid, path)] = report
+
+        return [
+            self.full_reports.get(commit.commitid)
+            if commit.commitid in self.full_reports
+            else file_reports[(commit.commitid, path)]
+            for commit, path in keys
+        ]
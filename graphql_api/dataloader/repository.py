@@ -0,0 +1,23 @@
+from core.models import Repository
+
+from .loader import BaseLoader, grouped_keys_filter
+
+
+class RepositoryLoader(BaseLoader):
+    """
+    Loads the repositories viewable by the current owner by `(ownerid, name)`
+    """
+
+    @classmethod
+    def key(cls, repository):
+        return (repository.author_id, repository.name)
+
+    def batch_queryset(self, keys):
+        current_owner = self.info.context["request"].current_owner
+        return (
+            Repository.objects.viewable_repos(current_owner)
+            .filter(grouped_keys_filter(keys, "author_id", "name"))
+            .with_recent_coverage()
+            .with_oldest_commit_at()
+            .select_related("author")
+        )
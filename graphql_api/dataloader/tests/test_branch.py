@@ -0,0 +1,37 @@
+from asgiref.sync import async_to_sync
+from django.test import TransactionTestCase
+
+from core.tests.factories import BranchFactory, RepositoryFactory
+from graphql_api.dataloader.branch import BranchLoader
+
+
+class GraphQLResolveInfo:
+    def __init__(self):
+        self.context = {}
+
+
+class BranchLoaderTestCase(TransactionTestCase):
+    def setUp(self):
+        self.repositories = [RepositoryFactory(), RepositoryFactory()]
+        self.branches = [
+            BranchFactory(repository=repository, name=name)
+            for repository in self.repositories
+            for name in ("main", "feature")
+        ]
+        self.info = GraphQLResolveInfo()
+
+    def test_load_branches_of_many_repositories(self):
+        keys = [
+            (self.repositories[0].pk, "main"),
+            (self.repositories[1].pk, "feature"),
+            (self.repositories[1].pk, "main"),
+            (self.repositories[0].pk, "missing"),
+        ]
+
+        async def load():
+            return await BranchLoader.loader(self.info).load_many(keys)
+
+        with self.assertNumQueries(1):
+            branches = async_to_sync(load)()
+
+        assert branches == [self.branches[0], self.branches[3], self.branches[2], None]
@@ -43,7 +43,9 @@ class ComparisonLoaderTestCase(TransactionTestCase):
         assert comparison.base_commit == commit1
         assert comparison.compare_commit == commit2
 
-        compute_comparisons.assert_called_once_with([comparison.pk])
+        compute_comparisons.assert_called_once_with(
+            [comparison.pk], repoid=self.repository.pk
+        )
         comparison.refresh_from_db()
         assert comparison.state == "pending"
 
@@ -89,4 +91,6 @@ class ComparisonLoaderTestCase(TransactionTestCase):
         assert comparison2.base_commit == commit2
         assert comparison2.compare_commit == commit3
 
-        compute_comparisons.assert_called_once_with([comparison2.pk])
+        compute_comparisons.assert_called_once_with(
+            [comparison2.pk], repoid=self.repository.pk
+        )
@@ -0,0 +1,36 @@
+from asgiref.sync import async_to_sync
+from django.test import TransactionTestCase
+
+from core.tests.factories import PullFactory, RepositoryFactory
+from graphql_api.dataloader.pull import PullLoader
+
+
+class GraphQLResolveInfo:
+    def __init__(self):
+        self.context = {}
+
+
+class PullLoaderTestCase(TransactionTestCase):
+    def setUp(self):
+        self.repositories = [RepositoryFactory(), RepositoryFactory()]
+        self.pulls = [
+            PullFactory(repository=repository, pullid=pullid)
+            for repository in self.repositories
+            for pullid in (1, 2)
+        ]
+        self.info = GraphQLResolveInfo()
+
+    def test_load_pulls_of_many_repositories(self):
+        keys = [
+            (self.repositories[0].pk, 2),
+            (self.repositories[1].pk, 1),
+            (self.repositories[1].pk, 3),
+        ]
+
+        async def load():
+            return await PullLoader.loader(self.info).load_many(keys)
+
+        with self.assertNumQueries(1):
+            pulls = async_to_sync(load)()
+
+        assert pulls == [self.pulls[1], self.pulls[2], None]
@@ -0,0 +1,68 @@
+import asyncio
+from unittest.mock import patch
+
+from django.test import TransactionTestCase
+
+from core.models import Commit
+from core.tests.factories import CommitFactory, RepositoryFactory
+from graphql_api.dataloader.report import ReportLoader
+from services.report import ReadOnlyReport
+
+
+class GraphQLResolveInfo:
+    def __init__(self):
+        self.context = {}
+
+
+class ReportLoaderTestCase(TransactionTestCase):
+    def setUp(self):
+        self.repository = RepositoryFactory(name="test-repo-1")
+        self.commit = CommitFactory(repository=self.repository, commitid="123")
+        self.info = GraphQLResolveInfo()
+
+    def loader(self):
+        return ReportLoader.loader(self.info, self.repository.pk, ReadOnlyReport)
+
+    @patch("services.report.build_file_report_from_commit")
+    @patch("services.report.build_report_from_commit")
+    async def test_report_built_once_per_commit(
+        self, build_report_mock, build_file_report_mock
+    ):
+        build_report_mock.return_value = "full report"
+
+        # different instances of the same commit
+        other_commit = Commit(repository_id=self.repository.pk, commitid="123")
+
+        reports = await asyncio.gather(
+            self.loader().load_report(self.commit),
+            self.loader().load_file_report(self.commit, "path.py"),
+            self.loader().load_report(other_commit),
+        )
+        assert reports == ["full report", "full report", "full report"]
+
+        # later per-file loads are served from the full report
+        assert (
+            await self.loader().load_file_report(other_commit, "other.py")
+            == "full report"
+        )
+
+        build_report_mock.assert_called_once_with(
+            self.commit, report_class=ReadOnlyReport
+        )
+        assert not build_file_report_mock.called
+
+    @patch("services.report.build_file_report_from_commit")
+    @patch("services.report.build_report_from_commit")
+    async def test_single_file_report(self, build_report_mock, build_file_report_mock):
+        build_file_report_mock.return_value = "file report"
+
+        reports = await asyncio.gather(
+            self.loader().load_file_report(self.commit, "path.py"),
+            self.loader().load_file_report(self.commit, "path.py"),
+        )
+        assert reports == ["file report", "file report"]
+
+        build_file_report_mock.assert_called_once_with(
+            self.commit, "path.py", report_class=ReadOnlyReport
+        )
+        assert not build_report_mock.called
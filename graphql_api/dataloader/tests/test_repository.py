@@ -0,0 +1,51 @@
+from asgiref.sync import async_to_sync
+from django.test import TransactionTestCase
+
+from codecov_auth.tests.factories import OwnerFactory
+from core.tests.factories import RepositoryFactory
+from graphql_api.dataloader.repository import RepositoryLoader
+
+
+class Request:
+    def __init__(self, current_owner):
+        self.current_owner = current_owner
+
+
+class GraphQLResolveInfo:
+    def __init__(self, current_owner):
+        self.context = {"request": Request(current_owner)}
+
+
+class RepositoryLoaderTestCase(TransactionTestCase):
+    def setUp(self):
+        self.owners = [OwnerFactory(), OwnerFactory()]
+        self.repositories = [
+            RepositoryFactory(author=self.owners[0], name="a", private=False),
+            RepositoryFactory(author=self.owners[0], name="b", private=True),
+            RepositoryFactory(author=self.owners[1], name="a", private=False),
+            RepositoryFactory(author=self.owners[1], name="b", private=True),
+        ]
+        self.info = GraphQLResolveInfo(current_owner=self.owners[0])
+
+    def test_load_viewable_repositories(self):
+        keys = [
+            (self.owners[0].pk, "a"),
+            (self.owners[0].pk, "b"),
+            (self.owners[1].pk, "a"),
+            (self.owners[1].pk, "b"),
+        ]
+
+        async def load():
+            return await RepositoryLoader.loader(self.info).load_many(keys)
+
+        with self.assertNumQueries(1):
+            repositories = async_to_sync(load)()
+
+        # the private repository of the other owner is not viewable
+        assert repositories == [
+            self.repositories[0],
+            self.repositories[1],
+            self.repositories[2],
+            None,
+        ]
+        assert repositories[0].author == self.owners[0]
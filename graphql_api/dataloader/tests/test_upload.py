@@ -0,0 +1,35 @@
+from asgiref.sync import async_to_sync
+from django.test import TransactionTestCase
+
+from core.tests.factories import CommitFactory
+from graphql_api.dataloader.upload import UploadCountLoader
+from reports.tests.factories import CommitReportFactory, UploadFactory
+
+
+class GraphQLResolveInfo:
+    def __init__(self):
+        self.context = {}
+
+
+class UploadCountLoaderTestCase(TransactionTestCase):
+    def setUp(self):
+        self.commits = [CommitFactory(), CommitFactory(), CommitFactory()]
+        report = CommitReportFactory(commit=self.commits[0])
+        UploadFactory.create_batch(3, report=report)
+        report = CommitReportFactory(commit=self.commits[1])
+        UploadFactory(report=report)
+        # uploads of other reports (ex. local uploads) are not counted
+        report = CommitReportFactory(commit=self.commits[1], code="local")
+        UploadFactory(report=report)
+        self.info = GraphQLResolveInfo()
+
+    def test_load_upload_counts(self):
+        async def load():
+            return await UploadCountLoader.loader(self.info).load_many(
+                [commit.id for commit in self.commits]
+            )
+
+        with self.assertNumQueries(1):
+            counts = async_to_sync(load)()
+
+        assert counts == [3, 1, 0]
@@ -0,0 +1,22 @@
+from django.db.models import Count
+
+from codecov.db import sync_to_async
+from reports.models import ReportSession
+
+from .loader import BaseLoader
+
+
+class UploadCountLoader(BaseLoader):
+    """
+    Loads the number of uploads of the (default) report of commits by commit `id`
+    """
+
+    @sync_to_async
+    def batch_load_fn(self, keys):
+        counts = dict(
+            ReportSession.objects.filter(report__commit_id__in=keys, report__code=None)
+            .values_list("report__commit_id")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        return [counts.get(key, 0) for key in keys]
@@ -2,6 +2,7 @@ from typing import Iterable, Optional
 
 from graphql.language.ast import (
     FragmentSpreadNode,
+    InlineFragmentNode,
     Node,
     SelectionSetNode,
     VariableNode,
@@ -47,16 +48,31 @@ class LookaheadNode:
                 if selection.name.value == name:
                     return LookaheadNode(selection, self.info)
 
-    def _flatten_selections(self, selection_set: SelectionSetNode) -> Iterable[Node]:
+    def _flatten_selections(
+        self, selection_set: SelectionSetNode, visited_fragments: set = None
+    ) -> Iterable[Node]:
         """
-        Expand fragments into flat list of selections
+        Expand fragments into flat list of selections.  Like execution, a fragment
+        spread more than once is only expanded once.
         """
+        if visited_fragments is None:
+            visited_fragments = set()
+
         selections = []
         for selection in selection_set.selections:
             if isinstance(selection, FragmentSpreadNode):
-                fragment = self.info.fragments[selection.name.value]
-                for selection in fragment.selection_set.selections:
-                    selections.append(selection)
+                name = selection.name.value
+                if name in visited_fragments:
+                    continue
+                visited_fragments.add(name)
+                fragment = self.info.fragments[name]
+                selections.extend(
+                    self._flatten_selections(fragment.selection_set, visited_fragments)
+                )
+            elif isinstance(selection, InlineFragmentNode):
+                selections.extend(
+                    self._flatten_selections(selection.selection_set, visited_fragments)
+                )
             else:
                 selections.append(selection)
         return selections
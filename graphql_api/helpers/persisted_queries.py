@@ -0,0 +1,108 @@
+import hashlib
+from typing import List, Optional, Tuple
+
+from ariadne.graphql import (
+    validate_operation_name,
+    validate_query,
+    validate_query_body,
+    validate_variables,
+)
+from django.conf import settings
+from graphql import DocumentNode, GraphQLError, GraphQLSchema, parse
+
+from utils.cache import LRUCache
+
+# Parsed and validated documents keyed by schema and the SHA-256 of their query.
+# Only valid documents are cached so this is bounded by the number of distinct
+# operations the clients send rather than by whatever gets posted to us.
+operation_cache = LRUCache(max_size=settings.GRAPHQL_OPERATION_CACHE_SIZE)
+
+
+class PersistedQueryError(Exception):
+    """
+    Raised for persisted query requests we cannot serve.  The `code` follows the
+    automatic persisted queries protocol so clients know to retry with the full
+    query.
+    """
+
+    def __init__(self, message: str, code: str):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def persisted_query_hash(data: dict) -> Optional[str]:
+    """
+    The hash sent under `extensions.persistedQuery.sha256Hash` if any
+    """
+    extensions = data.get("extensions")
+    if isinstance(extensions, dict):
+        persisted_query = extensions.get("persistedQuery")
+        if isinstance(persisted_query, dict):
+            return persisted_query.get("sha256Hash")
+
+
+def get_document(
+    schema: GraphQLSchema,
+    data: dict,
+    validation_rules=None,
+    introspection: bool = True,
+) -> Tuple[Optional[DocumentNode], List[GraphQLError]]:
+    """
+    Returns the parsed and validated document of the operation in `data` along
+    with any errors that prevent it from being executed.
+
+    Documents are looked up by the hash of their query so that the hot path
+    skips parsing and validation entirely.  Clients can send just the hash (see
+    `persisted_query_hash`) once the document is known; `PersistedQueryError` is
+    raised if it isn't.
+    """
+    try:
+        validate_variables(data.get("variables"))
+        validate_operation_name(data.get("operationName"))
+    except GraphQLError as error:
+        return None, [error]
+
+    query = data.get("query")
+    sha256_hash = persisted_query_hash(data)
+    if query is None and sha256_hash is not None:
+        document = operation_cache.get((id(schema), sha256_hash))
+        if document is None:
+            raise PersistedQueryError(
+                "PersistedQueryNotFound", code="PERSISTED_QUERY_NOT_FOUND"
+            )
+        return document, []
+
+    try:
+        validate_query_body(query)
+    except GraphQLError as error:
+        return None, [error]
+
+    sha256 = query_hash(query)
+    if sha256_hash is not None and sha256_hash != sha256:
+        raise PersistedQueryError(
+            "provided sha does not match query", code="PERSISTED_QUERY_HASH_MISMATCH"
+        )
+
+    key = (id(schema), sha256)
+    document = operation_cache.get(key)
+    if document is not None:
+        return document, []
+
+    try:
+        document = parse(query)
+    except GraphQLError as error:
+        return None, [error]
+
+    errors = validate_query(
+        schema, document, validation_rules, enable_introspection=introspection
+    )
+    if errors:
+        return None, errors
+
+    operation_cache.set(key, document)
+    return document, []
@@ -0,0 +1,241 @@
+import logging
+from typing import Optional, Tuple, Union
+
+from django.conf import settings
+from graphql import parse
+from graphql.error import GraphQLSyntaxError
+from graphql.language.ast import (
+    DocumentNode,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    InlineFragmentNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+)
+from graphql.utilities import value_from_ast_untyped
+from redis.exceptions import RedisError
+
+from services.redis_configuration import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+# Cost of resolving a single instance of a field.  Fields that are not listed
+# cost `DEFAULT_FIELD_COST`.  The expensive ones build reports, comparisons or
+# aggregate timeseries data.
+FIELD_COSTS = {
+    "impactedFiles": 25,
+    "impactedFile": 10,
+    "pathContents": 25,
+    "coverageFile": 10,
+    "flagNames": 10,
+    "components": 10,
+    "measurements": 10,
+    "segments": 10,
+    "compareWithParent": 5,
+    "compareWithBase": 5,
+    "criticalFiles": 5,
+    "yaml": 2,
+}
+DEFAULT_FIELD_COST = 1
+
+# page size used by `queryset_to_connection` when neither `first` nor `last` is given
+DEFAULT_PAGE_SIZE = 25
+
+
+class QueryTooComplexError(Exception):
+    """
+    Raised when costing an operation would visit more than
+    `GRAPHQL_QUERY_COST_MAX_NODES` selections.
+    """
+
+
+class _CostCalculator:
+    """
+    Costs the selections of a parsed document before it's executed.
+
+    The cost of a fragment doesn't depend on where it's spread so it's computed
+    once and reused, and the number of selections visited is capped so that
+    costing stays cheap whatever the document looks like.
+    """
+
+    def __init__(
+        self,
+        fragments: dict[str, FragmentDefinitionNode],
+        variable_values: dict,
+        max_nodes: int,
+    ):
+        self.fragments = fragments
+        self.variable_values = variable_values
+        self.nodes_left = max_nodes
+        self.fragment_costs = {}
+        self.fragments_in_progress = set()
+
+    def selection_set_cost(
+        self, selection_set: SelectionSetNode, visited_fragments: set = None
+    ) -> Tuple[int, bool]:
+        """
+        Total cost of the fields in `selection_set` (with fragments expanded) and
+        whether one of them is `edges`.  Like execution, a fragment spread more than
+        once in the same selection set is only counted once.
+        """
+        if visited_fragments is None:
+            visited_fragments = set()
+
+        cost, has_edges = 0, False
+        for selection in selection_set.selections:
+            self.nodes_left -= 1
+            if self.nodes_left < 0:
+                raise QueryTooComplexError()
+
+            if isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                if name in visited_fragments:
+                    continue
+                visited_fragments.add(name)
+                selection_cost, selection_has_edges = self.fragment_cost(name)
+            elif isinstance(selection, InlineFragmentNode):
+                selection_cost, selection_has_edges = self.selection_set_cost(
+                    selection.selection_set, visited_fragments
+                )
+            else:
+                selection_cost = self.field_cost(selection)
+                selection_has_edges = selection.name.value == "edges"
+            cost += selection_cost
+            has_edges = has_edges or selection_has_edges
+        return cost, has_edges
+
+    def fragment_cost(self, name: str) -> Tuple[int, bool]:
+        if name in self.fragment_costs:
+            return self.fragment_costs[name]
+        if name in self.fragments_in_progress:
+            raise RecursionError(f"Fragment {name} spreads itself")
+
+        fragment = self.fragments[name]
+        self.fragments_in_progress.add(name)
+        self.fragment_costs[name] = self.selection_set_cost(fragment.selection_set)
+        self.fragments_in_progress.discard(name)
+        return self.fragment_costs[name]
+
+    def field_cost(self, field: FieldNode) -> int:
+        cost = FIELD_COSTS.get(field.name.value, DEFAULT_FIELD_COST)
+        if field.selection_set:
+            children_cost, has_edges = self.selection_set_cost(field.selection_set)
+            cost += self._page_size(field, has_edges) * children_cost
+        return cost
+
+    def _page_size(self, field: FieldNode, has_edges: bool) -> int:
+        """
+        Number of times the children of `field` will be resolved: the requested
+        page size for connections and 1 for everything else.
+        """
+        arguments = {arg.name.value: arg.value for arg in field.arguments}
+        page_size = None
+        for name in ("first", "last"):
+            if name in arguments:
+                value = value_from_ast_untyped(arguments[name], self.variable_values)
+                if isinstance(value, int):
+                    page_size = max(page_size or 0, value)
+
+        if page_size is not None:
+            return page_size
+        if has_edges:
+            return DEFAULT_PAGE_SIZE
+        return 1
+
+
+def query_cost(
+    document: Union[str, DocumentNode],
+    variables: Optional[dict] = None,
+    operation_name: Optional[str] = None,
+) -> Optional[int]:
+    """
+    Statically estimates the cost of executing the given GraphQL operation: every
+    field costs its weight in `FIELD_COSTS`, multiplied by the page sizes of all
+    the connections it's nested in.
+
+    Returns `None` when the query cannot be parsed or the operation is ambiguous
+    (execution will report those errors).  Raises `QueryTooComplexError` when the
+    operation has too many selections to be costed.
+    """
+    if isinstance(document, str):
+        try:
+            document = parse(document)
+        except GraphQLSyntaxError:
+            return None
+
+    operations = [
+        definition
+        for definition in document.definitions
+        if isinstance(definition, OperationDefinitionNode)
+        and (
+            operation_name is None
+            or (definition.name and definition.name.value == operation_name)
+        )
+    ]
+    if len(operations) != 1:
+        return None
+
+    calculator = _CostCalculator(
+        fragments={
+            definition.name.value: definition
+            for definition in document.definitions
+            if isinstance(definition, FragmentDefinitionNode)
+        },
+        variable_values=variables or {},
+        max_nodes=settings.GRAPHQL_QUERY_COST_MAX_NODES,
+    )
+    try:
+        cost, _ = calculator.selection_set_cost(operations[0].selection_set)
+        return cost
+    except (KeyError, RecursionError):
+        # unknown or cyclic fragments
+        return None
+
+
+class QueryCostExtension:
+    """
+    Adds the estimated cost of the operation to the response `extensions`.
+
+    This doesn't subclass ariadne's `Extension` on purpose: it has no `resolve`
+    hook so it won't wrap every single resolver.
+    """
+
+    def request_started(self, context):
+        pass
+
+    def request_finished(self, context):
+        pass
+
+    def has_errors(self, errors, context):
+        pass
+
+    def format(self, context):
+        cost = getattr(context["request"], "graphql_query_cost", None)
+        if cost is not None:
+            return {"queryCost": cost}
+
+
+def query_cost_budget_key(ownerid: int) -> str:
+    return f"graphql_query_cost/{ownerid}"
+
+
+def charge_query_cost(ownerid: int, cost: int) -> bool:
+    """
+    Adds `cost` to the owner's spending in the current budget window.  Returns
+    `False` when the owner is over their budget (the cost is still counted so
+    that clients retrying expensive operations in a loop stay throttled).
+    """
+    key = query_cost_budget_key(ownerid)
+    try:
+        # a single transaction so the key can't be left without a TTL, `nx` starts
+        # the window on the first operation without extending it afterwards
+        pipeline = get_redis_connection().pipeline()
+        pipeline.incrby(key, cost)
+        pipeline.expire(key, settings.GRAPHQL_QUERY_COST_BUDGET_WINDOW, nx=True)
+        spent, _ = pipeline.execute()
+    except RedisError:
+        log.warning("Failed to charge GraphQL query cost", exc_info=True)
+        return True
+
+    return spent <= settings.GRAPHQL_QUERY_COST_BUDGET
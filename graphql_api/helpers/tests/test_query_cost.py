@@ -0,0 +1,130 @@
+from unittest.mock import patch
+
+import fakeredis
+from django.test import SimpleTestCase, override_settings
+
+from ..query_cost import (
+    QueryTooComplexError,
+    _CostCalculator,
+    charge_query_cost,
+    query_cost,
+)
+
+repositories_query = """
+query Repositories($first: Int) {
+    owner(username: "codecov") {
+        repositories(first: $first) {
+            edges {
+                node {
+                    name
+                    ...Pulls
+                }
+            }
+        }
+    }
+}
+
+fragment Pulls on Repository {
+    pulls {
+        edges {
+            node {
+                compareWithBase {
+                    ... on Comparison {
+                        impactedFiles { fileName }
+                    }
+                }
+            }
+        }
+    }
+}
+"""
+
+
+class QueryCostTest(SimpleTestCase):
+    def test_scalar_fields(self):
+        assert query_cost("{ me { username email } }") == 3
+
+    def test_connections_multiply_their_children(self):
+        # pulls default to a page of 25, each pull costs
+        # edges (1) + node (1) + compareWithBase (5) + impactedFiles (25) + fileName (1)
+        pull_cost = 1 + 25 * (1 + 1 + 5 + 25 + 1)
+        repository_cost = 1 + 1 + 1 + pull_cost
+        assert (
+            query_cost(repositories_query, variables={"first": 10})
+            == 1 + 1 + 10 * repository_cost
+        )
+        assert (
+            query_cost(repositories_query, variables={"first": 20})
+            == 1 + 1 + 20 * repository_cost
+        )
+
+    def test_operation_name(self):
+        query = "query A { me { username } } query B { me { username email } }"
+        assert query_cost(query) is None
+        assert query_cost(query, operation_name="B") == 3
+
+    def test_invalid_queries(self):
+        assert query_cost("{ me { ") is None
+        assert query_cost("{ me { ...Unknown } }") is None
+        assert query_cost("{ me { ...F } } fragment F on Me { ...F }") is None
+
+    def test_fragments_are_costed_once(self):
+        # every level doubles the number of fields when fragments are expanded
+        levels = 40
+        fragments = " ".join(
+            f"fragment F{i} on Me {{ a: me {{ ...F{i + 1} }} b: me {{ ...F{i + 1} }} }}"
+            for i in range(levels)
+        )
+        query = (
+            f"{{ me {{ ...F0 }} }} {fragments} fragment F{levels} on Me {{ username }}"
+        )
+        with patch.object(
+            _CostCalculator,
+            "field_cost",
+            autospec=True,
+            side_effect=_CostCalculator.field_cost,
+        ) as field_cost:
+            assert query_cost(query) == 3 * 2**levels - 1
+        assert field_cost.call_count == 2 * levels + 2
+
+    def test_same_fragment_spread_twice(self):
+        query = "{ me { ...F ...F } } fragment F on Me { username email }"
+        assert query_cost(query) == 3
+
+    @override_settings(GRAPHQL_QUERY_COST_MAX_NODES=10)
+    def test_too_many_nodes(self):
+        fields = " ".join(f"f{i}" for i in range(10))
+        with self.assertRaises(QueryTooComplexError):
+            query_cost(f"{{ me {{ {fields} }} }}")
+
+
+@override_settings(GRAPHQL_QUERY_COST_BUDGET=100, GRAPHQL_QUERY_COST_BUDGET_WINDOW=60)
+class ChargeQueryCostTest(SimpleTestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        patcher = patch(
+            "graphql_api.helpers.query_cost.get_redis_connection",
+            return_value=self.redis,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_charge_query_cost(self):
+        assert charge_query_cost(1, 60) is True
+        assert charge_query_cost(1, 40) is True
+        assert charge_query_cost(1, 1) is False
+        # other owners have their own budget
+        assert charge_query_cost(2, 60) is True
+
+        assert 0 < self.redis.ttl("graphql_query_cost/1") <= 60
+
+    def test_charge_query_cost_sets_missing_ttl(self):
+        # ex. a key left without a TTL by an older deploy
+        self.redis.set("graphql_query_cost/1", 100)
+        assert charge_query_cost(1, 1) is False
+        assert 0 < self.redis.ttl("graphql_query_cost/1") <= 60
+
+        # the window isn't extended by later operations
+        self.redis.expire("graphql_query_cost/1", 10)
+        charge_query_cost(1, 1)
+        assert self.redis.ttl("graphql_query_cost/1") <= 10
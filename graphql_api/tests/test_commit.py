@@ -516,7 +516,7 @@ class TestCommit(GraphQLTestHelper, TransactionTestCase):
         "services.profiling.ProfilingSummary.critical_files", new_callable=PropertyMock
     )
     @patch("core.commands.commit.commit.CommitCommands.get_file_content")
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_file_report_from_commit")
     def test_fetch_commit_coverage_file_call_the_command(
         self, report_mock, content_mock, critical_files
     ):
@@ -555,7 +555,7 @@ class TestCommit(GraphQLTestHelper, TransactionTestCase):
         "services.profiling.ProfilingSummary.critical_files", new_callable=PropertyMock
     )
     @patch("core.commands.commit.commit.CommitCommands.get_file_content")
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_file_report_from_commit")
     def test_fetch_commit_with_no_coverage_data(
         self, report_mock, content_mock, critical_files
     ):
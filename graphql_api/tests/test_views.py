@@ -1,4 +1,6 @@
 import json
+from hashlib import sha256
+from unittest.mock import patch
 
 from ariadne import ObjectType, make_executable_schema
 from django.test import RequestFactory, TestCase, override_settings
@@ -26,10 +28,12 @@ def generate_schema_that_raise_with(exception):
 
 
 class ArianeViewTestCase(GraphQLTestHelper, TestCase):
-    async def do_query(self, schema, query="{ failing }"):
+    async def do_query(self, schema, query="{ failing }", data=None):
         view = AsyncGraphqlView.as_view(schema=schema)
         request = RequestFactory().post(
-            "/graphql/gh", {"query": query}, content_type="application/json"
+            "/graphql/gh",
+            data if data is not None else {"query": query},
+            content_type="application/json",
         )
         match = ResolverMatch(func=lambda: None, args=(), kwargs={"service": "github"})
 
@@ -74,3 +78,76 @@ class ArianeViewTestCase(GraphQLTestHelper, TestCase):
             data["errors"][0]["message"]
             == "Cannot query field 'fieldThatDoesntExist' on type 'Query'."
         )
+
+    @override_settings(DEBUG=False)
+    async def test_query_cost_in_extensions(self):
+        schema = generate_schema_that_raise_with(Unauthorized())
+        data = await self.do_query(schema)
+        assert data["extensions"] == {"queryCost": 1}
+
+    @override_settings(
+        DEBUG=False, GRAPHQL_QUERY_MAX_COST_ENABLED=True, GRAPHQL_QUERY_MAX_COST=1
+    )
+    async def test_when_query_is_too_expensive(self):
+        schema = generate_schema_that_raise_with(Unauthorized())
+        data = await self.do_query(schema, "{ a: failing b: failing }")
+        assert data["errors"][0]["type"] == "QueryCostExceeded"
+        assert data["extensions"] == {"queryCost": 2}
+
+    @override_settings(DEBUG=False, GRAPHQL_QUERY_MAX_COST=1)
+    async def test_when_max_cost_is_disabled(self):
+        schema = generate_schema_that_raise_with(Unauthorized())
+        data = await self.do_query(schema, "{ a: failing b: failing }")
+        assert data["errors"][0]["type"] == "Unauthorized"
+        assert data["extensions"] == {"queryCost": 2}
+
+    @override_settings(DEBUG=False, GRAPHQL_QUERY_COST_MAX_NODES=1)
+    async def test_when_query_is_too_complex(self):
+        schema = generate_schema_that_raise_with(Unauthorized())
+        data = await self.do_query(schema, "{ a: failing b: failing }")
+        assert data["errors"][0]["type"] == "QueryTooComplex"
+
+    @override_settings(DEBUG=False)
+    async def test_persisted_queries(self):
+        schema = generate_schema_that_raise_with(Unauthorized())
+        query = "{ persisted: failing }"
+        persisted_query = {
+            "persistedQuery": {
+                "version": 1,
+                "sha256Hash": sha256(query.encode()).hexdigest(),
+            }
+        }
+
+        # the hash is unknown until the query was sent once
+        data = await self.do_query(schema, data={"extensions": persisted_query})
+        assert data["errors"][0]["message"] == "PersistedQueryNotFound"
+        assert data["errors"][0]["extensions"] == {"code": "PERSISTED_QUERY_NOT_FOUND"}
+
+        data = await self.do_query(
+            schema, data={"query": query, "extensions": persisted_query}
+        )
+        assert data["errors"][0]["type"] == "Unauthorized"
+
+        with patch("graphql_api.helpers.persisted_queries.parse") as parse:
+            data = await self.do_query(schema, data={"extensions": persisted_query})
+            assert data["errors"][0]["type"] == "Unauthorized"
+            # documents are parsed once
+            data = await self.do_query(schema, query)
+            assert data["errors"][0]["type"] == "Unauthorized"
+            assert not parse.called
+
+    @override_settings(DEBUG=False)
+    async def test_persisted_query_hash_mismatch(self):
+        schema = generate_schema_that_raise_with(Unauthorized())
+        data = await self.do_query(
+            schema,
+            data={
+                "query": "{ failing }",
+                "extensions": {
+                    "persistedQuery": {"version": 1, "sha256Hash": "not the hash"}
+                },
+            },
+        )
+        assert data["errors"][0]["extensions"] == {
+            "code": "PERSISTED_QUERY_HASH_MISMATCH"
+        }
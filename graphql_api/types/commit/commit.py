@@ -6,7 +6,6 @@ from ariadne import ObjectType, convert_kwargs_to_snake_case
 
 import services.components as components
 import services.path as path_service
-import services.report as report_service
 from codecov.db import sync_to_async
 from core.models import Commit
 from graphql_api.actions.commits import commit_uploads
@@ -15,6 +14,8 @@ from graphql_api.actions.path_contents import sort_path_contents
 from graphql_api.dataloader.commit import CommitLoader
 from graphql_api.dataloader.comparison import ComparisonLoader
 from graphql_api.dataloader.owner import OwnerLoader
+from graphql_api.dataloader.report import ReportLoader
+from graphql_api.dataloader.upload import UploadCountLoader
 from graphql_api.helpers.connection import (
     queryset_to_connection,
     queryset_to_connection_sync,
@@ -27,7 +28,7 @@ from services.comparison import Comparison, ComparisonReport
 from services.components import Component
 from services.path import ReportPaths
 from services.profiling import CriticalFile, ProfilingSummary
-from services.report import ReadOnlyReport
+from services.report import ReadOnlyReport, commit_flag_names
 from services.yaml import YamlStates, get_yaml_state
 
 commit_bindable = ObjectType("Commit")
@@ -37,10 +38,14 @@ commit_bindable.set_alias("pullId", "pullid")
 commit_bindable.set_alias("branchName", "branch")
 
 
+def report_loader(info, commit: Commit) -> ReportLoader:
+    return ReportLoader.loader(info, commit.repository_id, ReadOnlyReport)
+
+
 @commit_bindable.field("coverageFile")
-@sync_to_async
-def resolve_file(commit, info, path, flags=None):
-    commit_report = commit.full_report.filter(flags=flags)
+async def resolve_file(commit, info, path, flags=None):
+    commit_report = await report_loader(info, commit).load_file_report(commit, path)
+    commit_report = commit_report.filter(flags=flags)
     file_report = commit_report.get(path)
 
     return {
@@ -133,7 +138,7 @@ async def resolve_compare_with_parent(commit: Commit, info, **kwargs):
 @commit_bindable.field("flagNames")
 @sync_to_async
 def resolve_flags(commit, info, **kwargs):
-    return commit.full_report.flags.keys()
+    return commit_flag_names(commit)
 
 
 @commit_bindable.field("criticalFiles")
@@ -152,23 +157,26 @@ def resolve_critical_files(commit: Commit, info, **kwargs) -> List[CriticalFile]
 @sentry_sdk.trace
 @commit_bindable.field("pathContents")
 @convert_kwargs_to_snake_case
-@sync_to_async
-def resolve_path_contents(commit: Commit, info, path: str = None, filters=None):
+async def resolve_path_contents(commit: Commit, info, path: str = None, filters=None):
     """
     The file directory tree is a list of all the files and directories
     extracted from the commit report of the latest, head commit.
     The is resolver results in a list that represent the tree with files
     and nested directories.
     """
-    current_owner = info.context["request"].current_owner
-
     # TODO: Might need to add reports here filtered by flags in the future
-    commit_report = report_service.build_report_from_commit(
-        commit, report_class=ReadOnlyReport
-    )
+    commit_report = await report_loader(info, commit).load_report(commit)
     if not commit_report:
         return MissingHeadReport()
 
+    return await sync_to_async(path_contents)(
+        commit, info, commit_report, path=path, filters=filters
+    )
+
+
+def path_contents(commit: Commit, info, commit_report, path: str = None, filters=None):
+    current_owner = info.context["request"].current_owner
+
     if filters is None:
         filters = {}
     search_value = filters.get("search_value")
@@ -227,9 +235,8 @@ async def resolve_errors(commit, info, errorType):
 
 
 @commit_bindable.field("totalUploads")
-async def resolve_total_uploads(commit, info):
-    command = info.context["executor"].get_command("commit")
-    return await command.get_uploads_number(commit)
+def resolve_total_uploads(commit, info):
+    return UploadCountLoader.loader(info).load(commit.id)
 
 
 @commit_bindable.field("components")
@@ -9,6 +9,7 @@ from compare.commands.compare.compare import CompareCommands
 from compare.models import ComponentComparison, FlagComparison
 from graphql_api.actions.flags import get_flag_comparisons
 from graphql_api.dataloader.commit import CommitLoader
+from graphql_api.helpers.lookahead import lookahead
 from graphql_api.types.errors import (
     MissingBaseCommit,
     MissingBaseReport,
@@ -43,7 +44,12 @@ def resolve_impacted_files(
     command: CompareCommands = info.context["executor"].get_command("compare")
     comparison: Comparison = info.context.get("comparison", None)
 
-    return command.fetch_impacted_files(comparison_report, comparison, filters)
+    impacted_files = command.fetch_impacted_files(
+        comparison_report, comparison, filters
+    )
+    if comparison and lookahead(info, ("segments",)):
+        _prefetch_sources(comparison, impacted_files)
+    return impacted_files
 
 
 @comparison_bindable.field("impactedFiles")
@@ -60,9 +66,23 @@ def resolve_impacted_files(
         if flags and set(flags).isdisjoint(set(comparison.head_report.flags)):
             return UnknownFlags()
 
-    return {
-        "results": command.fetch_impacted_files(comparison_report, comparison, filters)
-    }
+    impacted_files = command.fetch_impacted_files(
+        comparison_report, comparison, filters
+    )
+    if comparison and lookahead(info, ("results", "segments")):
+        _prefetch_sources(comparison, impacted_files)
+    return {"results": impacted_files}
+
+
+def _prefetch_sources(comparison: Comparison, impacted_files: List[ImpactedFile]):
+    # the segments of every impacted file need its source at the head commit
+    comparison.prefetch_sources(
+        [
+            impacted_file.head_name
+            for impacted_file in impacted_files
+            if impacted_file.head_name
+        ]
+    )
 
 
 @comparison_bindable.field("impactedFilesCount")
@@ -12,6 +12,7 @@ from codecov_auth.helpers import current_user_part_of_org
 from codecov_auth.models import Owner
 from core.models import Repository
 from graphql_api.actions.repository import list_repository_for_owner
+from graphql_api.dataloader.repository import RepositoryLoader
 from graphql_api.helpers.ariadne import ariadne_load_local_graphql
 from graphql_api.helpers.connection import (
     build_connection_graphql,
@@ -90,8 +91,9 @@ def resolve_available_plans(owner: Owner, info) -> List[PlanData]:
 
 @owner_bindable.field("repository")
 async def resolve_repository(owner, info, name):
-    command = info.context["executor"].get_command("repository")
-    repository: Optional[Repository] = await command.fetch_repository(owner, name)
+    repository: Optional[Repository] = await RepositoryLoader.loader(info).load(
+        (owner.ownerid, name)
+    )
 
     if repository is None:
         return NotFoundError()
@@ -112,8 +114,9 @@ async def resolve_repository(owner, info, name):
 
 @owner_bindable.field("repositoryDeprecated")
 async def resolve_repository_deprecated(owner, info, name):
-    command = info.context["executor"].get_command("repository")
-    repository: Optional[Repository] = await command.fetch_repository(owner, name)
+    repository: Optional[Repository] = await RepositoryLoader.loader(info).load(
+        (owner.ownerid, name)
+    )
 
     if repository is not None:
         current_owner = info.context["request"].current_owner
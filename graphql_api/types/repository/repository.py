@@ -11,8 +11,10 @@ from codecov.db import sync_to_async
 from core.models import Branch, Repository
 from graphql_api.actions.commits import repo_commits
 from graphql_api.actions.flags import flag_measurements, flags_for_repo
+from graphql_api.dataloader.branch import BranchLoader
 from graphql_api.dataloader.commit import CommitLoader
 from graphql_api.dataloader.owner import OwnerLoader
+from graphql_api.dataloader.pull import PullLoader
 from graphql_api.helpers.connection import (
     queryset_to_connection,
     queryset_to_connection_sync,
@@ -70,8 +72,7 @@ def resolve_lines(repository: Repository, info) -> Optional[int]:
 
 @repository_bindable.field("branch")
 def resolve_branch(repository, info, name: str) -> Branch:
-    command = info.context["executor"].get_command("branch")
-    return command.fetch_branch(repository, name)
+    return BranchLoader.loader(info).load((repository.pk, name))
 
 
 @repository_bindable.field("author")
@@ -93,8 +94,7 @@ def resolve_upload_token(repository, info):
 
 @repository_bindable.field("pull")
 def resolve_pull(repository, info, id):
-    command = info.context["executor"].get_command("pull")
-    return command.fetch_pull_request(repository, id)
+    return PullLoader.loader(info).load((repository.pk, id))
 
 
 @repository_bindable.field("pulls")
@@ -2,11 +2,16 @@ import json
 import logging
 import socket
 from asyncio import iscoroutine
+from inspect import isawaitable
 
 from ariadne import format_error
+from ariadne.extensions import ExtensionManager
+from ariadne.graphql import handle_graphql_errors, handle_query_result
 from ariadne_django.views import GraphQLAsyncView
 from django.conf import settings
-from django.http import HttpResponseNotAllowed
+from django.http import HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse
+from graphql import GraphQLError, execute
+from prometheus_client import Counter, Histogram
 from sentry_sdk import capture_exception
 
 from codecov.commands.exceptions import BaseException
@@ -14,14 +19,32 @@ from codecov.commands.executor import get_executor_from_request
 from codecov.db import sync_to_async
 from services import ServiceException
 
+from .helpers.persisted_queries import PersistedQueryError, get_document
+from .helpers.query_cost import (
+    QueryCostExtension,
+    QueryTooComplexError,
+    charge_query_cost,
+    query_cost,
+)
 from .schema import schema
 
 log = logging.getLogger(__name__)
 
+GQL_QUERY_COST = Histogram(
+    "api_gql_query_cost",
+    "Estimated cost of the GraphQL operations received",
+    buckets=[10, 50, 100, 500, 1_000, 5_000, 10_000, 50_000, 100_000, 500_000],
+)
+GQL_QUERY_COST_REJECTIONS = Counter(
+    "api_gql_query_cost_rejections",
+    "Number of GraphQL operations rejected because of their cost",
+    ["reason"],
+)
+
 
 class AsyncGraphqlView(GraphQLAsyncView):
     schema = schema
-    extensions = []
+    extensions = [QueryCostExtension]
 
     async def get(self, *args, **kwargs):
         if settings.GRAPHQL_PLAYGROUND:
@@ -33,11 +56,12 @@ class AsyncGraphqlView(GraphQLAsyncView):
         await self._get_user(request)
 
         # get request body information
-        req_body = json.loads(request.body.decode("utf-8")) if request.body else {}
-
-        # clean up graphql query to remove new lines and extra spaces
-        req_body["query"] = req_body["query"].replace("\n", " ")
-        req_body["query"] = req_body["query"].replace("  ", "").strip()
+        try:
+            req_body = json.loads(request.body.decode("utf-8")) if request.body else {}
+        except ValueError:
+            return HttpResponseBadRequest("Request body is not a valid JSON")
+        if not isinstance(req_body, dict):
+            return HttpResponseBadRequest("Operation data should be a JSON object")
 
         # put everything together for log
         log_data = {
@@ -48,8 +72,76 @@ class AsyncGraphqlView(GraphQLAsyncView):
         }
         log.info("GraphQL Request", extra=log_data)
 
-        # request.user = await get_user(request) or AnonymousUser()
-        return await super().post(request, *args, **kwargs)
+        try:
+            document, errors = get_document(
+                self.schema,
+                req_body,
+                validation_rules=self.validation_rules,
+                introspection=self.introspection,
+            )
+        except PersistedQueryError as error:
+            return self._error_response(
+                error.message,
+                "PersistedQueryError",
+                status=200,
+                extensions={"code": error.code},
+            )
+        if errors:
+            _, result = handle_graphql_errors(
+                errors,
+                logger=self.logger,
+                error_formatter=self.error_formatter,
+                debug=settings.DEBUG,
+            )
+            return JsonResponse(result, status=400)
+
+        rejection = await self._check_query_cost(request, req_body, document)
+        if rejection is not None:
+            return rejection
+
+        success, result = await self._execute(request, req_body, document)
+        return JsonResponse(result, status=200 if success else 400)
+
+    async def _execute(self, request, data, document):
+        """
+        Executes an already parsed and validated `document` (see `get_document`).
+        This mirrors `ariadne.graphql` minus the parsing and validation steps.
+        """
+        kwargs = self.get_kwargs_graphql(request)
+        extension_manager = ExtensionManager(
+            kwargs["extensions"], kwargs["context_value"]
+        )
+        with extension_manager.request():
+            try:
+                result = execute(
+                    self.schema,
+                    document,
+                    root_value=kwargs["root_value"],
+                    context_value=kwargs["context_value"],
+                    variable_values=data.get("variables"),
+                    operation_name=data.get("operationName"),
+                    middleware=extension_manager.as_middleware_manager(
+                        kwargs["middleware"]
+                    ),
+                )
+                if isawaitable(result):
+                    result = await result
+            except GraphQLError as error:
+                return handle_graphql_errors(
+                    [error],
+                    logger=kwargs["logger"],
+                    error_formatter=kwargs["error_formatter"],
+                    debug=kwargs["debug"],
+                    extension_manager=extension_manager,
+                )
+
+            return handle_query_result(
+                result,
+                logger=kwargs["logger"],
+                error_formatter=kwargs["error_formatter"],
+                debug=kwargs["debug"],
+                extension_manager=extension_manager,
+            )
 
     def context_value(self, request):
         return {
@@ -79,6 +171,66 @@ class AsyncGraphqlView(GraphQLAsyncView):
             capture_exception(original_error)
         return formatted
 
+    async def _check_query_cost(self, request, req_body, document):
+        """
+        Statically costs the operation before executing it.  Returns an error
+        response if the operation is too expensive or the current owner spent
+        their budget.
+        """
+        try:
+            cost = query_cost(
+                document,
+                variables=req_body.get("variables"),
+                operation_name=req_body.get("operationName"),
+            )
+        except QueryTooComplexError:
+            GQL_QUERY_COST_REJECTIONS.labels(reason="max_nodes").inc()
+            return self._error_response(
+                "Query is too complex to be executed",
+                "QueryTooComplex",
+                status=400,
+            )
+        request.graphql_query_cost = cost
+        if cost is None:
+            # invalid operation, execution will report the errors
+            return None
+
+        GQL_QUERY_COST.observe(cost)
+
+        if (
+            settings.GRAPHQL_QUERY_MAX_COST_ENABLED
+            and cost > settings.GRAPHQL_QUERY_MAX_COST
+        ):
+            GQL_QUERY_COST_REJECTIONS.labels(reason="max_cost").inc()
+            return self._error_response(
+                f"Query cost ({cost}) exceeds the maximum allowed cost ({settings.GRAPHQL_QUERY_MAX_COST})",
+                "QueryCostExceeded",
+                status=400,
+                extensions={"queryCost": cost},
+            )
+
+        current_owner = getattr(request, "current_owner", None)
+        if settings.GRAPHQL_QUERY_COST_BUDGET_ENABLED and current_owner is not None:
+            within_budget = await sync_to_async(charge_query_cost)(
+                current_owner.ownerid, cost
+            )
+            if not within_budget:
+                GQL_QUERY_COST_REJECTIONS.labels(reason="budget").inc()
+                return self._error_response(
+                    "Query cost budget exceeded, try again later",
+                    "QueryCostBudgetExceeded",
+                    status=429,
+                    extensions={"queryCost": cost},
+                )
+
+        return None
+
+    def _error_response(self, message, error_type, status, extensions=None):
+        error = {"message": message, "type": error_type}
+        if extensions:
+            error["extensions"] = extensions
+        return JsonResponse({"errors": [error]}, status=status)
+
     @sync_to_async
     def _get_user(self, request):
         # force eager evaluation of `request.user` (a lazy object)
@@ -0,0 +1,57 @@
+import hashlib
+import json
+import logging
+from typing import Optional
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from services.redis_configuration import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+
+def response_cache_key(path: str, query_params, repo_access=None) -> str:
+    """
+    Badges and graphs only depend on the url (which includes the service, owner,
+    repo, branch/commit/pull and extension), the query params (flag, precision,
+    size and token) and `repo_access`: whether the repo is private and its image
+    token, so that entries aren't served anymore once either changes.
+    """
+    params = sorted((key, query_params.getlist(key)) for key in query_params)
+    digest = hashlib.sha1(repr((path, params, repo_access)).encode()).hexdigest()
+    return f"graphs/response/{digest}"
+
+
+def content_etag(content) -> str:
+    if isinstance(content, str):
+        content = content.encode()
+    return f'"{hashlib.sha256(content).hexdigest()}"'
+
+
+def get_cached_response(key: str) -> Optional[dict]:
+    """
+    Returns the `content` and `etag` of a previously rendered badge or graph
+    """
+    try:
+        cached = get_redis_connection().get(key)
+    except RedisError:
+        log.warning("Unable to read rendered graph from redis", exc_info=True)
+        return None
+    if cached is not None:
+        return json.loads(cached)
+
+
+def cache_response(key: str, content: str, etag: str):
+    """
+    The API isn't told when a branch head moves so entries are short lived: a new
+    head (or new coverage for the same head) shows up once the entry expires.
+    """
+    try:
+        get_redis_connection().set(
+            key,
+            json.dumps({"content": content, "etag": etag}),
+            ex=settings.GRAPHS_CACHE_TTL,
+        )
+    except RedisError:
+        log.warning("Unable to cache rendered graph in redis", exc_info=True)
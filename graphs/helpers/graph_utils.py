@@ -1,3 +1,4 @@
+from io import StringIO
 from math import cos, pi, sin
 
 from shared.helpers.color import coverage_to_color
@@ -16,24 +17,59 @@ style_n_defs = """
 
 
 def _squarify(values, left, top, width, height, **kwargs):
-    # values should add up to width * height
-    if len(values) == 0:
-        return []
+    """
+    Squarified treemap layout of `values`, which should add up to
+    `width * height` and be sorted in decreasing order.
 
-    if len(values) == 1:
-        return _layout(values, left, top, width, height)[0]
+    Rows are grown one value at a time for as long as that doesn't make their
+    worst aspect ratio any worse.  The worst ratio of a row only depends on its
+    sum and its smallest and largest values so those are kept as running totals
+    instead of laying out every candidate row.
+    """
+    rectangles = []
+    start, count = 0, len(values)
+    while start < count:
+        row_sum = smallest = largest = values[start]
+        worst = _row_worst_ratio(row_sum, smallest, largest, width, height)
+        end = start + 1
+        while end < count:
+            value = values[end]
+            next_smallest, next_largest = min(smallest, value), max(largest, value)
+            next_worst = _row_worst_ratio(
+                row_sum + value, next_smallest, next_largest, width, height
+            )
+            if next_worst > worst:
+                break
+            row_sum += value
+            smallest, largest, worst = next_smallest, next_largest, next_worst
+            end += 1
+
+        row, (left, top, width, height) = _layout(
+            values[start:end], left, top, width, height
+        )
+        rectangles.extend(row)
+        start = end
 
-    i = 1
-    while i < len(values) and _worst_ratio(
-        values[:i], left, top, width, height
-    ) >= _worst_ratio(values[: (i + 1)], left, top, width, height):
-        i += 1
+    return rectangles
 
-    current = values[:i]
-    remaining = values[i:]
 
-    rectangles, leftover_space = _layout(current, left, top, width, height)
-    return rectangles + _squarify(remaining, *leftover_space)
+def _row_worst_ratio(row_sum, smallest, largest, width, height):
+    """
+    Same as `_worst_ratio` for a row adding up to `row_sum`: the aspect ratio of
+    a rectangle in the row only gets worse the further its area is from the
+    row's thickness squared so the extremes are enough.
+    """
+    if width >= height:
+        thickness = row_sum / height
+        return max(
+            _max_aspect_ratio((0, 0, thickness, smallest / thickness)),
+            _max_aspect_ratio((0, 0, thickness, largest / thickness)),
+        )
+    thickness = row_sum / width
+    return max(
+        _max_aspect_ratio((0, 0, smallest / thickness, thickness)),
+        _max_aspect_ratio((0, 0, largest / thickness, thickness)),
+    )
 
 
 def _layout(areas, left, top, width, height, **kwargs):
@@ -74,47 +110,41 @@ def _max_aspect_ratio(rect):
 def _svg_rect(x, y, width, height, fill, stroke, stroke_width, _class=None, title=None):
     """http://www.w3schools.com/svg/svg_rect.asp"""
     if title is None:
+        class_attr = f'class="{_class}"' if _class else ""
         return (
-            '<rect x="{0}" y="{1}" width="{2}" height="{3}" '
-            'fill="{4}" stroke="{5}" stroke-width="{6}"{7} />'.format(
-                x,
-                y,
-                width,
-                height,
-                fill,
-                stroke,
-                stroke_width,
-                ('class="%s"' % _class if _class else ""),
-            )
+            f'<rect x="{x}" y="{y}" width="{width}" height="{height}" '
+            f'fill="{fill}" stroke="{stroke}" stroke-width="{stroke_width}"{class_attr} />'
         )
 
     return (
-        '<rect x="{0}" y="{1}" width="{2}" height="{3}" '
-        'fill="{4}" stroke="{5}" stroke-width="{6}" class="{8} tooltipped" '
-        'data-content="{7}">'
-        "<title>{7}</title>"
-        "</rect>".format(
-            x, y, width, height, fill, stroke, stroke_width, title, _class or ""
-        )
+        f'<rect x="{x}" y="{y}" width="{width}" height="{height}" '
+        f'fill="{fill}" stroke="{stroke}" stroke-width="{stroke_width}" '
+        f'class="{_class or ""} tooltipped" data-content="{title}">'
+        f"<title>{title}</title></rect>"
     )
 
 
 def _make_svg(width, height, elements, viewPortWidth=None, viewPortHeight=None):
-    return (
-        '<svg baseProfile="full" width="{0}" height="{1}" viewBox="0 0 {4} {5}" version="1.1"\n'
+    """
+    `elements` can be any iterable of svg elements (e.g. a generator) and are
+    written out one by one rather than joined up front.
+    """
+    svg = StringIO()
+    svg.write(
+        f'<svg baseProfile="full" width="{width}" height="{height}" '
+        f'viewBox="0 0 {viewPortWidth or width} {viewPortHeight or height}" '
+        'version="1.1"\n'
         'xmlns="http://www.w3.org/2000/svg" xmlns:ev="http://www.w3.org/2001/xml-events"\n'
         'xmlns:xlink="http://www.w3.org/1999/xlink">\n'
-        "{2}\n"
-        "{3}\n"
-        "</svg>".format(
-            width,
-            height,
-            style_n_defs,
-            "\n".join(elements),
-            viewPortWidth or width,
-            viewPortHeight or height,
-        )
     )
+    svg.write(style_n_defs)
+    svg.write("\n")
+    for i, element in enumerate(elements):
+        if i:
+            svg.write("\n")
+        svg.write(element)
+    svg.write("\n</svg>")
+    return svg.getvalue()
 
 
 def _tree_height(tree):
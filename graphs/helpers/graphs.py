@@ -24,13 +24,16 @@ def tree(parsed_data, href=None, classes=None, **kwargs):
             "name": "path"
         }
     ]
+
+    Directories whose rectangle ends up smaller than the `min_area` option (in
+    square viewport units) are drawn as a single rectangle instead of one per
+    file, which keeps the svg of very large repos down to what's visible.
     """
     options = settings["sunburst"]["options"].copy()
     options.update(kwargs)
+    min_area = options.get("min_area") or 0
 
-    svg_elements = []
-
-    def recursively_draw(items, step, left, top, width, height):
+    def draw(items, step, left, top, width, height):
         values = [item["lines"] for item in items]
         _sum_values = sum(values)
         if _sum_values > 0:
@@ -43,46 +46,37 @@ def tree(parsed_data, href=None, classes=None, **kwargs):
             indices = [x[0] for x in sorted_values]
             values = [x[1] for x in sorted_values]
             rectangles = _squarify(values, left, top, width, height)
-            for rect, color, _class, children, name in zip(
-                rectangles,
-                (items[index]["color"] for index in indices),
-                (items[index]["_class"] for index in indices),
-                (items[index].get("children", None) for index in indices),
-                (items[index]["name"] for index in indices),
-            ):
-                step.append(name)
-                if children:
-                    recursively_draw(children, step, *rect)
-                    step.pop(-1)
+            for rect, index in zip(rectangles, indices):
+                item = items[index]
+                step.append(item["name"])
+                children = item.get("children", None)
+                if children and rect[2] * rect[3] >= min_area:
+                    yield from draw(children, step, *rect)
                 else:
-                    path = "/".join(step[1:])
-                    rect = _svg_rect(
+                    yield _svg_rect(
                         rect[0],
                         rect[1],
                         rect[2],
                         rect[3],
-                        fill=color,
+                        fill=item["color"],
                         stroke=options["border_color"],
                         stroke_width=options["border_size"],
-                        _class=_class,
-                        title=path,
+                        _class=item["_class"],
+                        title="/".join(step[1:]),
                     )
-                    svg_elements.append(rect)
-                    step.pop(-1)
-
-    recursively_draw(
-        parsed_data,
-        [],
-        0,
-        0,
-        options.get("viewPortWidth") or options["width"],
-        options.get("viewPortHeight") or options["height"],
-    )
+                step.pop(-1)
 
     return _make_svg(
         options["width"],
         options["height"],
-        svg_elements,
+        draw(
+            parsed_data,
+            [],
+            0,
+            0,
+            options.get("viewPortWidth") or options["width"],
+            options.get("viewPortHeight") or options["height"],
+        ),
         options.get("viewPortWidth"),
         options.get("viewPortHeight"),
     )
@@ -1,7 +1,16 @@
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
 from rest_framework import status
 from rest_framework.response import Response
 
+from .helpers.cache import (
+    cache_response,
+    content_etag,
+    get_cached_response,
+    response_cache_key,
+)
+
 
 class GraphBadgeAPIMixin(object):
     def get(self, request, *args, **kwargs):
@@ -15,21 +24,54 @@ class GraphBadgeAPIMixin(object):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        graph = self.get_object(
-            request, *args, **kwargs
-        )  # for badge handler this will get the badge, for graph it will get the graph
-        # do all the header stuff and return the response
+        repo_access = self.get_repo_access()
+
+        cached = None
+        if settings.GRAPHS_CACHE_ENABLED:
+            cache_key = response_cache_key(
+                request.path, request.query_params, repo_access
+            )
+            cached = get_cached_response(cache_key)
 
-        response = HttpResponse(graph)
+        if cached is not None:
+            graph, etag = cached["content"], cached["etag"]
+        else:
+            graph = self.get_object(
+                request, *args, **kwargs
+            )  # for badge handler this will get the badge, for graph it will get the graph
+            etag = content_etag(graph)
+            if settings.GRAPHS_CACHE_ENABLED:
+                cache_response(cache_key, graph, etag)
+
+        # do all the header stuff and return the response
+        if_none_match = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(graph)
+        response["ETag"] = etag
+        # shared caches may only keep the badges and graphs of public repos
+        is_private = repo_access is not None and repo_access[0]
+        response["Cache-Control"] = "{}, max-age={}, must-revalidate".format(
+            "private" if is_private else "public", settings.GRAPHS_CACHE_TTL
+        )
         if self.kwargs.get("ext") == "svg":
             response["Content-Disposition"] = ' inline; filename="{}.svg"'.format(
                 self.filename
             )
             response["Content-Type"] = "image/svg+xml"
-            response["Pragma"] = "no-cache"
-            response["Expires"] = "0"
             response[
                 "Access-Control-Expose-Headers"
             ] = "Content-Type, Cache-Control, Expires, Etag, Last-Modified"
-            response["Cache-Control"] = "no-cache, no-store, must-revalidate, max-age=0"
         return response
+
+    def get_repo_access(self):
+        """
+        Whether the repo is private and its image token, which decide who may see
+        its badges and graphs, or None if the repo doesn't exist.
+        """
+        try:
+            repo = self.repo
+        except Http404:
+            return None
+        return repo.private, repo.image_token
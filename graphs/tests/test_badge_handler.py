@@ -1,5 +1,7 @@
 from unittest.mock import PropertyMock, patch
 
+import fakeredis
+from django.test import override_settings
 from rest_framework import status
 from rest_framework.test import APITestCase
 from shared.reports.resources import Report, ReportFile, Session, SessionType
@@ -1331,3 +1333,83 @@ class TestBadgeHandler(APITestCase):
         expected_badge = [line.strip() for line in expected_badge.split("\n")]
         assert expected_badge == badge
         assert response.status_code == status.HTTP_200_OK
+
+
+class TestBadgeHandlerCaching(APITestCase):
+    def setUp(self):
+        self.owner = OwnerFactory(service="github")
+        self.repo = RepositoryFactory(
+            author=self.owner, active=True, private=False, name="repo1"
+        )
+        self.commit = CommitFactory(repository=self.repo, author=self.owner)
+        BranchFactory(repository=self.repo, name="master", head=self.commit.commitid)
+        self.path = f"/gh/{self.owner.username}/repo1/graphs/badge.txt"
+
+    def test_etag_and_conditional_get(self):
+        response = self.client.get(self.path)
+        assert response.status_code == status.HTTP_200_OK
+        etag = response["ETag"]
+        assert etag.startswith('"') and etag.endswith('"')
+        assert "no-store" not in response["Cache-Control"]
+
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == etag
+        assert response.content == b""
+
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH='"stale"')
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] == etag
+
+    @override_settings(GRAPHS_CACHE_ENABLED=True)
+    @patch("graphs.helpers.cache.get_redis_connection")
+    def test_cached_response(self, get_redis_connection):
+        get_redis_connection.return_value = fakeredis.FakeStrictRedis()
+
+        response = self.client.get(self.path, data={"precision": "2"})
+        assert response.content == b"85.00"
+        etag = response["ETag"]
+
+        self.commit.totals = {**self.commit.totals, "c": "50.00000"}
+        self.commit.save()
+
+        # only the owner and repo are looked up to check who may see the badge
+        with self.assertNumQueries(2):
+            response = self.client.get(self.path, data={"precision": "2"})
+            assert response.content == b"85.00"
+            assert response["ETag"] == etag
+
+            response = self.client.get(
+                self.path, data={"precision": "2"}, HTTP_IF_NONE_MATCH=etag
+            )
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        # other params are cached separately
+        response = self.client.get(self.path, data={"precision": "1"})
+        assert response.content == b"50.0"
+
+    @override_settings(GRAPHS_CACHE_ENABLED=True)
+    @patch("graphs.helpers.cache.get_redis_connection")
+    def test_cached_response_follows_repo_access(self, get_redis_connection):
+        get_redis_connection.return_value = fakeredis.FakeStrictRedis()
+
+        response = self.client.get(self.path)
+        assert response.content == b"85"
+        assert response["Cache-Control"].startswith("public,")
+
+        # the cached badge isn't served once the repo goes private
+        self.repo.private = True
+        self.repo.image_token = "token1"
+        self.repo.save()
+        response = self.client.get(self.path)
+        assert response.content != b"85"
+
+        response = self.client.get(self.path, data={"token": "token1"})
+        assert response.content == b"85"
+        assert response["Cache-Control"].startswith("private,")
+
+        # nor after its image token is rotated
+        self.repo.image_token = "token2"
+        self.repo.save()
+        response = self.client.get(self.path, data={"token": "token1"})
+        assert response.content != b"85"
@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from graphs.helpers.graph_utils import _row_worst_ratio
+from graphs.helpers.graphs import tree
+
+
+def make_flare(num_files, files_per_directory=100):
+    """
+    Builds the flare of a repo with `num_files` files spread over directories of
+    `files_per_directory` files each.
+    """
+    directories = []
+    for start in range(0, num_files, files_per_directory):
+        children = [
+            {
+                "name": f"file_{i}.py",
+                "lines": 10 + i % 490,
+                "color": "#e05d44",
+                "_class": None,
+            }
+            for i in range(start, min(start + files_per_directory, num_files))
+        ]
+        directories.append(
+            {
+                "name": f"dir_{start // files_per_directory}",
+                "lines": sum(child["lines"] for child in children),
+                "color": "#baaf1b",
+                "_class": None,
+                "children": children,
+            }
+        )
+    return [
+        {
+            "name": "",
+            "lines": sum(directory["lines"] for directory in directories),
+            "color": "#baaf1b",
+            "_class": None,
+            "children": directories,
+        }
+    ]
+
+
+class TreeGraphBenchmark(SimpleTestCase):
+    def _ratio_checks(self, num_files):
+        # a single directory holding every file, the worst case of the layout
+        flare = make_flare(num_files, files_per_directory=num_files)
+        with patch(
+            "graphs.helpers.graph_utils._row_worst_ratio", wraps=_row_worst_ratio
+        ) as row_worst_ratio:
+            tree(flare)
+        return row_worst_ratio.call_count
+
+    def test_draws_every_file_of_a_10k_file_repo(self):
+        svg = tree(make_flare(10_000))
+        assert svg.count("<title>") == 10_000
+
+    def test_min_area_collapses_small_directories(self):
+        flare = make_flare(10_000)
+        # the default 500x500 viewport leaves ~25 square units per file
+        svg = tree(flare, min_area=100 * 100)
+        assert svg.count("<title>") == 100
+        assert "<title>dir_0</title>" in svg
+
+    def test_layout_work_grows_linearly_with_file_count(self):
+        small, large = self._ratio_checks(5_000), self._ratio_checks(50_000)
+        # every file is checked at most twice: once when its row grows to include
+        # it and once when it's rejected and starts the next row.  The previous
+        # layout re-measured the whole row for every candidate file, closer to
+        # files squared for a single large directory
+        assert small <= 2 * (5_000 + 1)
+        assert large <= 2 * (50_000 + 1)
+        assert large < small * 11
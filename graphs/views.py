@@ -7,7 +7,6 @@ from rest_framework.exceptions import NotFound
 from rest_framework.negotiation import DefaultContentNegotiation
 from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
-from shared.reports.resources import Report
 
 import services.report as report_service
 from api.shared.mixins import RepoPropertyMixin
@@ -100,7 +99,7 @@ class BadgeHandler(APIView, RepoPropertyMixin, GraphBadgeAPIMixin):
             )
             return None, coverage_range
         try:
-            commit = repo.commits.get(commitid=branch.head)
+            commit = repo.commits.defer("_report").get(commitid=branch.head)
         except ObjectDoesNotExist:
             # if commit does not exist return None coverage
             log.warning("Commit not found", extra=dict(commit=branch.head))
@@ -123,24 +122,19 @@ class BadgeHandler(APIView, RepoPropertyMixin, GraphBadgeAPIMixin):
 
     def flag_coverage(self, flag_name, commit):
         """
-        Looks into a commit's report sessions and returns the coverage for a perticular flag
+        Looks up the coverage for a perticular flag of the commit's report
 
         Parameters
         flag_name (string): name of flag
         commit (obj): commit object containing report
         """
-        if commit.full_report is None:
+        totals = report_service.commit_flag_totals(commit).get(flag_name)
+        if totals is None:
             log.warning(
-                "Commit's report not found", extra=dict(commit=commit, flag=flag_name)
+                "Flag coverage not found", extra=dict(commit=commit, flag=flag_name)
             )
             return None
-        flags = commit.full_report.flags
-        if flags is None:
-            return None
-        flag = flags.get(flag_name)
-        if flag:
-            return flag.totals.coverage
-        return None
+        return totals.coverage
 
 
 class GraphHandler(APIView, RepoPropertyMixin, GraphBadgeAPIMixin):
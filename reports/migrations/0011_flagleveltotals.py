@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2023-11-20 10:12
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Generated SQL
+    # BEGIN;
+    # --
+    # -- Create model FlagLevelTotals
+    # --
+    # CREATE TABLE "reports_flagleveltotals" ("id" bigint NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY, "external_id" uuid NOT NULL, "created_at" timestamp with time zone NOT NULL, "updated_at" timestamp with time zone NOT NULL, "branches" integer NOT NULL, "coverage" numeric(7, 2) NOT NULL, "hits" integer NOT NULL, "lines" integer NOT NULL, "methods" integer NOT NULL, "misses" integer NOT NULL, "partials" integer NOT NULL, "files" integer NOT NULL, "flag_id" bigint NOT NULL, "report_id" bigint NOT NULL);
+    # --
+    # -- Create constraint reports_flagleveltotals_report_flag on model flagleveltotals
+    # --
+    # ALTER TABLE "reports_flagleveltotals" ADD CONSTRAINT "reports_flagleveltotals_report_flag" UNIQUE ("report_id", "flag_id");
+    # ALTER TABLE "reports_flagleveltotals" ADD CONSTRAINT "reports_flagleveltot_flag_id_3c5c7a0e_fk_reports_r" FOREIGN KEY ("flag_id") REFERENCES "reports_repositoryflag" ("id") DEFERRABLE INITIALLY DEFERRED;
+    # ALTER TABLE "reports_flagleveltotals" ADD CONSTRAINT "reports_flagleveltot_report_id_4b4d0a6c_fk_reports_c" FOREIGN KEY ("report_id") REFERENCES "reports_commitreport" ("id") DEFERRABLE INITIALLY DEFERRED;
+    # CREATE INDEX "reports_flagleveltotals_flag_id_3c5c7a0e" ON "reports_flagleveltotals" ("flag_id");
+    # CREATE INDEX "reports_flagleveltotals_report_id_4b4d0a6c" ON "reports_flagleveltotals" ("report_id");
+    # COMMIT;
+
+    dependencies = [
+        ("reports", "0010_alter_reportdetails_files_array_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FlagLevelTotals",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("external_id", models.UUIDField(default=uuid.uuid4, editable=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("branches", models.IntegerField()),
+                ("coverage", models.DecimalField(decimal_places=2, max_digits=7)),
+                ("hits", models.IntegerField()),
+                ("lines", models.IntegerField()),
+                ("methods", models.IntegerField()),
+                ("misses", models.IntegerField()),
+                ("partials", models.IntegerField()),
+                ("files", models.IntegerField()),
+                (
+                    "flag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="reports.repositoryflag",
+                    ),
+                ),
+                (
+                    "report",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="flag_totals",
+                        to="reports.commitreport",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="flagleveltotals",
+            constraint=models.UniqueConstraint(
+                fields=("report", "flag"), name="reports_flagleveltotals_report_flag"
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2023-11-21 09:30
+
+from django.db import migrations, models
+
+from utils.migrations import RiskyAddField
+
+
+class Migration(migrations.Migration):
+    # Generated SQL
+    # BEGIN;
+    # --
+    # -- Add field flag_totals_rolled_up_at to commitreport
+    # --
+    # ALTER TABLE "reports_commitreport" ADD COLUMN "flag_totals_rolled_up_at" timestamp with time zone NULL;
+    # COMMIT;
+
+    dependencies = [
+        ("reports", "0011_flagleveltotals"),
+    ]
+
+    operations = [
+        RiskyAddField(
+            model_name="commitreport",
+            name="flag_totals_rolled_up_at",
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -39,6 +39,8 @@ class CommitReport(
         "core.Commit", related_name="reports", on_delete=models.CASCADE
     )
     code = models.CharField(null=True, max_length=100)
+    # when the `FlagLevelTotals` of this report were last written (they may be empty)
+    flag_totals_rolled_up_at = models.DateTimeField(null=True)
 
 
 class ReportResults(
@@ -205,3 +207,22 @@ class UploadLevelTotals(AbstractTotals):
 
     class Meta:
         db_table = "reports_uploadleveltotals"
+
+
+class FlagLevelTotals(AbstractTotals):
+    """
+    Rollup of a report's totals for a single flag, so that flag coverage can be
+    answered without building the report (see `services.report.commit_flag_totals`).
+    """
+
+    report = models.ForeignKey(
+        CommitReport, related_name="flag_totals", on_delete=models.CASCADE
+    )
+    flag = models.ForeignKey(RepositoryFlag, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["report", "flag"], name="reports_flagleveltotals_report_flag"
+            )
+        ]
@@ -1,13 +1,17 @@
 import json
 import logging
 from base64 import b16encode
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
 from hashlib import md5
+from typing import Dict, Iterable, List, Optional, Tuple
 from uuid import uuid4
 
 from django.conf import settings
 from django.utils import timezone
 from minio import Minio
+from minio.error import S3Error
+from shared.storage.exceptions import FileNotInStorageError
 from shared.utils.ReportEncoder import ReportEncoder
 
 from services.storage import StorageService
@@ -15,9 +19,23 @@ from utils.config import get_config
 
 log = logging.getLogger(__name__)
 
+# Storage reads block on network I/O so concurrent reads are run on a thread pool
+# that is shared by the whole process.  It's sized to match the connection pool of
+# the (global) minio client so that every read reuses a pooled connection.
+ARCHIVE_READ_CONCURRENCY = int(
+    get_config("services", "minio", "read_concurrency", default=10)
+)
+read_executor = ThreadPoolExecutor(
+    max_workers=ARCHIVE_READ_CONCURRENCY, thread_name_prefix="archive-read"
+)
+
+END_OF_CHUNK = b"\n<<<<< end_of_chunk >>>>>\n"
+END_OF_HEADER = b"\n<<<<< end_of_header >>>>>\n"
+
 
 class MinioEndpoints(Enum):
     chunks = "{version}/repos/{repo_hash}/commits/{commitid}/chunks.txt"
+    chunks_index = "{version}/repos/{repo_hash}/commits/{commitid}/chunks_index.json"
     json_data = "{version}/repos/{repo_hash}/commits/{commitid}/json_data/{table}/{field}/{external_id}.json"
     json_data_no_commit = (
         "{version}/repos/{repo_hash}/json_data/{table}/{field}/{external_id}.json"
@@ -37,6 +55,54 @@ class MinioEndpoints(Enum):
         return self.value.format(**kwaargs)
 
 
+def chunk_offsets(blocks: Iterable[bytes]) -> List[Tuple[int, int]]:
+    """
+    Computes the (start, end) byte offsets of every chunk in a chunks file
+    from an iterable of blocks of its contents, without ever holding more
+    than a single block in memory.  The optional header section that may
+    precede the first chunk is skipped.
+    """
+    offsets = []
+    overlap = max(len(END_OF_CHUNK), len(END_OF_HEADER)) - 1
+    look_for_header = True
+    chunk_start = 0
+    buffer_start = 0  # offset of `buffer[0]` in the whole file
+    buffer = b""
+
+    for block in blocks:
+        buffer += block
+        search_from = 0
+
+        if look_for_header:
+            header_end = buffer.find(END_OF_HEADER)
+            first_chunk_end = buffer.find(END_OF_CHUNK)
+            if header_end != -1 and (
+                first_chunk_end == -1 or header_end < first_chunk_end
+            ):
+                search_from = header_end + len(END_OF_HEADER)
+                chunk_start = buffer_start + search_from
+                look_for_header = False
+            elif first_chunk_end != -1:
+                look_for_header = False
+
+        if not look_for_header:
+            while True:
+                chunk_end = buffer.find(END_OF_CHUNK, search_from)
+                if chunk_end == -1:
+                    break
+                offsets.append((chunk_start, buffer_start + chunk_end))
+                search_from = chunk_end + len(END_OF_CHUNK)
+                chunk_start = buffer_start + search_from
+
+        # keep enough of the buffer to find a separator spanning two blocks
+        keep_from = max(search_from, len(buffer) - overlap)
+        buffer_start += keep_from
+        buffer = buffer[keep_from:]
+
+    offsets.append((chunk_start, buffer_start + len(buffer)))
+    return offsets
+
+
 def get_minio_client():
     return Minio(
         settings.MINIO_LOCATION,
@@ -244,6 +310,118 @@ class ArchiveService(object):
         log.info("Downloading chunks from path %s for commit %s", path, commit_sha)
         return self.read_file(path)
 
+    """
+    Starts downloading a commit's chunks file on the archive thread pool so the
+    caller can do other work (ex. database queries) in the meantime.  Errors are
+    raised when calling `result()` on the returned future.
+    """
+
+    def read_chunks_in_background(self, commit_sha) -> "Future[str]":
+        return read_executor.submit(self.read_chunks, commit_sha)
+
+    """
+    Reads the chunk at `chunk_index` (the coverage data for a single file) from a
+    commit's chunks file without downloading the whole thing.
+
+    Chunk offsets are kept in an index stored next to the chunks file.  The index
+    records the ETag of the chunks file it was computed from so that it is rebuilt
+    whenever the worker rewrites the chunks.  Building the index streams the chunks
+    file once in small blocks; afterwards a chunk costs a single ranged GET.
+    Returns `None` if there is no chunk at the given index.
+    """
+
+    def read_chunk(self, commit_sha, chunk_index) -> Optional[str]:
+        path = MinioEndpoints.chunks.get_path(
+            version="v4", repo_hash=self.storage_hash, commitid=commit_sha
+        )
+        minio_client = self.storage.minio_client
+
+        try:
+            stat = minio_client.stat_object(self.root, path)
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                raise FileNotInStorageError(
+                    f"File {path} does not exist in {self.root}"
+                )
+            raise
+
+        if stat.metadata.get("Content-Encoding") == "gzip":
+            # offsets in the compressed object are meaningless
+            content = self.read_file(path).encode()
+            offsets = chunk_offsets([content])
+            if chunk_index >= len(offsets):
+                return None
+            start, end = offsets[chunk_index]
+            return content[start:end].decode()
+
+        offsets = self._read_chunks_index(commit_sha, stat.etag)
+        if offsets is None:
+            offsets = self._write_chunks_index(commit_sha, path, stat.etag)
+
+        if chunk_index >= len(offsets):
+            return None
+
+        start, end = offsets[chunk_index]
+        if start == end:
+            return ""
+
+        log.info(
+            "Reading chunk %s from path %s for commit %s", chunk_index, path, commit_sha
+        )
+        return self.read_file_range(path, start, end - start).decode()
+
+    """
+    Reads `length` bytes of a file starting at `offset` with a single ranged GET.
+    Fewer bytes are returned if the file ends before.  The file must not be
+    stored gzip-encoded.
+    """
+
+    def read_file_range(self, path, offset, length) -> bytes:
+        try:
+            response = self.storage.minio_client.get_object(
+                self.root, path, offset=offset, length=length
+            )
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                raise FileNotInStorageError(
+                    f"File {path} does not exist in {self.root}"
+                )
+            raise
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    def _read_chunks_index(self, commit_sha, etag) -> Optional[List[Tuple[int, int]]]:
+        path = MinioEndpoints.chunks_index.get_path(
+            version="v4", repo_hash=self.storage_hash, commitid=commit_sha
+        )
+        try:
+            index = json.loads(self.read_file(path))
+        except FileNotInStorageError:
+            return None
+
+        if index.get("etag") != etag:
+            return None
+        return [tuple(offset) for offset in index["offsets"]]
+
+    def _write_chunks_index(
+        self, commit_sha, chunks_path, etag
+    ) -> List[Tuple[int, int]]:
+        response = self.storage.minio_client.get_object(self.root, chunks_path)
+        try:
+            offsets = chunk_offsets(response.stream(1024 * 1024))
+        finally:
+            response.close()
+            response.release_conn()
+
+        path = MinioEndpoints.chunks_index.get_path(
+            version="v4", repo_hash=self.storage_hash, commitid=commit_sha
+        )
+        self.write_file(path, json.dumps({"etag": etag, "offsets": offsets}))
+        return offsets
+
     """
     Delete a chunk file from the archive
     """
@@ -256,6 +434,19 @@ class ArchiveService(object):
     def create_presigned_put(self, path):
         return self.storage.create_presigned_put(self.root, path, self.ttl)
 
+    """
+    Creates presigned PUT urls for many paths at once, returning a mapping of
+    path -> url.  Signing happens locally so the only round-trips are the
+    (cached) bucket region and credentials lookups made for the first path.
+    Duplicated paths are only signed once.
+    """
+
+    def create_presigned_puts(self, paths: Iterable[str]) -> Dict[str, str]:
+        return {
+            path: self.storage.create_presigned_put(self.root, path, self.ttl)
+            for path in dict.fromkeys(paths)
+        }
+
     def create_raw_upload_presigned_put(
         self, commit_sha, repo_hash=None, filename=None, expires=None
     ):
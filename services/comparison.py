@@ -1,18 +1,23 @@
 import asyncio
-import copy
 import functools
 import json
 import logging
+import zlib
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
 
 import minio
 import pytz
+import redis_lock
+import sentry_sdk
 from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.db.models import Prefetch, QuerySet
 from django.utils.functional import cached_property
+from redis.exceptions import RedisError
 from shared.helpers.yaml import walk
 from shared.reports.readonly import ReadOnlyReport
 from shared.reports.types import ReportTotals
@@ -20,12 +25,13 @@ from shared.utils.merge import LineType, line_type
 
 import services.report as report_service
 from compare.models import CommitComparison
-from core.models import Commit
+from core.models import Commit, Repository
 from reports.models import CommitReport, ReportDetails
 from services import ServiceException
 from services.archive import ArchiveService
 from services.redis_configuration import get_redis_connection
 from services.repo_providers import RepoProviderService
+from services.source import get_source_lines, prefetch_sources
 from utils.config import get_config
 
 log = logging.getLogger(__name__)
@@ -36,6 +42,118 @@ redis = get_redis_connection()
 
 MAX_DIFF_SIZE = 170
 
+# Git comparisons are fetched here while the reports of a comparison are being
+# built (see `Comparison.prefetch`)
+compare_executor = ThreadPoolExecutor(max_workers=10, thread_name_prefix="git-compare")
+
+
+def compare_cache_key(repository: Repository, base_sha: str, head_sha: str) -> str:
+    """
+    The git comparison between two commit shas never changes
+    """
+    return f"compare/{repository.repoid}/{base_sha}/{head_sha}"
+
+
+def _fetch_compares(adapter, pairs: List[Tuple[str, str]]) -> List[dict]:
+    async def runnable():
+        return await asyncio.gather(
+            *(adapter.get_compare(base_sha, head_sha) for base_sha, head_sha in pairs)
+        )
+
+    return async_to_sync(runnable)()
+
+
+def _get_cached_compares(redis, keys: List[str]) -> List[Optional[dict]]:
+    return [
+        json.loads(zlib.decompress(cached)) if cached is not None else None
+        for cached in redis.mget(keys)
+    ]
+
+
+def get_git_comparisons(
+    user, repository: Repository, pairs: List[Tuple[str, str]], adapter=None
+) -> List[dict]:
+    """
+    Returns the git provider's comparison for each `(base_sha, head_sha)` pair.
+
+    Comparisons are cached compressed in redis since they cannot change (eviction
+    is left to the TTL and the redis eviction policy).  Only the missing ones are
+    fetched from the provider, concurrently, and concurrent cache misses for the
+    same comparison are collapsed with a lock so that only one request hits the
+    provider.
+
+    `adapter` can be passed to call this from another thread: creating one may
+    query the database.
+    """
+    if adapter is None:
+        adapter = RepoProviderService().get_adapter(user, repository)
+    if not settings.COMPARE_CACHE_ENABLED:
+        return _fetch_compares(adapter, pairs)
+
+    keys = [compare_cache_key(repository, *pair) for pair in pairs]
+    locks = []
+    try:
+        redis = get_redis_connection()
+        comparisons = _get_cached_compares(redis, keys)
+        missing = [i for i, comparison in enumerate(comparisons) if comparison is None]
+        if not missing:
+            return comparisons
+
+        # always lock in the same order so that requests for the forward and
+        # reverse comparisons can't wait on each other
+        for key in sorted(set(keys[i] for i in missing)):
+            lock = redis_lock.Lock(redis, f"{key}/lock", expire=30)
+            if not lock.acquire(timeout=30):
+                log.warning(
+                    "Timed out waiting for comparison lock", extra=dict(key=key)
+                )
+                break
+            locks.append(lock)
+
+        # other requests may have populated the cache while we were waiting
+        comparisons = _get_cached_compares(redis, keys)
+    except (RedisError, zlib.error, ValueError):
+        log.warning("Unable to read comparisons from redis", exc_info=True)
+        _release_locks(locks)
+        return _fetch_compares(adapter, pairs)
+
+    try:
+        missing = [i for i, comparison in enumerate(comparisons) if comparison is None]
+        if missing:
+            fetched = _fetch_compares(adapter, [pairs[i] for i in missing])
+            pipeline = redis.pipeline()
+            for i, comparison in zip(missing, fetched):
+                comparisons[i] = comparison
+                pipeline.set(
+                    keys[i],
+                    zlib.compress(json.dumps(comparison).encode()),
+                    ex=settings.COMPARE_CACHE_TTL,
+                )
+            pipeline.execute()
+    except RedisError:
+        log.warning("Unable to write comparisons to redis", exc_info=True)
+    finally:
+        _release_locks(locks)
+
+    return comparisons
+
+
+def _run_in_span(parent_span, description: str, func, *args, **kwargs):
+    """
+    Runs `func` (on another thread) as a child of `parent_span`: spans aren't
+    propagated to other threads on their own.
+    """
+    with parent_span.start_child(op="comparison.prefetch", description=description):
+        return func(*args, **kwargs)
+
+
+def _release_locks(locks: List[redis_lock.Lock]):
+    for lock in locks:
+        try:
+            lock.release()
+        except (RedisError, redis_lock.NotAcquired):
+            pass
+
 
 def _is_added(line_value):
     return line_value and line_value[0] == "+"
@@ -63,6 +181,42 @@ class FirstPullRequest:
     message = "This is the first pull request for this repository"
 
 
+class DiffHunk(NamedTuple):
+    """
+    A diff segment with its hunk-header parsed into integer line ranges.
+    The `*_end` values are exclusive.
+    """
+
+    base_start: int
+    base_end: int
+    head_start: int
+    head_end: int
+    lines: List[str]
+
+    @classmethod
+    def from_segment(cls, segment: dict) -> "DiffHunk":
+        base_start, base_length, head_start, head_length = segment["header"]
+        base_start, head_start = int(base_start), int(head_start)
+        return cls(
+            base_start=base_start,
+            base_end=base_start + int(base_length or 1),
+            head_start=head_start,
+            head_end=head_start + int(head_length or 1),
+            lines=segment.get("lines", []),
+        )
+
+
+class TraversedLine(NamedTuple):
+    """
+    A single line visited by the `FileComparisonTraverseManager`.
+    """
+
+    base_ln: Optional[int]
+    head_ln: Optional[int]
+    value: Optional[str]
+    is_diff: bool  # TODO(pierce): remove when upon combining diff + changes tabs in UI
+
+
 class FileComparisonTraverseManager:
     """
     The FileComparisonTraverseManager uses the visitor-pattern to execute a series
@@ -101,14 +255,15 @@ class FileComparisonTraverseManager:
             }
 
             The segment["header"], also known as the hunk-header (https://en.wikipedia.org/wiki/Diff#Unified_format),
-            is an array of strings, which is why we have to use the int() builtin function
-            to compare with self.head_ln and self.base_ln. It is used by this algorithm to
+            is an array of strings.  The headers are parsed into `DiffHunk`s once up front, which are
+            used by this algorithm to
               1. Set initial values for the self.base_ln and self.head_ln line-counters, and
               2. Detect if self.base and/or self.head refer to lines in the diff at any given time
 
             This algorithm relies on the fact that segments are returned in ascending
             order for each file, which means that the "nearest" segment to the current line
-            being traversed is located at segments[0].
+            being traversed is located at self.hunks[self.hunk_index].  The segments are never
+            copied or mutated - we only move the (self.hunk_index, self.line_index) cursor forward.
 
         src -- this is the source code of the file at the head-reference, where each line
             is a cell in the array. If we are not traversing a segment, and src is provided,
@@ -116,83 +271,93 @@ class FileComparisonTraverseManager:
         """
         self.head_file_eof = head_file_eof
         self.base_file_eof = base_file_eof
-        self.segments = copy.deepcopy(segments)
+        self.hunks = [DiffHunk.from_segment(segment) for segment in segments]
         self.src = src
 
-        if self.segments:
+        # position of the next line to visit in `self.hunks`
+        self.hunk_index = 0
+        self.line_index = 0
+
+        if self.hunks:
             # Base offsets can be 0 if files are added or removed
-            self.base_ln = min(1, int(self.segments[0]["header"][0]))
-            self.head_ln = min(1, int(self.segments[0]["header"][2]))
+            self.base_ln = min(1, self.hunks[0].base_start)
+            self.head_ln = min(1, self.hunks[0].head_start)
         else:
             self.base_ln, self.head_ln = 1, 1
 
     def traverse_finished(self):
-        if self.segments:
+        if self.hunk_index < len(self.hunks):
             return False
         if self.src:
             return self.head_ln > len(self.src)
         return self.head_ln >= self.head_file_eof and self.base_ln >= self.base_file_eof
 
     def traversing_diff(self):
-        if self.segments == []:
+        if self.hunk_index >= len(self.hunks):
             return False
 
-        base_ln_within_offset = (
-            int(self.segments[0]["header"][0])
-            <= self.base_ln
-            < int(self.segments[0]["header"][0])
-            + int(self.segments[0]["header"][1] or 1)
-        )
-        head_ln_within_offset = (
-            int(self.segments[0]["header"][2])
-            <= self.head_ln
-            < int(self.segments[0]["header"][2])
-            + int(self.segments[0]["header"][3] or 1)
+        hunk = self.hunks[self.hunk_index]
+        return (
+            hunk.base_start <= self.base_ln < hunk.base_end
+            or hunk.head_start <= self.head_ln < hunk.head_end
         )
-        return base_ln_within_offset or head_ln_within_offset
 
     def pop_line(self):
         if self.traversing_diff():
-            return self.segments[0]["lines"].pop(0)
+            line = self.hunks[self.hunk_index].lines[self.line_index]
+            self.line_index += 1
+            return line
 
         if self.src:
             return self.src[self.head_ln - 1]
 
-    def apply(self, visitors):
+    def traverse(self) -> Iterator[TraversedLine]:
         """
         Traverses the lines in a file comparison while accounting for the diff.
         If a line only appears in the base file (removed in head), it is prefixed
         with '-', and we only increment self.base_ln. If a line only appears in
         the head file, it is newly added and prefixed with '+', and we only
         increment self.head_ln.
-
-        visitors -- A list of visitors applied to each line.
         """
         while not self.traverse_finished():
-            line_value = self.pop_line()
             is_diff = self.traversing_diff()
+            line_value = self.pop_line()
+            added = is_diff and _is_added(line_value)
+            removed = is_diff and _is_removed(line_value)
 
-            for visitor in visitors:
-                visitor(
-                    None if is_diff and _is_added(line_value) else self.base_ln,
-                    None if is_diff and _is_removed(line_value) else self.head_ln,
-                    line_value,
-                    is_diff,  # TODO(pierce): remove when upon combining diff + changes tabs in UI
-                )
+            yield TraversedLine(
+                base_ln=None if added else self.base_ln,
+                head_ln=None if removed else self.head_ln,
+                value=line_value,
+                is_diff=is_diff,
+            )
 
-            if is_diff and _is_added(line_value):
+            if added:
                 self.head_ln += 1
-            elif is_diff and _is_removed(line_value):
+            elif removed:
                 self.base_ln += 1
             else:
                 self.head_ln += 1
                 self.base_ln += 1
 
-            if self.segments and not self.segments[0]["lines"]:
+            if self.hunk_index < len(self.hunks) and self.line_index >= len(
+                self.hunks[self.hunk_index].lines
+            ):
                 # Either the segment has no lines (and is therefore of no use)
-                # or all lines have been popped and visited, which means we are
+                # or all lines have been visited, which means we are
                 # done traversing it
-                self.segments.pop(0)
+                self.hunk_index += 1
+                self.line_index = 0
+
+    def apply(self, visitors):
+        """
+        Applies each visitor to every line yielded by `self.traverse()`.
+
+        visitors -- A list of visitors applied to each line.
+        """
+        for line in self.traverse():
+            for visitor in visitors:
+                visitor(line.base_ln, line.head_ln, line.value, line.is_diff)
 
 
 class FileComparisonVisitor:
@@ -637,12 +802,78 @@ class Comparison(object):
         self.user = user
         self._base_commit = base_commit
         self._head_commit = head_commit
+        # chunks downloads started by `prefetch`, by commitid
+        self._chunks_futures = {}
+        self._prefetched = False
 
     def validate(self):
+        self.prefetch()
         # make sure head and base reports exist (will throw an error if not)
         self.head_report
         self.base_report
 
+    def prefetch(self):
+        """
+        Builds the base and head reports and fetches the git comparison with their
+        I/O overlapping: the base and head chunks downloads and the provider
+        comparison all start before the reports are built.  Database queries stay
+        on the calling thread.
+
+        This is best effort, any error is left for whatever uses the reports or
+        the git comparison to raise.  It's only ever attempted once.
+        """
+        if self._prefetched or "head_report" in self.__dict__:
+            return
+        self._prefetched = True
+
+        with sentry_sdk.start_span(
+            op="comparison.prefetch", description="Prefetch comparison"
+        ) as span:
+            try:
+                commits = (self.base_commit, self.head_commit)
+                for commit in commits:
+                    self._chunks_futures[
+                        commit.commitid
+                    ] = report_service.prefetch_report_chunks(commit)
+
+                repository = self.base_commit.repository
+                adapter = RepoProviderService().get_adapter(self.user, repository)
+                git_comparison_future = compare_executor.submit(
+                    _run_in_span,
+                    span,
+                    "Fetch git comparison",
+                    get_git_comparisons,
+                    self.user,
+                    repository,
+                    self._git_comparison_pairs,
+                    adapter=adapter,
+                )
+            except Exception:
+                log.info("Unable to prefetch comparison", exc_info=True)
+                return
+
+            with span.start_child(op="comparison.prefetch", description="Base report"):
+                try:
+                    self.base_report
+                except Exception:
+                    pass
+
+            with span.start_child(
+                op="comparison.prefetch", description="Wait for git comparison"
+            ):
+                try:
+                    self._fetch_comparison_and_reverse_comparison = (
+                        git_comparison_future.result()
+                    )
+                except Exception:
+                    pass
+
+            with span.start_child(op="comparison.prefetch", description="Head report"):
+                try:
+                    self.head_report
+                except Exception:
+                    pass
+
     @cached_property
     def base_commit(self):
         return self._base_commit
@@ -668,16 +899,12 @@ class Comparison(object):
             base_file = None
 
         if with_src:
-            adapter = RepoProviderService().get_adapter(
-                owner=self.user, repo=self.base_commit.repository
+            src = get_source_lines(
+                self.user,
+                self.base_commit.repository,
+                self.head_commit.commitid,
+                file_name,
             )
-            file_content = async_to_sync(adapter.get_source)(
-                file_name, self.head_commit.commitid
-            )["content"]
-            # make sure the file is str utf-8
-            if type(file_content) is not str:
-                file_content = str(file_content, "utf-8")
-            src = file_content.splitlines()
         else:
             src = []
 
@@ -689,6 +916,18 @@ class Comparison(object):
             bypass_max_diff=bypass_max_diff,
         )
 
+    def prefetch_sources(self, file_names: List[str]):
+        """
+        Fetches the head source of `file_names` concurrently ahead of calling
+        `get_file_comparison(with_src=True)` for each of them.
+        """
+        prefetch_sources(
+            self.user,
+            self.base_commit.repository,
+            self.head_commit.commitid,
+            file_names,
+        )
+
     @property
     def git_comparison(self):
         return self._fetch_comparison_and_reverse_comparison[0]
@@ -696,7 +935,10 @@ class Comparison(object):
     @cached_property
     def base_report(self):
         try:
-            return report_service.build_report_from_commit(self.base_commit)
+            return report_service.build_report_from_commit(
+                self.base_commit,
+                chunks_future=self._chunks_futures.pop(self.base_commit.commitid, None),
+            )
         except minio.error.S3Error as e:
             if e.code == "NoSuchKey":
                 raise MissingComparisonReport("Missing base report")
@@ -706,7 +948,10 @@ class Comparison(object):
     @cached_property
     def head_report(self):
         try:
-            report = report_service.build_report_from_commit(self.head_commit)
+            report = report_service.build_report_from_commit(
+                self.head_commit,
+                chunks_future=self._chunks_futures.pop(self.head_commit.commitid, None),
+            )
         except minio.error.S3Error as e:
             if e.code == "NoSuchKey":
                 raise MissingComparisonReport("Missing head report")
@@ -768,21 +1013,16 @@ class Comparison(object):
         Fetches comparison and reverse comparison concurrently, then
         caches the result. Returns (comparison, reverse_comparison).
         """
-        adapter = RepoProviderService().get_adapter(
-            self.user, self.base_commit.repository
-        )
-        comparison_coro = adapter.get_compare(
-            self.base_commit.commitid, self.head_commit.commitid
-        )
-
-        reverse_comparison_coro = adapter.get_compare(
-            self.head_commit.commitid, self.base_commit.commitid
+        return get_git_comparisons(
+            self.user, self.base_commit.repository, self._git_comparison_pairs
         )
 
-        async def runnable():
-            return await asyncio.gather(comparison_coro, reverse_comparison_coro)
-
-        return async_to_sync(runnable)()
+    @property
+    def _git_comparison_pairs(self) -> List[Tuple[str, str]]:
+        return [
+            (self.base_commit.commitid, self.head_commit.commitid),
+            (self.head_commit.commitid, self.base_commit.commitid),
+        ]
 
     def flag_comparison(self, flag_name):
         return FlagComparison(self, flag_name)
@@ -826,6 +1066,64 @@ class FlagComparison(object):
         return self.head_report.apply_diff(git_comparison["diff"])
 
 
+class ImpactedFileSummary(NamedTuple):
+    """
+    Line-coverage counts of an `ImpactedFile`, precomputed by `summarize_impacted_files`.
+    """
+
+    added_lines: int
+    removed_lines: int
+    patch_hits: int
+    patch_misses: int
+    patch_partials: int
+    unexpected_changes: int
+    unexpected_misses: int
+
+
+def _coverage_letters(values) -> str:
+    return "".join(value if isinstance(value, str) else " " for value in values)
+
+
+def summarize_impacted_files(files: List[dict]) -> List[ImpactedFileSummary]:
+    """
+    Computes the patch totals, unintended changes and misses of every file in
+    the raw comparison data in one pass.  The coverage values of all files are
+    packed into a single string per kind (with per-file offsets) so that counting
+    happens with `str.count` over slices instead of iterating over line tuples.
+    """
+    added_offsets, unexpected_offsets = [0], [0]
+    added, unexpected = [], []
+    for file in files:
+        added_diff_coverage = file.get("added_diff_coverage") or []
+        unexpected_line_changes = file.get("unexpected_line_changes") or []
+        added.append(_coverage_letters(cov for _, cov in added_diff_coverage))
+        unexpected.append(
+            _coverage_letters(head[1] for _, head in unexpected_line_changes)
+        )
+        added_offsets.append(added_offsets[-1] + len(added_diff_coverage))
+        unexpected_offsets.append(unexpected_offsets[-1] + len(unexpected_line_changes))
+
+    added_letters, unexpected_letters = "".join(added), "".join(unexpected)
+    summaries = []
+    for idx, file in enumerate(files):
+        patch = added_letters[added_offsets[idx] : added_offsets[idx + 1]]
+        changes = unexpected_letters[
+            unexpected_offsets[idx] : unexpected_offsets[idx + 1]
+        ]
+        summaries.append(
+            ImpactedFileSummary(
+                added_lines=len(patch),
+                removed_lines=len(file.get("removed_diff_coverage") or []),
+                patch_hits=patch.count("h"),
+                patch_misses=patch.count("m"),
+                patch_partials=patch.count("p"),
+                unexpected_changes=len(changes),
+                unexpected_misses=changes.count("m"),
+            )
+        )
+    return summaries
+
+
 @dataclass
 class ImpactedFile:
     @dataclass
@@ -851,6 +1149,12 @@ class ImpactedFile:
     lines_only_on_base: List[int] = field(default_factory=list)
     lines_only_on_head: List[int] = field(default_factory=list)
 
+    # precomputed line-coverage counts, the line lists above are only
+    # walked when this is missing
+    summary: Optional[ImpactedFileSummary] = field(
+        default=None, repr=False, compare=False
+    )
+
     @classmethod
     def create(cls, **kwargs):
         base_coverage = kwargs.pop("base_coverage")
@@ -870,6 +1174,14 @@ class ImpactedFile:
         """
         Returns `True` if the file has any additions or removals in the diff
         """
+        if self.summary:
+            return bool(
+                self.summary.added_lines
+                or self.summary.removed_lines
+                or self.file_was_added_by_diff
+                or self.file_was_removed_by_diff
+            )
+
         return (
             self.added_diff_coverage
             and len(self.added_diff_coverage) > 0
@@ -884,6 +1196,9 @@ class ImpactedFile:
         """
         Returns `True` if the file has any unexpected changes
         """
+        if self.summary:
+            return self.summary.unexpected_changes > 0
+
         return (
             self.unexpected_line_changes is not None
             and len(self.unexpected_line_changes) > 0
@@ -901,6 +1216,9 @@ class ImpactedFile:
         """
         Returns the misses count for a unintended impacted file
         """
+        if self.summary:
+            return self.summary.unexpected_misses
+
         misses = 0
 
         unexpected_line_changes = self.unexpected_line_changes or []
@@ -918,6 +1236,8 @@ class ImpactedFile:
         """
         Returns the misses count for a direct impacted file
         """
+        if self.summary:
+            return self.summary.patch_misses
 
         misses = 0
 
@@ -933,6 +1253,15 @@ class ImpactedFile:
         """
         Sums of hits, misses and partials in the diff
         """
+        if self.summary:
+            if self.summary.added_lines > 0:
+                return ImpactedFile.Totals(
+                    hits=self.summary.patch_hits,
+                    misses=self.summary.patch_misses,
+                    partials=self.summary.patch_partials,
+                )
+            return None
+
         if self.added_diff_coverage and len(self.added_diff_coverage) > 0:
             hits, misses, partials = (0, 0, 0)
             for added_coverage in self.added_diff_coverage:
@@ -963,6 +1292,108 @@ class ImpactedFile:
             return parts[-1]
 
 
+# Comparison data written by the worker to a path ending with this suffix is in
+# the indexed format (see `encode_indexed_comparison`) rather than plain JSON
+INDEXED_COMPARISON_SUFFIX = ".idx"
+INDEXED_COMPARISON_MAGIC = b"CMPIDX1 "
+# magic + 10 digits header length + newline
+INDEXED_COMPARISON_PREAMBLE_LENGTH = len(INDEXED_COMPARISON_MAGIC) + 11
+# bytes read up front, most headers fit in there
+INDEXED_COMPARISON_HEADER_READ_SIZE = 64 * 1024
+
+# per-line data of an impacted file, everything else is part of the index
+IMPACTED_FILE_LINE_FIELDS = (
+    "added_diff_coverage",
+    "removed_diff_coverage",
+    "unexpected_line_changes",
+    "lines_only_on_base",
+    "lines_only_on_head",
+)
+
+
+def encode_indexed_comparison(data: dict) -> bytes:
+    """
+    Encodes comparison data (`{"files": [...]}`) in the indexed format:
+
+        CMPIDX1 <header length, 10 digits>\n<header><line data>...
+
+    The header is a JSON object whose `files` are the impacted files without
+    their line data but with their `ImpactedFileSummary` (as a list) and the
+    `offset` and `length` of their line data.  The line data of every file is a
+    JSON object stored after the header, offsets are relative to the end of the
+    header.
+    """
+    files = data.get("files", [])
+    entries, bodies, offset = [], [], 0
+    for file, summary in zip(files, summarize_impacted_files(files)):
+        body = json.dumps(
+            {key: file[key] for key in IMPACTED_FILE_LINE_FIELDS if key in file}
+        ).encode()
+        entry = {
+            key: value
+            for key, value in file.items()
+            if key not in IMPACTED_FILE_LINE_FIELDS
+        }
+        entry.update(summary=list(summary), offset=offset, length=len(body))
+        entries.append(entry)
+        bodies.append(body)
+        offset += len(body)
+
+    header = json.dumps({"files": entries}).encode()
+    return b"".join(
+        [INDEXED_COMPARISON_MAGIC, b"%010d\n" % len(header), header, *bodies]
+    )
+
+
+class IndexedComparisonReader:
+    """
+    Reads comparison data in the indexed format with ranged reads: the header
+    (and whatever line data fits in the same read) is read once and the line
+    data of a single file costs at most one more read.
+    """
+
+    def __init__(self, archive_service: ArchiveService, path: str):
+        self.archive_service = archive_service
+        self.path = path
+
+    @cached_property
+    def _header(self) -> Tuple[List[dict], int, bytes]:
+        """
+        Returns the index entries, the offset at which line data starts and the
+        line data that was read along with the header
+        """
+        block = self.archive_service.read_file_range(
+            self.path, 0, INDEXED_COMPARISON_HEADER_READ_SIZE
+        )
+        if not block.startswith(INDEXED_COMPARISON_MAGIC):
+            raise ValueError(f"{self.path} is not an indexed comparison")
+
+        header_end = INDEXED_COMPARISON_PREAMBLE_LENGTH + int(
+            block[len(INDEXED_COMPARISON_MAGIC) : INDEXED_COMPARISON_PREAMBLE_LENGTH]
+        )
+        if len(block) < header_end:
+            block += self.archive_service.read_file_range(
+                self.path, len(block), header_end - len(block)
+            )
+        header = json.loads(block[INDEXED_COMPARISON_PREAMBLE_LENGTH:header_end])
+        return header["files"], header_end, block[header_end:]
+
+    @property
+    def entries(self) -> List[dict]:
+        return self._header[0]
+
+    def read_line_data(self, entry: dict) -> dict:
+        _, body_offset, prefetched = self._header
+        start, end = entry["offset"], entry["offset"] + entry["length"]
+        if end <= len(prefetched):
+            return json.loads(prefetched[start:end])
+        return json.loads(
+            self.archive_service.read_file_range(
+                self.path, body_offset + start, entry["length"]
+            )
+        )
+
+
 @dataclass
 class ComparisonReport(object):
     """
@@ -975,18 +1406,84 @@ class ComparisonReport(object):
 
     @cached_property
     def files(self) -> List[ImpactedFile]:
+        """
+        Impacted files of the comparison.  For data in the indexed format only the
+        index is read: the files carry their summary but no line data.
+        """
         if not self.commit_comparison.report_storage_path:
             return []
 
+        if self._indexed_reader is not None:
+            try:
+                entries = self._indexed_reader.entries
+            except:
+                log.error(
+                    "ComparisonReport - couldn't fetch index from storage",
+                    exc_info=True,
+                )
+                return []
+            return [self._create_impacted_file(entry) for entry in entries]
+
         comparison_data = self._fetch_raw_comparison_data()
+        files = comparison_data.get("files", [])
         return [
-            ImpactedFile.create(**data) for data in comparison_data.get("files", [])
+            ImpactedFile.create(**data, summary=summary)
+            for data, summary in zip(files, summarize_impacted_files(files))
         ]
 
     def impacted_file(self, path: str) -> Optional[ImpactedFile]:
+        if self._indexed_reader is None:
+            return self._files_by_head_name.get(path)
+
+        entry = self._entries_by_head_name.get(path)
+        if entry is None:
+            return None
+        try:
+            line_data = self._indexed_reader.read_line_data(entry)
+        except:
+            log.error(
+                "ComparisonReport - couldn't fetch file data from storage",
+                exc_info=True,
+            )
+            line_data = {}
+        return self._create_impacted_file(entry, line_data)
+
+    @cached_property
+    def _files_by_head_name(self) -> Dict[str, ImpactedFile]:
+        files_by_head_name = {}
         for file in self.files:
-            if file.head_name == path:
-                return file
+            files_by_head_name.setdefault(file.head_name, file)
+        return files_by_head_name
+
+    @cached_property
+    def _entries_by_head_name(self) -> Dict[str, dict]:
+        entries_by_head_name = {}
+        # `files` logs (and swallows) errors reading the index
+        if self.files:
+            for entry in self._indexed_reader.entries:
+                entries_by_head_name.setdefault(entry.get("head_name"), entry)
+        return entries_by_head_name
+
+    @cached_property
+    def _indexed_reader(self) -> Optional[IndexedComparisonReader]:
+        path = self.commit_comparison.report_storage_path
+        if path and path.endswith(INDEXED_COMPARISON_SUFFIX):
+            repository = self.commit_comparison.compare_commit.repository
+            return IndexedComparisonReader(ArchiveService(repository), path)
+
+    def _create_impacted_file(
+        self, entry: dict, line_data: Optional[dict] = None
+    ) -> ImpactedFile:
+        fields = {
+            key: value
+            for key, value in entry.items()
+            if key not in ("summary", "offset", "length")
+        }
+        return ImpactedFile.create(
+            **fields,
+            **(line_data or {}),
+            summary=ImpactedFileSummary(*entry["summary"]),
+        )
 
     @cached_property
     def impacted_files(self) -> List[ImpactedFile]:
@@ -1158,10 +1655,10 @@ class PullRequestComparison(Comparison):
         Returns the diff between the 'self.pull.compared_to' field and the
         'self.pull.base' field.
         """
-        adapter = RepoProviderService().get_adapter(self.user, self.pull.repository)
-        return async_to_sync(adapter.get_compare)(
-            self.pull.compared_to, self.pull.base
-        )["diff"]
+        [comparison] = get_git_comparisons(
+            self.user, self.pull.repository, [(self.pull.compared_to, self.pull.base)]
+        )
+        return comparison["diff"]
 
     @cached_property
     def pseudo_diff_adjusts_tracked_lines(self):
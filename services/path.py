@@ -1,8 +1,7 @@
 import re
-from collections import defaultdict
 from dataclasses import dataclass
 from functools import cached_property
-from typing import Iterable, List, Optional, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
 
 import sentry_sdk
 from asgiref.sync import async_to_sync
@@ -61,7 +60,7 @@ class File(PathNode):
     totals: ReportTotals
 
 
-@dataclass
+@dataclass(eq=False)
 class Dir(PathNode):
     """
     Directory node in a file/directory tree.
@@ -81,6 +80,113 @@ class Dir(PathNode):
             totals.misses += child.misses
         return totals
 
+    def __eq__(self, other):
+        if not isinstance(other, Dir):
+            return NotImplemented
+        return (self.full_path, self.children) == (other.full_path, other.children)
+
+
+class PathTree:
+    """
+    Prefix tree (trie) of all the file paths in a report.
+
+    Building the tree only splits each path once.  Totals are rolled up lazily
+    the first time a node's totals are needed and then memoized on the node,
+    so looking up a directory or listing its children only costs in proportion
+    to what is returned (and the subtree below it the first time its totals are
+    computed).
+    """
+
+    class Node:
+        __slots__ = ("full_path", "children", "is_file", "totals")
+
+        def __init__(self, full_path: str):
+            self.full_path = full_path
+            self.children: Dict[str, PathTree.Node] = {}
+            self.is_file = False
+            self.totals: Optional[ReportTotals] = None
+
+    def __init__(
+        self,
+        full_paths: Iterable[str],
+        file_totals: Callable[[str], ReportTotals],
+    ):
+        self.root = PathTree.Node("")
+        self.file_totals = file_totals
+
+        for full_path in full_paths:
+            node = self.root
+            for part in full_path.split("/"):
+                child = node.children.get(part)
+                if child is None:
+                    child = PathTree.Node(
+                        f"{node.full_path}/{part}" if node.full_path else part
+                    )
+                    node.children[part] = child
+                node = child
+            node.is_file = True
+
+    def find(self, path: Optional[str]) -> Optional["PathTree.Node"]:
+        node = self.root
+        if not path:
+            return node
+        for part in path.split("/"):
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def file_paths(self, node: "PathTree.Node") -> Iterator[str]:
+        """
+        Yields the full path of every file at or below the given node.
+        """
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.is_file:
+                yield node.full_path
+            stack.extend(reversed(node.children.values()))
+
+    def totals(self, node: "PathTree.Node") -> ReportTotals:
+        if node.totals is None:
+            if not node.children:
+                node.totals = self.file_totals(node.full_path)
+            else:
+                totals = ReportTotals.default_totals()
+                for child in node.children.values():
+                    child_totals = self.totals(child)
+                    totals.lines += child_totals.lines or 0
+                    totals.hits += child_totals.hits or 0
+                    totals.partials += child_totals.partials or 0
+                    totals.misses += child_totals.misses or 0
+                node.totals = totals
+        return node.totals
+
+    def path_node(self, node: "PathTree.Node") -> Union[File, Dir]:
+        if not node.children:
+            return File(full_path=node.full_path, totals=self.totals(node))
+        return TreeDir(tree=self, node=node)
+
+
+class TreeDir(Dir):
+    """
+    Directory node backed by a `PathTree` node.  Totals come from the tree and
+    children are only materialized when accessed.
+    """
+
+    def __init__(self, tree: PathTree, node: PathTree.Node):
+        self.full_path = node.full_path
+        self._tree = tree
+        self._node = node
+
+    @cached_property
+    def children(self) -> List[PathNode]:
+        return [self._tree.path_node(child) for child in self._node.children.values()]
+
+    @cached_property
+    def totals(self) -> ReportTotals:
+        return self._tree.totals(self._node)
+
 
 @dataclass
 class PrefixedPath:
@@ -154,24 +260,12 @@ class ReportPaths:
         self.unfiltered_report = report
         self.filter_flags = filter_flags
         self.prefix = path or ""
+        self.search_term = search_term
 
         # Filter report if flags exist
         if self.filter_flags:
             self.report = self.report.filter(flags=self.filter_flags)
 
-        self._paths = [
-            PrefixedPath(full_path=full_path, prefix=self.prefix)
-            for full_path in self.files
-            if is_subpath(full_path, self.prefix)
-        ]
-
-        if search_term:
-            self._paths = [
-                path
-                for path in self.paths
-                if search_term.lower() in path.relative_path.lower()
-            ]
-
     @cached_property
     def files(self) -> List[str]:
         if self.filter_flags:
@@ -181,12 +275,41 @@ class ReportPaths:
             return files
         return self.report.files
 
+    @cached_property
+    def tree(self) -> PathTree:
+        """
+        The path tree for this report and flag filter.  It is cached on the
+        (unfiltered) report so that it is only built once for a given report
+        regardless of how many `ReportPaths` are created from it.
+        """
+        trees = self.unfiltered_report.__dict__.setdefault("_path_trees", {})
+        key = tuple(sorted(self.filter_flags or []))
+        if key not in trees:
+            trees[key] = PathTree(self.files, self.report.get_file_totals)
+        return trees[key]
+
     def _filter_commit_report(self) -> None:
         self.report = self.report.filter(flags=self.filter_flags)
 
-    @property
-    def paths(self):
-        return self._paths
+    @cached_property
+    def paths(self) -> List[PrefixedPath]:
+        node = self.tree.find(self.prefix)
+        if node is None:
+            return []
+
+        paths = [
+            PrefixedPath(full_path=full_path, prefix=self.prefix)
+            for full_path in self.tree.file_paths(node)
+        ]
+
+        if self.search_term:
+            paths = [
+                path
+                for path in paths
+                if self.search_term.lower() in path.relative_path.lower()
+            ]
+
+        return paths
 
     @sentry_sdk.trace
     def full_filelist(self) -> Iterable[File]:
@@ -203,7 +326,19 @@ class ReportPaths:
         """
         Return a single directory (specified by `path`) of mixed file/directory results.
         """
-        return self._single_directory_recursive(self.paths)
+        tree = self.tree
+        if self.search_term:
+            # only the matching files should show up in the directory listing
+            tree = PathTree(
+                (path.full_path for path in self.paths), self.report.get_file_totals
+            )
+
+        node = tree.find(self.prefix)
+        if node is None:
+            return []
+        if not node.children:
+            return [tree.path_node(node)]
+        return [tree.path_node(child) for child in node.children.values()]
 
     def _totals(self, path: PrefixedPath) -> ReportTotals:
         """
@@ -211,33 +346,6 @@ class ReportPaths:
         """
         return self.report.get_file_totals(path.full_path)
 
-    def _single_directory_recursive(
-        self, paths: Iterable[PrefixedPath]
-    ) -> Iterable[Union[File, Dir]]:
-        grouped = defaultdict(list)
-        for path in paths:
-            grouped[path.basename].append(path)
-
-        results = []
-
-        for basename, paths in grouped.items():
-            paths = list(paths)
-            if len(paths) == 1 and paths[0].is_file:
-                path = paths[0]
-                results.append(
-                    File(full_path=path.full_path, totals=self._totals(path))
-                )
-            else:
-                children = self._single_directory_recursive(
-                    [
-                        PrefixedPath(full_path=path.full_path, prefix=basename)
-                        for path in paths
-                    ]
-                )
-                results.append(Dir(full_path=basename, children=children))
-
-        return results
-
 
 def provider_path_exists(path: str, commit: Commit, owner: Owner):
     """
@@ -41,7 +41,7 @@ def get_token_refresh_callback(
         )
         string_to_save = encode_token(new_token)
         owner.oauth_token = encryptor.encode(string_to_save).decode()
-        owner.save()
+        owner.save(update_fields=["oauth_token"])
 
     return callback
 
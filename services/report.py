@@ -1,10 +1,19 @@
+import json
 import logging
-from typing import List, Optional
+import zlib
+from concurrent.futures import Future
+from dataclasses import dataclass, fields, replace
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
 
+import redis_lock
 import sentry_sdk
 from django.conf import settings
-from django.db.models import Prefetch, Q
+from django.db.models import Max, Prefetch, Q
+from django.utils import timezone
 from django.utils.functional import cached_property
+from prometheus_client import Counter
+from redis.exceptions import RedisError
 from shared.helpers.flag import Flag
 from shared.reports.readonly import ReadOnlyReport as SharedReadOnlyReport
 from shared.reports.resources import Report
@@ -13,13 +22,37 @@ from shared.storage.exceptions import FileNotInStorageError
 from shared.utils.sessions import Session, SessionType
 
 from core.models import Commit
-from reports.models import AbstractTotals, CommitReport, ReportDetails, ReportSession
+from reports.models import (
+    AbstractTotals,
+    CommitReport,
+    FlagLevelTotals,
+    ReportDetails,
+    ReportSession,
+    RepositoryFlag,
+)
 from services.archive import ArchiveService
+from services.redis_configuration import get_redis_connection
+from utils.cache import LRUCache
 from utils.config import RUN_ENV
 
 log = logging.getLogger(__name__)
 
 
+REPORT_CACHE_HITS = Counter(
+    "api_report_cache_hits",
+    "Number of report data lookups served from the cache",
+    ["tier"],
+)
+REPORT_CACHE_MISSES = Counter(
+    "api_report_cache_misses",
+    "Number of report data lookups that had to be built from scratch",
+)
+REPORT_CACHE_EVICTIONS = Counter(
+    "api_report_cache_evictions",
+    "Number of report data entries evicted from the process-local cache",
+)
+
+
 class ReportMixin:
     def file_reports(self):
         for f in self.files:
@@ -60,13 +93,303 @@ def build_report(chunks, files, sessions, totals, report_class=None):
     )
 
 
+@dataclass
+class ReportData:
+    """
+    Everything needed to build a report for a commit: the chunks from archive
+    storage and the files/sessions/totals sourced from the database.
+    """
+
+    chunks: str
+    files: dict
+    sessions: dict
+    totals: Optional[ReportTotals]
+
+
+# `Session` isn't a dataclass, these are the arguments `build_session` passes it
+SESSION_FIELDS = (
+    "id",
+    "totals",
+    "time",
+    "archive",
+    "flags",
+    "provider",
+    "build",
+    "job",
+    "url",
+    "state",
+    "env",
+    "name",
+    "session_type",
+    "session_extras",
+)
+
+
+class ReportDataEncoder(json.JSONEncoder):
+    """
+    Encodes the files/sessions/totals of `ReportData` as JSON.  The objects built
+    from the database are tagged with their type so that `decode_report_data`
+    rebuilds the same objects (the legacy `commit.report` data is JSON already).
+    """
+
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return {"__decimal__": str(o)}
+        if isinstance(o, SessionType):
+            return {"__session_type__": o.value}
+        if isinstance(o, ReportTotals):
+            return {"__totals__": [getattr(o, f.name) for f in fields(o)]}
+        if isinstance(o, ReportFileSummary):
+            return {"__file__": {f.name: getattr(o, f.name) for f in fields(o)}}
+        if isinstance(o, Session):
+            session = {name: getattr(o, name, None) for name in SESSION_FIELDS}
+            if callable(session["time"]):
+                session["time"] = session["time"]()
+            return {"__session__": session}
+        return super().default(o)
+
+
+def _decode_report_value(obj: dict):
+    if len(obj) == 1:
+        [(tag, value)] = obj.items()
+        if tag == "__decimal__":
+            return Decimal(value)
+        if tag == "__session_type__":
+            return SessionType(value)
+        if tag == "__totals__":
+            return ReportTotals(*value)
+        if tag == "__file__":
+            return ReportFileSummary(**value)
+        if tag == "__session__":
+            return Session(**value)
+    return obj
+
+
+def encode_report_data(report_data: ReportData) -> str:
+    return json.dumps(
+        [report_data.files, report_data.sessions, report_data.totals],
+        cls=ReportDataEncoder,
+    )
+
+
+def decode_report_data(chunks: str, serialized: str) -> ReportData:
+    files, sessions, totals = json.loads(serialized, object_hook=_decode_report_value)
+    # JSON object keys are strings
+    sessions = {int(sid): session for sid, session in sessions.items()}
+    return ReportData(chunks=chunks, files=files, sessions=sessions, totals=totals)
+
+
+class ReportDataCache:
+    """
+    Two-tier cache of `ReportData` keyed by commit and report version.
+
+    The first tier is a process-local LRU bounded by the size (in bytes) of the
+    cached entries.  The second tier is Redis, where entries are stored
+    compressed so that they can be shared across workers.  Entries never need
+    to be explicitly invalidated since their keys change whenever the worker
+    processes a new upload for the commit (see `report_data_cache_key`).
+
+    Reports are mutable (ex. `apply_diff`) so we never hand out cached objects
+    directly - the files/sessions/totals are stored as JSON (never pickled, redis
+    contents aren't trusted) and each hit decodes a fresh copy.  Chunks are
+    immutable strings and can be shared as-is.
+    """
+
+    redis_key_prefix = "report_data_json"
+
+    def __init__(self, max_bytes: int, redis_ttl: int, redis_max_bytes: int):
+        self.local = LRUCache(
+            max_size=max_bytes,
+            sizeof=lambda entry: len(entry[0]) + len(entry[1]),
+            on_evict=lambda key: REPORT_CACHE_EVICTIONS.inc(),
+        )
+        self.redis_ttl = redis_ttl
+        self.redis_max_bytes = redis_max_bytes
+
+    def get(self, key: str) -> Optional[ReportData]:
+        entry = self.local.get(key)
+        if entry is not None:
+            REPORT_CACHE_HITS.labels(tier="local").inc()
+            return self._load(entry)
+
+        try:
+            compressed = get_redis_connection().get(f"{self.redis_key_prefix}/{key}")
+        except RedisError:
+            log.warning("Unable to read report data from redis", exc_info=True)
+            compressed = None
+
+        if compressed is not None:
+            try:
+                entry = self._decompress(compressed)
+                report_data = self._load(entry)
+            except (zlib.error, ValueError):
+                log.warning("Unable to decode report data from redis", exc_info=True)
+            else:
+                REPORT_CACHE_HITS.labels(tier="redis").inc()
+                self.local.set(key, entry)
+                return report_data
+
+        REPORT_CACHE_MISSES.inc()
+        return None
+
+    def contains(self, key: str) -> bool:
+        if key in self.local:
+            return True
+        try:
+            return bool(get_redis_connection().exists(f"{self.redis_key_prefix}/{key}"))
+        except RedisError:
+            log.warning("Unable to read report data from redis", exc_info=True)
+            return False
+
+    def set(self, key: str, report_data: ReportData):
+        entry = (report_data.chunks, encode_report_data(report_data))
+        self.local.set(key, entry)
+
+        compressed = self._compress(entry)
+        if len(compressed) > self.redis_max_bytes:
+            return
+        try:
+            get_redis_connection().set(
+                f"{self.redis_key_prefix}/{key}", compressed, ex=self.redis_ttl
+            )
+        except RedisError:
+            log.warning("Unable to write report data to redis", exc_info=True)
+
+    def clear(self):
+        self.local.clear()
+
+    def _load(self, entry) -> ReportData:
+        chunks, serialized = entry
+        return decode_report_data(chunks, serialized)
+
+    # JSON never contains a raw NUL byte so it can separate the two parts
+    def _compress(self, entry) -> bytes:
+        chunks, serialized = entry
+        return zlib.compress(serialized.encode() + b"\0" + chunks.encode())
+
+    def _decompress(self, compressed: bytes):
+        serialized, chunks = zlib.decompress(compressed).split(b"\0", 1)
+        return chunks.decode(), serialized.decode()
+
+
+report_data_cache = ReportDataCache(
+    max_bytes=settings.REPORT_CACHE_MAX_BYTES,
+    redis_ttl=settings.REPORT_CACHE_REDIS_TTL,
+    redis_max_bytes=settings.REPORT_CACHE_REDIS_MAX_BYTES,
+)
+
+
+def report_data_cache_key(commit: Commit) -> str:
+    """
+    The worker bumps `ReportDetails.updated_at` (and the commit's `updatestamp`)
+    every time it processes an upload, so including them in the key means a
+    newly completed upload always results in a cache miss.
+    """
+    details_updated_at = ReportDetails.objects.filter(report__commit=commit).aggregate(
+        updated_at=Max("updated_at")
+    )["updated_at"]
+    return "/".join(
+        (
+            str(commit.repository_id),
+            commit.commitid,
+            commit.updatestamp.isoformat() if commit.updatestamp else "",
+            details_updated_at.isoformat() if details_updated_at else "",
+        )
+    )
+
+
+def prefetch_report_chunks(commit: Commit) -> "Optional[Future[str]]":
+    """
+    Starts downloading the chunks of the commit in the background, to be passed
+    to `build_report_from_commit` later on.  Returns `None` when the report data
+    is already cached and the chunks won't be needed.
+    """
+    if settings.REPORT_CACHE_ENABLED and report_data_cache.contains(
+        report_data_cache_key(commit)
+    ):
+        return None
+    return ArchiveService(commit.repository).read_chunks_in_background(commit.commitid)
+
+
 @sentry_sdk.trace
-def build_report_from_commit(commit: Commit, report_class=None):
+def build_report_from_commit(
+    commit: Commit, report_class=None, chunks_future: "Optional[Future[str]]" = None
+):
     """
     Builds a `shared.reports.resources.Report` from a given commit.
 
-    Chunks are fetched from archive storage and the rest of the data is sourced
-    from various `reports_*` tables in the database.
+    Chunks are fetched from archive storage (unless a download was already started
+    with `prefetch_report_chunks` and is passed as `chunks_future`) and the rest of
+    the data is sourced from various `reports_*` tables in the database.
+    """
+    cache_key = None
+    report_data = None
+    if settings.REPORT_CACHE_ENABLED:
+        cache_key = report_data_cache_key(commit)
+        report_data = report_data_cache.get(cache_key)
+
+    if report_data is None:
+        report_data = fetch_report_data(commit, chunks_future=chunks_future)
+        if report_data is None:
+            return None
+        if cache_key is not None:
+            report_data_cache.set(cache_key, report_data)
+
+    return build_report(
+        report_data.chunks,
+        report_data.files,
+        report_data.sessions,
+        report_data.totals,
+        report_class=report_class,
+    )
+
+
+@sentry_sdk.trace
+def build_file_report_from_commit(commit: Commit, path: str, report_class=None):
+    """
+    Builds a `shared.reports.resources.Report` from a given commit that only
+    needs to be able to answer for the file at `path`.
+
+    Unless the full report data is already cached, only the chunk for that one
+    file is read from archive storage (see `ArchiveService.read_chunk`) which
+    is drastically cheaper than reading the whole chunks file for large repos.
+    """
+    if settings.REPORT_CACHE_ENABLED:
+        report_data = report_data_cache.get(report_data_cache_key(commit))
+        if report_data is not None:
+            return build_report(
+                report_data.chunks,
+                report_data.files,
+                report_data.sessions,
+                report_data.totals,
+                report_class=report_class,
+            )
+
+    report_data = fetch_report_data(commit, file_path=path)
+    if report_data is None:
+        return None
+
+    return build_report(
+        report_data.chunks,
+        report_data.files,
+        report_data.sessions,
+        report_data.totals,
+        report_class=report_class,
+    )
+
+
+def fetch_report_data(
+    commit: Commit,
+    file_path: Optional[str] = None,
+    chunks_future: "Optional[Future[str]]" = None,
+) -> Optional[ReportData]:
+    """
+    Fetches the chunks, files, sessions and totals for the given commit.
+    Returns `None` if the commit has no report.
+
+    If `file_path` is given then only the chunk for that file is read and the
+    returned files only include that file.  If `chunks_future` is given then the
+    chunks are taken from that download instead.
     """
 
     # TODO: this can be removed once confirmed working well on prod
@@ -77,9 +400,15 @@ def build_report_from_commit(commit: Commit, report_class=None):
         or commit.repository_id in settings.REPORT_BUILDER_REPO_IDS
     )
 
+    archive_service = ArchiveService(commit.repository)
     with sentry_sdk.start_span(description="Fetch files/sessions/totals"):
         commit_report = fetch_commit_report(commit)
         if commit_report and new_report_builder_enabled:
+            if file_path is None and chunks_future is None:
+                # download the chunks while we're querying for the rest of the data
+                chunks_future = archive_service.read_chunks_in_background(
+                    commit.commitid
+                )
             files = build_files(commit_report)
             sessions = build_sessions(commit_report)
             try:
@@ -96,8 +425,14 @@ def build_report_from_commit(commit: Commit, report_class=None):
 
     try:
         with sentry_sdk.start_span(description="Fetch chunks"):
-            chunks = ArchiveService(commit.repository).read_chunks(commit.commitid)
-        return build_report(chunks, files, sessions, totals, report_class=report_class)
+            if chunks_future is not None:
+                chunks = chunks_future.result()
+            elif file_path is None:
+                chunks = archive_service.read_chunks(commit.commitid)
+            else:
+                files, chunks = read_file_chunk(
+                    archive_service, commit, files, file_path
+                )
     except FileNotInStorageError:
         log.warning(
             "File for chunks not found in storage",
@@ -108,6 +443,34 @@ def build_report_from_commit(commit: Commit, report_class=None):
         )
         return None
 
+    return ReportData(chunks=chunks, files=files, sessions=sessions, totals=totals)
+
+
+def read_file_chunk(
+    archive_service: ArchiveService, commit: Commit, files: dict, path: str
+) -> Tuple[dict, str]:
+    """
+    Reads the chunk for a single file and returns it along with a files dict
+    that only contains that file (re-indexed to point at the single chunk).
+    """
+    file_summary = files.get(path)
+    if file_summary is None:
+        return {}, ""
+
+    if isinstance(file_summary, list):
+        # legacy `commit.report` format
+        file_index = file_summary[0]
+        file_summary = [0, *file_summary[1:]]
+    else:
+        file_index = file_summary.file_index
+        file_summary = replace(file_summary, file_index=0)
+
+    chunk = archive_service.read_chunk(commit.commitid, file_index)
+    if chunk is None:
+        return {}, ""
+
+    return {path: file_summary}, chunk
+
 
 def fetch_commit_report(commit: Commit) -> Optional[CommitReport]:
     """
@@ -208,6 +571,172 @@ def build_sessions(commit_report: CommitReport) -> dict[int, Session]:
     return sessions
 
 
+def commit_flag_names(commit: Commit) -> List[str]:
+    """
+    Names of the flags uploaded for the given commit.  This is the same as the keys
+    of the built report's `flags` but only needs the `reports_*` tables.
+    """
+    commit_report = commit.commitreport
+    if commit_report is None:
+        report = commit.full_report
+        return list(report.flags.keys()) if report else []
+
+    return list(
+        RepositoryFlag.objects.filter(
+            reportsession__report=commit_report,
+            reportsession__state__in=["complete", "processed"],
+        )
+        .order_by("flag_name")
+        .values_list("flag_name", flat=True)
+        .distinct()
+    )
+
+
+def _flag_totals(report: Report) -> Dict[str, ReportTotals]:
+    return {
+        name: flag.totals
+        for name, flag in report.flags.items()
+        if flag.totals is not None and flag.totals.coverage is not None
+    }
+
+
+def _rolled_up_flag_totals(
+    commit_report: CommitReport,
+) -> Optional[Dict[str, ReportTotals]]:
+    """
+    The report's `FlagLevelTotals` rollup, or None if it was never rolled up or
+    was rolled up before its latest upload.
+    """
+    rolled_up_at = commit_report.flag_totals_rolled_up_at
+    if rolled_up_at is None:
+        return None
+
+    uploaded_at = commit_report.sessions.filter(
+        state__in=["complete", "processed"]
+    ).aggregate(updated_at=Max("updated_at"))["updated_at"]
+    if uploaded_at is not None and uploaded_at > rolled_up_at:
+        return None
+
+    return {
+        row.flag.flag_name: build_totals(row)
+        for row in FlagLevelTotals.objects.filter(report=commit_report).select_related(
+            "flag"
+        )
+    }
+
+
+def commit_flag_totals(commit: Commit) -> Dict[str, ReportTotals]:
+    """
+    Totals of each of the given commit's flags.
+
+    These are read from the `FlagLevelTotals` rollup.  The rollup is written here,
+    the first time the totals are requested after an upload: when the report was
+    never rolled up, or was rolled up before its latest upload, we build the report
+    and (re)write the rollup from it.  A report whose rollup is empty (no flags, or
+    no flag with coverage) is still marked as rolled up so that it isn't rebuilt on
+    every request.  Flags without any coverage are left out.
+
+    Rebuilds of the same report are serialized with a lock: concurrent requests
+    wait for the one holding it (up to `FLAG_TOTALS_ROLLUP_LOCK_TIMEOUT` seconds)
+    and then read its rollup.  If they time out they build the report themselves
+    but leave the rollup to the lock holder.
+    """
+    commit_report = commit.commitreport
+    if commit_report is None:
+        report = commit.full_report
+        if report is None:
+            return {}
+        return _flag_totals(report)
+
+    flag_totals = _rolled_up_flag_totals(commit_report)
+    if flag_totals is not None:
+        return flag_totals
+
+    try:
+        lock = redis_lock.Lock(
+            get_redis_connection(),
+            f"flag_totals_rollup/{commit_report.pk}/lock",
+            expire=60,
+        )
+        locked = lock.acquire(timeout=settings.FLAG_TOTALS_ROLLUP_LOCK_TIMEOUT)
+    except RedisError:
+        log.warning("Unable to lock the flag totals rollup", exc_info=True)
+        # the rebuilds can't be serialized but the rollup is still written
+        locked, write_rollup = False, True
+    else:
+        write_rollup = locked
+
+    try:
+        if locked:
+            # the request that held the lock may have rolled up the report meanwhile
+            commit_report.refresh_from_db(fields=["flag_totals_rolled_up_at"])
+            flag_totals = _rolled_up_flag_totals(commit_report)
+            if flag_totals is not None:
+                return flag_totals
+
+        # taken before the report is built so that an upload processed meanwhile
+        # makes the rollup stale
+        now = timezone.now()
+        report = commit.full_report
+        if report is None:
+            return {}
+        if not write_rollup:
+            # timed out waiting for the lock, the rollup is left to its holder
+            return _flag_totals(report)
+        return rollup_flag_totals(commit_report, report, rolled_up_at=now)
+    finally:
+        if locked:
+            try:
+                lock.release()
+            except (RedisError, redis_lock.NotAcquired):
+                pass
+
+
+def rollup_flag_totals(
+    commit_report: CommitReport, report: Report, rolled_up_at=None
+) -> Dict[str, ReportTotals]:
+    """
+    Writes the `FlagLevelTotals` of the given report's flags and marks the report
+    as rolled up at `rolled_up_at` (defaults to now).
+    """
+    repository_flags = {
+        flag.flag_name: flag
+        for flag in RepositoryFlag.objects.filter(
+            repository_id=commit_report.commit.repository_id,
+            flag_name__in=report.flags.keys(),
+        )
+    }
+
+    flag_totals = {}
+    for name, flag in report.flags.items():
+        totals = flag.totals
+        if totals is None or totals.coverage is None or name not in repository_flags:
+            continue
+        FlagLevelTotals.objects.update_or_create(
+            report=commit_report,
+            flag=repository_flags[name],
+            defaults=dict(
+                files=totals.files,
+                lines=totals.lines,
+                hits=totals.hits,
+                misses=totals.misses,
+                partials=totals.partials,
+                coverage=totals.coverage,
+                branches=totals.branches,
+                methods=totals.methods,
+            ),
+        )
+        flag_totals[name] = totals
+
+    FlagLevelTotals.objects.filter(report=commit_report).exclude(
+        flag__flag_name__in=flag_totals.keys()
+    ).delete()
+
+    commit_report.flag_totals_rolled_up_at = rolled_up_at or timezone.now()
+    commit_report.save(update_fields=["flag_totals_rolled_up_at"])
+    return flag_totals
+
+
 def build_files(commit_report: CommitReport) -> dict[str, ReportFileSummary]:
     """
     Construct a files dictionary in a format compatible with `shared.reports.resources.Report`
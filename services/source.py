@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import sys
+import zlib
+from array import array
+from collections.abc import Sequence
+from typing import Iterable, Optional
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from core.models import Repository
+from services.redis_configuration import get_redis_connection
+from services.repo_providers import RepoProviderService
+from utils.cache import LRUCache
+
+log = logging.getLogger(__name__)
+
+# characters `str.splitlines` breaks lines on ("\r\n" is a single line break)
+LINE_BREAKS = frozenset("\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029")
+
+# maximum number of concurrent requests to the provider when prefetching sources
+PREFETCH_CONCURRENCY = 8
+
+
+class SourceLines(Sequence):
+    """
+    The lines of a source file as returned by `content.splitlines()`.
+
+    The content is kept as a single string along with the offsets at which each
+    line starts and ends rather than as one string per line.
+    """
+
+    def __init__(self, content: str, starts: array, ends: array):
+        self.content = content
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def from_content(cls, content: str) -> "SourceLines":
+        starts, ends = array("L"), array("L")
+        position = 0
+        for line in content.splitlines(keepends=True):
+            end = position + len(line)
+            starts.append(position)
+            if line.endswith("\r\n"):
+                ends.append(end - 2)
+            elif line[-1] in LINE_BREAKS:
+                ends.append(end - 1)
+            else:
+                ends.append(end)
+            position = end
+        return cls(content, starts, ends)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        return self.content[self.starts[index] : self.ends[index]]
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            sys.getsizeof(self.content)
+            + self.starts.itemsize * len(self.starts)
+            + self.ends.itemsize * len(self.ends)
+        )
+
+
+class SourceCache:
+    """
+    Two-tier cache of `SourceLines` keyed by repository, commit sha and path.
+
+    The first tier is a process-local LRU bounded by the size (in bytes) of the
+    cached sources.  The second tier is Redis where only the content is stored,
+    compressed, so that it can be shared across workers; the line offsets are
+    rebuilt when it's loaded.  The source of a file at a given commit sha cannot
+    change so entries never need to be invalidated.
+    """
+
+    redis_key_prefix = "source_content"
+
+    def __init__(self, max_bytes: int, redis_ttl: int, redis_max_bytes: int):
+        self.local = LRUCache(max_size=max_bytes, sizeof=lambda lines: lines.nbytes)
+        self.redis_ttl = redis_ttl
+        self.redis_max_bytes = redis_max_bytes
+
+    def get(self, key: str) -> Optional[SourceLines]:
+        lines = self.local.get(key)
+        if lines is not None:
+            return lines
+
+        try:
+            compressed = get_redis_connection().get(f"{self.redis_key_prefix}/{key}")
+        except RedisError:
+            log.warning("Unable to read source from redis", exc_info=True)
+            compressed = None
+
+        if compressed is not None:
+            try:
+                content = zlib.decompress(compressed).decode("utf-8", "surrogatepass")
+            except (zlib.error, UnicodeDecodeError):
+                log.warning("Unable to decode source from redis", exc_info=True)
+                return None
+            lines = SourceLines.from_content(content)
+            self.local.set(key, lines)
+            return lines
+
+    def set(self, key: str, lines: SourceLines):
+        self.local.set(key, lines)
+
+        compressed = zlib.compress(lines.content.encode("utf-8", "surrogatepass"))
+        if len(compressed) > self.redis_max_bytes:
+            return
+        try:
+            get_redis_connection().set(
+                f"{self.redis_key_prefix}/{key}", compressed, ex=self.redis_ttl
+            )
+        except RedisError:
+            log.warning("Unable to write source to redis", exc_info=True)
+
+    def clear(self):
+        self.local.clear()
+
+
+source_cache = SourceCache(
+    max_bytes=settings.SOURCE_CACHE_MAX_BYTES,
+    redis_ttl=settings.SOURCE_CACHE_REDIS_TTL,
+    redis_max_bytes=settings.SOURCE_CACHE_REDIS_MAX_BYTES,
+)
+
+
+def source_cache_key(repository: Repository, commitid: str, path: str) -> str:
+    return f"{repository.repoid}/{commitid}/{path}"
+
+
+async def _fetch_source_lines(adapter, commitid: str, path: str) -> SourceLines:
+    content = (await adapter.get_source(path, commitid))["content"]
+    # make sure the file is str utf-8
+    if type(content) is not str:
+        content = str(content, "utf-8")
+    return SourceLines.from_content(content)
+
+
+def get_source_lines(
+    owner, repository: Repository, commitid: str, path: str
+) -> SourceLines:
+    """
+    Returns the lines of the file at `path` in the given commit, only asking the
+    git provider for it when it isn't cached.
+    """
+    key = source_cache_key(repository, commitid, path)
+    if settings.SOURCE_CACHE_ENABLED:
+        lines = source_cache.get(key)
+        if lines is not None:
+            return lines
+
+    adapter = RepoProviderService().get_adapter(owner=owner, repo=repository)
+    lines = async_to_sync(_fetch_source_lines)(adapter, commitid, path)
+    if settings.SOURCE_CACHE_ENABLED:
+        source_cache.set(key, lines)
+    return lines
+
+
+def prefetch_sources(
+    owner, repository: Repository, commitid: str, paths: Iterable[str]
+):
+    """
+    Concurrently fetches the files at `paths` that aren't cached yet so that the
+    following `get_source_lines` calls are cache hits.  Failures are ignored: the
+    `get_source_lines` call for that path will fetch it again and raise.
+    """
+    if not settings.SOURCE_CACHE_ENABLED:
+        return
+
+    missing = [
+        path
+        for path in dict.fromkeys(paths)
+        if source_cache.get(source_cache_key(repository, commitid, path)) is None
+    ]
+    if not missing:
+        return
+
+    adapter = RepoProviderService().get_adapter(owner=owner, repo=repository)
+
+    async def runnable():
+        semaphore = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+
+        async def fetch(path):
+            async with semaphore:
+                return await _fetch_source_lines(adapter, commitid, path)
+
+        return await asyncio.gather(
+            *(fetch(path) for path in missing), return_exceptions=True
+        )
+
+    for path, lines in zip(missing, async_to_sync(runnable)()):
+        if isinstance(lines, Exception):
+            log.info(
+                "Unable to prefetch source",
+                extra=dict(commitid=commitid, path=path, error=lines),
+            )
+            continue
+        source_cache.set(source_cache_key(repository, commitid, path), lines)
@@ -1,7 +1,7 @@
 import logging
 import os
 from datetime import datetime, timedelta
-from typing import Iterable, List
+from typing import Iterable, List, Optional
 
 import celery
 import sentry_sdk
@@ -12,6 +12,7 @@ from sentry_sdk import set_tag
 from sentry_sdk.integrations.celery import _wrap_apply_async
 from shared import celery_config
 
+from codecov_auth.models import Owner
 from core.models import Repository
 from services.task.task_router import route_task
 from timeseries.models import Dataset
@@ -34,11 +35,24 @@ if settings.SENTRY_ENV:
 
 
 class TaskService(object):
-    def _create_signature(self, name, args=None, kwargs=None, immutable=False):
+    def _create_signature(
+        self,
+        name,
+        args=None,
+        kwargs=None,
+        immutable=False,
+        owner: Optional[Owner] = None,
+        repoid: Optional[int] = None,
+    ):
         """
         Create Celery signature
+
+        `owner` and `repoid` are passed along to `route_task` so that callers
+        that already have them don't need to query the plan to route the task.
         """
-        queue_and_config = route_task(name, args=args, kwargs=kwargs)
+        queue_and_config = route_task(
+            name, args=args, kwargs=kwargs, owner=owner, repoid=repoid
+        )
         queue_name = queue_and_config["queue"]
         extra_config = queue_and_config.get("extra_config", {})
         celery_compatible_config = {
@@ -64,13 +78,16 @@ class TaskService(object):
             kwargs=kwargs,
         ).apply_async(**apply_async_kwargs)
 
-    def compute_comparison(self, comparison_id):
+    def compute_comparison(self, comparison_id, repoid: Optional[int] = None):
         self._create_signature(
             celery_config.compute_comparison_task_name,
             kwargs=dict(comparison_id=comparison_id),
+            repoid=repoid,
         ).apply_async()
 
-    def compute_comparisons(self, comparison_ids: List[int]):
+    def compute_comparisons(
+        self, comparison_ids: List[int], repoid: Optional[int] = None
+    ):
         """
         Enqueue a batch of comparison tasks using a Celery group
         """
@@ -79,6 +96,7 @@ class TaskService(object):
                 celery_config.compute_comparison_task_name,
                 args=None,
                 kwargs=dict(comparison_id=comparison_ids[0]),
+                repoid=repoid,
             )
             celery_compatible_config = {
                 "queue": queue_and_config["queue"],
@@ -138,6 +156,7 @@ class TaskService(object):
         debug=False,
         rebuild=False,
         immutable=False,
+        owner: Optional[Owner] = None,
     ):
         return self._create_signature(
             "app.tasks.upload.Upload",
@@ -149,6 +168,7 @@ class TaskService(object):
                 rebuild=rebuild,
             ),
             immutable=immutable,
+            owner=owner,
         )
 
     def upload(
@@ -159,9 +179,15 @@ class TaskService(object):
         countdown=0,
         debug=False,
         rebuild=False,
+        owner: Optional[Owner] = None,
     ):
         return self.upload_signature(
-            repoid, commitid, report_code=report_code, debug=debug, rebuild=rebuild
+            repoid,
+            commitid,
+            report_code=report_code,
+            debug=debug,
+            rebuild=rebuild,
+            owner=owner,
         ).apply_async(countdown=countdown)
 
     def notify_signature(self, repoid, commitid, current_yaml=None, empty_upload=None):
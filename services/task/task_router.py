@@ -1,4 +1,7 @@
+from typing import Optional
+
 import shared.celery_config as shared_celery_config
+from django.conf import settings
 from shared.billing import BillingPlan
 from shared.celery_router import route_tasks_based_on_user_plan
 
@@ -8,22 +11,58 @@ from core.models import Repository
 from labelanalysis.models import LabelAnalysisRequest
 from profiling.models import ProfilingCommit, ProfilingUpload
 from staticanalysis.models import StaticAnalysisSuite
+from utils.cache import LRUCache
 
+# Plans keyed by `("owner", ownerid)` and `("repo", repoid)` so that routing the
+# tasks we enqueue doesn't query the owner every time.  Plan changes are picked
+# up once the entry expires: until then tasks keep going to the previous queue.
+plan_cache = LRUCache(
+    max_size=settings.TASK_ROUTING_PLAN_CACHE_SIZE,
+    ttl=settings.TASK_ROUTING_PLAN_CACHE_TTL,
+)
 
-def _get_user_plan_from_ownerid(ownerid, *args, **kwargs) -> str:
+
+def _cached_plan(key, lookup) -> str:
+    if not settings.TASK_ROUTING_PLAN_CACHE_ENABLED:
+        return lookup()
+
+    plan = plan_cache.get(key)
+    if plan is None:
+        plan = lookup()
+        plan_cache.set(key, plan)
+    return plan
+
+
+def _lookup_user_plan_from_ownerid(ownerid) -> str:
     owner = Owner.objects.filter(ownerid=ownerid).first()
     if owner:
         return owner.plan
     return BillingPlan.users_basic.db_name
 
 
-def _get_user_plan_from_repoid(repoid, *args, **kwargs) -> str:
-    repo = Repository.objects.filter(repoid=repoid).first()
+def _lookup_user_plan_from_repoid(repoid) -> str:
+    repo = Repository.objects.filter(repoid=repoid).select_related("author").first()
     if repo and repo.author:
         return repo.author.plan
     return BillingPlan.users_basic.db_name
 
 
+def _get_user_plan_from_ownerid(ownerid, *args, **kwargs) -> str:
+    return _cached_plan(
+        ("owner", ownerid), lambda: _lookup_user_plan_from_ownerid(ownerid)
+    )
+
+
+def _get_user_plan_from_repoid(repoid, *args, **kwargs) -> str:
+    return _cached_plan(("repo", repoid), lambda: _lookup_user_plan_from_repoid(repoid))
+
+
+def _get_user_plan_from_owner(owner: Owner) -> str:
+    if settings.TASK_ROUTING_PLAN_CACHE_ENABLED:
+        plan_cache.set(("owner", owner.ownerid), owner.plan)
+    return owner.plan
+
+
 def _get_user_plan_from_profiling_commit(profiling_id, *args, **kwargs) -> str:
     profiling_commit = ProfilingCommit.objects.filter(id=profiling_id).first()
     if (
@@ -124,9 +163,27 @@ def _get_user_plan_from_task(task_name: str, task_kwargs: dict) -> str:
     return func_to_use(**task_kwargs)
 
 
-def route_task(name, args, kwargs, options={}, task=None, **kw):
+def route_task(
+    name,
+    args,
+    kwargs,
+    options={},
+    task=None,
+    owner: Optional[Owner] = None,
+    repoid: Optional[int] = None,
+    **kw,
+):
     """Function to dynamically route tasks to the proper queue.
     Docs: https://docs.celeryq.dev/en/stable/userguide/routing.html#routers
+
+    Callers that already have the owner the task is routed by (or the id of its
+    repository) can pass it as `owner` (or `repoid`) so that the plan isn't
+    looked up from the task kwargs.
     """
-    user_plan = _get_user_plan_from_task(name, kwargs)
+    if owner is not None:
+        user_plan = _get_user_plan_from_owner(owner)
+    elif repoid is not None:
+        user_plan = _get_user_plan_from_repoid(repoid)
+    else:
+        user_plan = _get_user_plan_from_task(name, kwargs)
     return route_tasks_based_on_user_plan(name, user_plan)
@@ -1,13 +1,13 @@
 import json
 from pathlib import Path
 from time import time
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from django.test import TestCase
 from shared.storage import MinioStorageService
 
 from core.tests.factories import RepositoryFactory
-from services.archive import ArchiveService
+from services.archive import ArchiveService, chunk_offsets
 
 current_file = Path(__file__)
 
@@ -20,6 +20,25 @@ class ArchiveServiceTests(TestCase):
         service = ArchiveService(repo)
         assert service.create_raw_upload_presigned_put("ABCD") == "presigned url"
 
+    @patch("services.storage.StorageService.create_presigned_put")
+    def test_create_presigned_puts(self, create_presigned_put_mock):
+        create_presigned_put_mock.side_effect = lambda bucket, path, ttl: f"url/{path}"
+        repo = RepositoryFactory.create()
+        service = ArchiveService(repo)
+        assert service.create_presigned_puts(["a", "b", "a"]) == {
+            "a": "url/a",
+            "b": "url/b",
+        }
+        assert create_presigned_put_mock.call_count == 2
+
+    @patch("services.archive.ArchiveService.read_chunks")
+    def test_read_chunks_in_background(self, read_chunks_mock):
+        read_chunks_mock.return_value = "chunks"
+        repo = RepositoryFactory.create()
+        service = ArchiveService(repo)
+        assert service.read_chunks_in_background("abc123").result() == "chunks"
+        read_chunks_mock.assert_called_once_with("abc123")
+
 
 class TestWriteData(object):
     def test_write_report_details_to_storage(self, mocker, db):
@@ -117,3 +136,91 @@ class TestWriteData(object):
             gzipped=False,
             reduced_redundancy=False,
         )
+
+
+def test_chunk_offsets():
+    data = b"a\n<<<<< end_of_chunk >>>>>\nbb\n<<<<< end_of_chunk >>>>>\n\n<<<<< end_of_chunk >>>>>\nccc"
+    for block_size in [1, 5, 1000]:
+        blocks = [data[i : i + block_size] for i in range(0, len(data), block_size)]
+        offsets = chunk_offsets(blocks)
+        assert [data[start:end] for start, end in offsets] == [b"a", b"bb", b"", b"ccc"]
+
+
+def test_chunk_offsets_with_header():
+    data = b'{"labels_index": {}}\n<<<<< end_of_header >>>>>\na\n<<<<< end_of_chunk >>>>>\nbb'
+    for block_size in [1, 7, 1000]:
+        blocks = [data[i : i + block_size] for i in range(0, len(data), block_size)]
+        offsets = chunk_offsets(blocks)
+        assert [data[start:end] for start, end in offsets] == [b"a", b"bb"]
+
+
+class TestReadChunk(object):
+    def _mock_minio(self, mocker, data, index=None, etag="etag"):
+        minio_client = MagicMock()
+        minio_client.stat_object.return_value = MagicMock(etag=etag, metadata={})
+
+        def get_object(bucket, path, offset=0, length=0):
+            response = MagicMock()
+            content = data[offset : offset + length] if length else data
+            response.read.return_value = content
+            response.stream.return_value = [content]
+            return response
+
+        minio_client.get_object.side_effect = get_object
+        mocker.patch("services.storage.MINIO_CLIENT", minio_client)
+        mocker.patch.object(
+            ArchiveService,
+            "_read_chunks_index",
+            return_value=index,
+        )
+        mock_write_file = mocker.patch.object(ArchiveService, "write_file")
+        return minio_client, mock_write_file
+
+    def test_read_chunk_builds_index(self, mocker, db):
+        repo = RepositoryFactory()
+        chunks = (current_file.parent / "samples" / "chunks.txt").read_bytes()
+        minio_client, mock_write_file = self._mock_minio(mocker, chunks)
+
+        archive_service = ArchiveService(repository=repo)
+        chunk = archive_service.read_chunk("abc123", 1)
+        assert chunk == chunks.decode().split("\n<<<<< end_of_chunk >>>>>\n")[1]
+
+        index_path, index_data = mock_write_file.call_args[0]
+        assert (
+            index_path
+            == f"v4/repos/{archive_service.storage_hash}/commits/abc123/chunks_index.json"
+        )
+        assert json.loads(index_data)["etag"] == "etag"
+        assert len(json.loads(index_data)["offsets"]) == 3
+
+    def test_read_chunk_uses_index(self, mocker, db):
+        repo = RepositoryFactory()
+        data = b"a\n<<<<< end_of_chunk >>>>>\nbb"
+        minio_client, mock_write_file = self._mock_minio(
+            mocker, data, index=[(0, 1), (27, 29)]
+        )
+
+        archive_service = ArchiveService(repository=repo)
+        assert archive_service.read_chunk("abc123", 1) == "bb"
+        assert archive_service.read_chunk("abc123", 2) is None
+        assert not mock_write_file.called
+        minio_client.get_object.assert_called_once_with(
+            archive_service.root,
+            f"v4/repos/{archive_service.storage_hash}/commits/abc123/chunks.txt",
+            offset=27,
+            length=2,
+        )
+
+    def test_read_chunk_gzipped_with_header(self, mocker, db):
+        repo = RepositoryFactory()
+        data = '{"labels_index": {}}\n<<<<< end_of_header >>>>>\na\n<<<<< end_of_chunk >>>>>\nbb'
+        minio_client, mock_write_file = self._mock_minio(mocker, data.encode())
+        minio_client.stat_object.return_value.metadata = {"Content-Encoding": "gzip"}
+        mocker.patch.object(ArchiveService, "read_file", return_value=data)
+
+        archive_service = ArchiveService(repository=repo)
+        assert archive_service.read_chunk("abc123", 0) == "a"
+        assert archive_service.read_chunk("abc123", 1) == "bb"
+        assert archive_service.read_chunk("abc123", 2) is None
+        assert not minio_client.get_object.called
+        assert not mock_write_file.called
@@ -1,14 +1,18 @@
 import asyncio
+import dataclasses
 import enum
 import json
+import threading
 from collections import Counter
 from datetime import datetime
-from unittest.mock import PropertyMock, patch
+from unittest.mock import MagicMock, PropertyMock, call, patch
 
+import fakeredis
 import minio
 import pytest
 import pytz
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from redis.exceptions import RedisError
 from shared.reports.resources import ReportFile
 from shared.reports.types import ReportTotals
 from shared.utils.merge import LineType
@@ -29,9 +33,14 @@ from services.comparison import (
     FileComparison,
     FileComparisonTraverseManager,
     ImpactedFile,
+    ImpactedFileSummary,
     LineComparison,
     MissingComparisonReport,
     PullRequestComparison,
+    compare_cache_key,
+    encode_indexed_comparison,
+    get_git_comparisons,
+    summarize_impacted_files,
 )
 from services.report import SerializableReport
 
@@ -1335,6 +1344,140 @@ class ComparisonHasUnmergedBaseCommitsTests(TestCase):
         assert self.comparison.has_unmerged_base_commits is False
 
 
+@patch("services.report.prefetch_report_chunks")
+@patch("services.report.build_report_from_commit")
+@patch("services.repo_providers.RepoProviderService.get_adapter")
+class ComparisonPrefetchTests(TestCase):
+    def setUp(self):
+        owner = OwnerFactory()
+        repository = RepositoryFactory(author=owner)
+        self.base = CommitFactory(repository=repository)
+        self.head = CommitFactory(repository=repository)
+        self.comparison = Comparison(
+            user=owner, base_commit=self.base, head_commit=self.head
+        )
+        asyncio.set_event_loop(asyncio.new_event_loop())
+
+    def test_prefetch_overlaps_reports_and_git_comparison(
+        self, get_adapter_mock, build_report_mock, prefetch_chunks_mock
+    ):
+        compare_started = threading.Event()
+
+        class Adapter:
+            async def get_compare(self, base, head):
+                compare_started.set()
+                return {"diff": {"files": {}}, "commits": [base, head]}
+
+        def build_report(commit, chunks_future=None):
+            if commit == self.base:
+                # the provider is called while the base report is being built
+                assert compare_started.wait(timeout=5)
+            return MagicMock()
+
+        get_adapter_mock.return_value = Adapter()
+        build_report_mock.side_effect = build_report
+        prefetch_chunks_mock.side_effect = lambda commit: f"chunks {commit.commitid}"
+
+        self.comparison.prefetch()
+
+        assert build_report_mock.call_args_list == [
+            call(self.base, chunks_future=f"chunks {self.base.commitid}"),
+            call(self.head, chunks_future=f"chunks {self.head.commitid}"),
+        ]
+        self.comparison.head_report.apply_diff.assert_called_once_with({"files": {}})
+        assert self.comparison.git_commits == [self.base.commitid, self.head.commitid]
+
+        # everything was fetched already
+        self.comparison.validate()
+        assert build_report_mock.call_count == 2
+
+    def test_prefetch_leaves_errors_to_consumers(
+        self, get_adapter_mock, build_report_mock, prefetch_chunks_mock
+    ):
+        class Adapter:
+            async def get_compare(self, base, head):
+                return {"diff": {"files": {}}, "commits": []}
+
+        get_adapter_mock.return_value = Adapter()
+        prefetch_chunks_mock.return_value = None
+        build_report_mock.side_effect = minio.error.S3Error(
+            code="NoSuchKey",
+            message=None,
+            resource=None,
+            request_id=None,
+            host_id=None,
+            response=None,
+        )
+
+        self.comparison.prefetch()
+        with self.assertRaises(MissingComparisonReport):
+            self.comparison.validate()
+
+        # the prefetch isn't attempted again
+        with self.assertRaises(MissingComparisonReport):
+            self.comparison.validate()
+        assert prefetch_chunks_mock.call_count == 2
+
+
+@override_settings(COMPARE_CACHE_ENABLED=True, COMPARE_CACHE_TTL=60)
+@patch("services.repo_providers.RepoProviderService.get_adapter")
+class GitComparisonsCacheTests(TestCase):
+    class MockCompareAdapter:
+        def __init__(self):
+            self.calls = []
+
+        async def get_compare(self, base, head):
+            self.calls.append((base, head))
+            return {"diff": {"files": {}}, "commits": [{"commitid": head}]}
+
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        patcher = patch(
+            "services.comparison.get_redis_connection", return_value=self.redis
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        owner = OwnerFactory()
+        self.repository = RepositoryFactory(author=owner)
+        base = CommitFactory(repository=self.repository)
+        head = CommitFactory(repository=self.repository)
+        self.pairs = [(base.commitid, head.commitid), (head.commitid, base.commitid)]
+        self.owner = owner
+        asyncio.set_event_loop(asyncio.new_event_loop())
+
+    def test_comparisons_are_fetched_once(self, get_adapter_mock):
+        adapter = GitComparisonsCacheTests.MockCompareAdapter()
+        get_adapter_mock.return_value = adapter
+
+        first = get_git_comparisons(self.owner, self.repository, self.pairs)
+        second = get_git_comparisons(self.owner, self.repository, self.pairs)
+
+        assert first == second
+        assert second[0]["commits"] == [{"commitid": self.pairs[0][1]}]
+        assert second[1]["commits"] == [{"commitid": self.pairs[1][1]}]
+        assert adapter.calls == self.pairs
+        key = compare_cache_key(self.repository, *self.pairs[0])
+        assert 0 < self.redis.ttl(key) <= 60
+
+    def test_only_missing_comparisons_are_fetched(self, get_adapter_mock):
+        adapter = GitComparisonsCacheTests.MockCompareAdapter()
+        get_adapter_mock.return_value = adapter
+
+        get_git_comparisons(self.owner, self.repository, self.pairs[:1])
+        get_git_comparisons(self.owner, self.repository, self.pairs)
+        assert adapter.calls == self.pairs
+
+    def test_redis_errors_fall_back_to_provider(self, get_adapter_mock):
+        adapter = GitComparisonsCacheTests.MockCompareAdapter()
+        get_adapter_mock.return_value = adapter
+
+        with patch.object(self.redis, "mget", side_effect=RedisError):
+            comparisons = get_git_comparisons(self.owner, self.repository, self.pairs)
+        assert len(comparisons) == 2
+        assert adapter.calls == self.pairs
+
+
 class SegmentTests(TestCase):
     def _report_lines(self, hits):
         return [
@@ -1832,6 +1975,127 @@ class ComparisonReportTest(TestCase):
         )
         assert file.has_changes is True
 
+    def test_summarize_impacted_files(self):
+        files = [
+            {
+                "added_diff_coverage": [[9, "h"], [10, "m"], [13, "p"], [14, "m"]],
+                "removed_diff_coverage": [[3, "h"]],
+                "unexpected_line_changes": [
+                    [[1, "h"], [1, "m"]],
+                    [[2, "m"], [2, "h"]],
+                ],
+            },
+            {
+                "added_diff_coverage": None,
+                "removed_diff_coverage": [],
+                "unexpected_line_changes": [],
+            },
+            {"added_diff_coverage": [[1, None]]},
+        ]
+        assert summarize_impacted_files(files) == [
+            ImpactedFileSummary(
+                added_lines=4,
+                removed_lines=1,
+                patch_hits=1,
+                patch_misses=2,
+                patch_partials=1,
+                unexpected_changes=2,
+                unexpected_misses=1,
+            ),
+            ImpactedFileSummary(0, 0, 0, 0, 0, 0, 0),
+            ImpactedFileSummary(1, 0, 0, 0, 0, 0, 0),
+        ]
+
+    @patch("services.archive.ArchiveService.read_file")
+    def test_summarized_impacted_files_match_line_coverage(self, read_file):
+        read_file.return_value = mocked_files_with_direct_and_indirect_changes
+        files = self.comparison_report.impacted_files
+        assert all(file.summary is not None for file in files)
+
+        for file in files:
+            unsummarized = dataclasses.replace(file, summary=None)
+            assert file.has_diff == bool(unsummarized.has_diff)
+            assert file.has_changes == unsummarized.has_changes
+            assert file.misses_count == unsummarized.misses_count
+            assert file.patch_coverage == unsummarized.patch_coverage
+
+
+class IndexedComparisonReportTest(TestCase):
+    def setUp(self):
+        commit = CommitFactory()
+        self.json_report = ComparisonReport(
+            CommitComparisonFactory(
+                compare_commit=commit, report_storage_path="v4/test.json"
+            )
+        )
+        self.indexed_report = ComparisonReport(
+            CommitComparisonFactory(
+                compare_commit=commit, report_storage_path="v4/test.idx"
+            )
+        )
+        self.data = encode_indexed_comparison(
+            json.loads(mocked_files_with_direct_and_indirect_changes)
+        )
+
+        self.ranges = []
+
+        def read_file_range(path, offset, length):
+            self.ranges.append((offset, length))
+            return self.data[offset : offset + length]
+
+        patcher = patch(
+            "services.archive.ArchiveService.read_file_range",
+            side_effect=read_file_range,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch("services.archive.ArchiveService.read_file")
+    def test_files_match_json_format(self, read_file):
+        read_file.return_value = mocked_files_with_direct_and_indirect_changes
+
+        indexed_files = self.indexed_report.files
+        assert [file.head_name for file in indexed_files] == [
+            file.head_name for file in self.json_report.files
+        ]
+        for indexed_file, json_file in zip(indexed_files, self.json_report.files):
+            assert indexed_file.summary == json_file.summary
+            assert indexed_file.has_diff == json_file.has_diff
+            assert indexed_file.has_changes == json_file.has_changes
+            assert indexed_file.misses_count == json_file.misses_count
+            assert indexed_file.patch_coverage == json_file.patch_coverage
+            # list views never decode line data
+            assert indexed_file.added_diff_coverage is None
+
+        assert [
+            file.head_name
+            for file in self.indexed_report.impacted_files_with_direct_changes
+        ] == ["fileA", "fileB", "fileD"]
+        # the whole index fits in the first read
+        assert len(self.ranges) == 1
+
+    @patch("services.archive.ArchiveService.read_file")
+    def test_impacted_file_reads_line_data(self, read_file):
+        read_file.return_value = mocked_files_with_direct_and_indirect_changes
+
+        impacted_file = self.indexed_report.impacted_file("fileB")
+        json_file = self.json_report.impacted_file("fileB")
+        assert impacted_file == json_file
+        assert impacted_file.summary == json_file.summary
+        assert self.indexed_report.impacted_file("unknown") is None
+
+    @patch("services.comparison.INDEXED_COMPARISON_HEADER_READ_SIZE", 32)
+    def test_header_larger_than_first_read(self):
+        impacted_file = self.indexed_report.impacted_file("fileB")
+        assert impacted_file.head_name == "fileB"
+        # the rest of the header then the file's line data
+        assert len(self.ranges) == 3
+        assert self.ranges[0] == (0, 32)
+
+    def test_not_indexed(self):
+        self.data = mocked_files_with_direct_and_indirect_changes.encode()
+        assert self.indexed_report.files == []
+
 
 class CommitComparisonTests(TestCase):
     def setUp(self):
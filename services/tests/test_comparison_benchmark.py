@@ -0,0 +1,88 @@
+import copy
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from services.comparison import (
+    CreateChangeSummaryVisitor,
+    CreateLineComparisonVisitor,
+    FileComparisonTraverseManager,
+)
+
+
+def make_diff(num_lines, hunk_every=10):
+    """
+    Builds the head source and diff segments of a file with `num_lines` lines,
+    with a hunk that removes, adds and keeps a line every `hunk_every` lines.
+    """
+    src = [f"line {i}" for i in range(1, num_lines + 1)]
+    segments = [
+        {
+            "header": [str(ln), "2", str(ln), "2"],
+            "lines": [f"-removed {ln}", f"+added {ln}", f" line {ln + 1}"],
+        }
+        for ln in range(1, num_lines - 1, hunk_every)
+    ]
+    return src, segments
+
+
+class FileComparisonTraverseManagerBenchmark(SimpleTestCase):
+    def _traverse(self, num_lines):
+        src, segments = make_diff(num_lines)
+        manager = FileComparisonTraverseManager(
+            head_file_eof=num_lines + 1,
+            base_file_eof=num_lines + 1,
+            segments=segments,
+            src=src,
+        )
+        visitors = [
+            CreateLineComparisonVisitor(base_file=None, head_file=None),
+            CreateChangeSummaryVisitor(base_file=None, head_file=None),
+        ]
+        manager.apply(visitors)
+        return visitors[0].lines
+
+    def _count_steps(self, num_lines):
+        """
+        Traverses a diff of `num_lines` lines counting the visitor calls, the
+        cursor checks and the `int()` hunk-header parses made along the way.  The
+        previous walker re-parsed the current hunk-header on every cursor check.
+        """
+        src, segments = make_diff(num_lines)
+        original_segments = copy.deepcopy(segments)
+        visitor_calls = []
+        traversing_diff = FileComparisonTraverseManager.traversing_diff
+        with patch(
+            "services.comparison.int", wraps=int, create=True
+        ) as int_mock, patch.object(
+            FileComparisonTraverseManager,
+            "traversing_diff",
+            autospec=True,
+            side_effect=traversing_diff,
+        ) as traversing_diff_mock:
+            manager = FileComparisonTraverseManager(
+                head_file_eof=num_lines + 1,
+                base_file_eof=num_lines + 1,
+                segments=segments,
+                src=src,
+            )
+            manager.apply([lambda *args: visitor_calls.append(args)])
+
+        # the segments are walked in place, never copied or consumed
+        assert segments == original_segments
+        return len(visitor_calls), traversing_diff_mock.call_count, int_mock.call_count
+
+    def test_traverses_every_line_of_a_10k_line_diff(self):
+        lines = self._traverse(10_000)
+        # every hunk contributes one removed line on top of the head file
+        assert len(lines) == 10_000 + len(make_diff(10_000)[1])
+
+    def test_traversal_steps_grow_linearly_with_diff_size(self):
+        for num_lines in (1_000, 10_000):
+            visited, cursor_checks, header_parses = self._count_steps(num_lines)
+            num_hunks = len(make_diff(num_lines)[1])
+            assert visited == num_lines + num_hunks
+            # a constant number of cursor checks per line, whatever the size
+            assert cursor_checks == 2 * visited
+            # each hunk-header is parsed once rather than on every cursor check
+            assert header_parses == 4 * num_hunks
@@ -13,6 +13,7 @@ from core.tests.factories import CommitFactory
 from services.path import (
     Dir,
     File,
+    PathTree,
     PrefixedPath,
     ReportPaths,
     dashboard_commit_file_url,
@@ -275,6 +276,67 @@ class TestReportPathsNested(TestCase):
         ]
 
 
+class TestPathTree(TestCase):
+    def setUp(self):
+        files = {
+            "dir/file1.py": file_data1,
+            "dir/subdir/file2.py": file_data2,
+            "dir/subdir/file3.py": file_data3,
+            "other.py": file_data1,
+        }
+        self.report = SerializableReport(files=files)
+        self.tree = PathTree(self.report.files, self.report.get_file_totals)
+
+    def test_find(self):
+        assert self.tree.find("").full_path == ""
+        assert self.tree.find(None).full_path == ""
+        assert self.tree.find("dir/subdir").full_path == "dir/subdir"
+        assert self.tree.find("dir/subdir/file2.py").is_file
+        assert self.tree.find("dir/sub") is None
+        assert self.tree.find("wrong") is None
+
+    def test_file_paths(self):
+        assert list(self.tree.file_paths(self.tree.find("dir"))) == [
+            "dir/file1.py",
+            "dir/subdir/file2.py",
+            "dir/subdir/file3.py",
+        ]
+
+    def test_totals(self):
+        totals = self.tree.totals(self.tree.find("dir"))
+        assert totals.lines == 30
+        assert totals.hits == 19
+        assert totals.misses == 6
+        assert totals.partials == 0
+
+        totals = self.tree.totals(self.tree.find(""))
+        assert totals.lines == 40
+        assert totals.hits == 27
+
+    def test_totals_are_memoized(self):
+        file_totals = MagicMock(side_effect=self.report.get_file_totals)
+        tree = PathTree(self.report.files, file_totals)
+        tree.totals(tree.find("dir"))
+        tree.totals(tree.find("dir"))
+        tree.totals(tree.find("dir/subdir"))
+        assert file_totals.call_count == 3
+
+    def test_report_paths_reuse_tree(self):
+        first = ReportPaths(self.report, path="dir")
+        second = ReportPaths(self.report, path="dir/subdir")
+        assert first.tree is second.tree
+        assert list(self.report._path_trees.keys()) == [()]
+
+    def test_single_directory_dir_totals(self):
+        report_paths = ReportPaths(self.report)
+        dir, other = report_paths.single_directory()
+        assert dir.full_path == "dir"
+        assert dir.lines == 30
+        assert dir.hits == 19
+        assert dir.coverage == 63.33333333333333
+        assert other == File(full_path="other.py", totals=totals1)
+
+
 class MockedProviderAdapter:
     async def list_files(self, *args, **kwargs):
         return []
@@ -2,17 +2,28 @@ from decimal import Decimal
 from pathlib import Path
 from unittest.mock import patch
 
-from django.test import TestCase
+import fakeredis
+import redis_lock
+from django.test import TestCase, override_settings
 from shared.reports.resources import Report, ReportFile, ReportLine
 from shared.storage.exceptions import FileNotInStorageError
 from shared.utils.sessions import Session
 
+from core.models import Commit
 from core.tests.factories import CommitFactory, CommitWithReportFactory
 from reports.tests.factories import UploadFactory, UploadFlagMembershipFactory
 from services.report import (
+    build_file_report_from_commit,
     build_report,
     build_report_from_commit,
+    commit_flag_names,
+    commit_flag_totals,
+    decode_report_data,
+    encode_report_data,
+    fetch_report_data,
     files_belonging_to_flags,
+    report_data_cache,
+    rollup_flag_totals,
 )
 
 current_file = Path(__file__)
@@ -354,6 +365,178 @@ class ReportServiceTest(TestCase):
             [1, 2, 1, 1, 0, "50.00000", 0, 0, 0, 0, 0, 0, 0],
         ]
 
+    @patch("services.archive.ArchiveService.read_chunks")
+    @patch("services.archive.ArchiveService.read_chunk")
+    def test_build_file_report_from_commit(self, read_chunk_mock, read_chunks_mock):
+        chunks = open(current_file.parent / "samples" / "chunks.txt", "r").read()
+        read_chunk_mock.return_value = chunks.split("\n<<<<< end_of_chunk >>>>>\n")[1]
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+        res = build_file_report_from_commit(commit, "tests/test_sample.py")
+        assert not read_chunks_mock.called
+        read_chunk_mock.assert_called_once_with("abf6d4d", 1)
+        assert list(res.files) == ["tests/test_sample.py"]
+        file_report = res.get("tests/test_sample.py")
+        assert tuple(file_report.totals) == (0, 7, 7, 0, 0, "100", 0, 0, 0, 0, 0, 0, 0)
+
+    @patch("services.archive.ArchiveService.read_chunk")
+    def test_build_file_report_from_commit_unknown_file(self, read_chunk_mock):
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+        res = build_file_report_from_commit(commit, "does/not/exist.py")
+        assert not read_chunk_mock.called
+        assert res.get("does/not/exist.py") is None
+
+    @override_settings(REPORT_CACHE_ENABLED=True)
+    @patch("services.report.get_redis_connection")
+    @patch("services.archive.ArchiveService.read_chunks")
+    def test_build_report_from_commit_cached(self, read_chunks_mock, get_redis_mock):
+        get_redis_mock.return_value = fakeredis.FakeStrictRedis()
+        report_data_cache.clear()
+        f = open(current_file.parent / "samples" / "chunks.txt", "r")
+        read_chunks_mock.return_value = f.read()
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+        first = build_report_from_commit(commit)
+        second = build_report_from_commit(commit)
+        assert read_chunks_mock.call_count == 1
+        assert first is not second
+        assert sorted(first.files) == sorted(second.files)
+        assert list(first.totals) == list(second.totals)
+
+        # the process-local tier is empty but redis still has the data
+        report_data_cache.clear()
+        third = build_report_from_commit(commit)
+        assert read_chunks_mock.call_count == 1
+        assert sorted(third.files) == sorted(first.files)
+
+    @patch("services.archive.ArchiveService.read_chunks")
+    def test_report_data_json_round_trip(self, read_chunks_mock):
+        read_chunks_mock.return_value = "chunks"
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+        report_data = fetch_report_data(commit)
+
+        decoded = decode_report_data(
+            report_data.chunks, encode_report_data(report_data)
+        )
+        assert decoded.chunks == "chunks"
+        assert decoded.files == report_data.files
+        assert decoded.totals == report_data.totals
+        assert decoded.sessions.keys() == report_data.sessions.keys()
+        for sid, session in report_data.sessions.items():
+            assert decoded.sessions[sid].session_type == session.session_type
+            assert decoded.sessions[sid].totals == session.totals
+            assert decoded.sessions[sid].flags == session.flags
+
+    @override_settings(REPORT_CACHE_ENABLED=True)
+    @patch("services.report.get_redis_connection")
+    @patch("services.archive.ArchiveService.read_chunks")
+    def test_build_report_from_commit_cache_invalidated_by_new_upload(
+        self, read_chunks_mock, get_redis_mock
+    ):
+        get_redis_mock.return_value = fakeredis.FakeStrictRedis()
+        report_data_cache.clear()
+        f = open(current_file.parent / "samples" / "chunks.txt", "r")
+        read_chunks_mock.return_value = f.read()
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+        build_report_from_commit(commit)
+        assert read_chunks_mock.call_count == 1
+
+        # worker finished processing another upload
+        report_details = commit.reports.first().reportdetails
+        report_details.save()
+
+        build_report_from_commit(commit)
+        assert read_chunks_mock.call_count == 2
+
+    def test_commit_flag_names(self):
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+        UploadFlagMembershipFactory(
+            report_session=UploadFactory(report=commit.reports.first(), state="error"),
+            flag__repository=commit.repository,
+            flag__flag_name="failed",
+        )
+
+        with self.assertNumQueries(2):
+            assert commit_flag_names(commit) == ["integrations", "unittests"]
+
+    @patch("services.archive.ArchiveService.read_chunks")
+    def test_commit_flag_totals(self, read_chunks_mock):
+        f = open(current_file.parent / "samples" / "chunks.txt", "r")
+        read_chunks_mock.return_value = f.read()
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+        # builds the report and writes the rollup
+        totals = commit_flag_totals(Commit.objects.get(pk=commit.pk))
+        assert float(totals["integrations"].coverage) == 15.0
+        assert read_chunks_mock.call_count == 1
+        assert commit.reports.first().flag_totals.count() == 2
+
+        # served from the rollup
+        totals = commit_flag_totals(Commit.objects.get(pk=commit.pk))
+        assert totals["integrations"].coverage == Decimal("15.00")
+        assert set(totals.keys()) == {"integrations", "unittests"}
+        assert read_chunks_mock.call_count == 1
+
+        # a new upload makes the rollup stale
+        UploadFactory(report=commit.reports.first(), order_number=2)
+        commit_flag_totals(Commit.objects.get(pk=commit.pk))
+        assert read_chunks_mock.call_count == 2
+
+    @patch("services.report.build_report_from_commit")
+    def test_commit_flag_totals_empty_rollup(self, build_report_from_commit_mock):
+        build_report_from_commit_mock.return_value = Report()
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+        assert commit_flag_totals(Commit.objects.get(pk=commit.pk)) == {}
+        assert build_report_from_commit_mock.call_count == 1
+        assert commit.reports.first().flag_totals_rolled_up_at is not None
+
+        # a report without flag totals is not rebuilt
+        assert commit_flag_totals(Commit.objects.get(pk=commit.pk)) == {}
+        assert build_report_from_commit_mock.call_count == 1
+
+    @patch("services.report.get_redis_connection")
+    @patch("services.report.build_report_from_commit")
+    def test_commit_flag_totals_waits_for_the_rollup_in_progress(
+        self, build_report_from_commit_mock, get_redis_mock
+    ):
+        get_redis_mock.return_value = fakeredis.FakeStrictRedis()
+        build_report_from_commit_mock.return_value = Report()
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+        commit_report = commit.reports.first()
+
+        def acquire(*args, **kwargs):
+            # the request holding the lock rolls up the report while we wait
+            rollup_flag_totals(commit_report, Report())
+            return True
+
+        with patch.object(redis_lock.Lock, "acquire", side_effect=acquire):
+            assert commit_flag_totals(Commit.objects.get(pk=commit.pk)) == {}
+        assert build_report_from_commit_mock.call_count == 0
+
+    @override_settings(FLAG_TOTALS_ROLLUP_LOCK_TIMEOUT=1)
+    @patch("services.report.get_redis_connection")
+    @patch("services.report.build_report_from_commit")
+    def test_commit_flag_totals_lock_timeout_leaves_the_rollup(
+        self, build_report_from_commit_mock, get_redis_mock
+    ):
+        redis = fakeredis.FakeStrictRedis()
+        get_redis_mock.return_value = redis
+        build_report_from_commit_mock.return_value = Report()
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+        commit_report = commit.reports.first()
+        lock = redis_lock.Lock(
+            redis, f"flag_totals_rollup/{commit_report.pk}/lock", expire=60
+        )
+        assert lock.acquire(blocking=False)
+
+        assert commit_flag_totals(Commit.objects.get(pk=commit.pk)) == {}
+        assert build_report_from_commit_mock.call_count == 1
+        commit_report.refresh_from_db()
+        assert commit_report.flag_totals_rolled_up_at is None
+
     def test_files_belonging_to_flags_with_one_flag(self):
         commit_report = flags_report()
         flags = ["flag-a"]
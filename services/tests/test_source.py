@@ -0,0 +1,115 @@
+import asyncio
+import zlib
+from unittest.mock import patch
+
+import fakeredis
+from django.test import TestCase, override_settings
+from shared.torngit.exceptions import TorngitObjectNotFoundError
+
+from codecov_auth.tests.factories import OwnerFactory
+from core.tests.factories import CommitFactory, RepositoryFactory
+from services.source import (
+    SourceLines,
+    get_source_lines,
+    prefetch_sources,
+    source_cache,
+)
+
+
+class MockSourceAdapter:
+    def __init__(self, sources):
+        self.sources = sources
+        self.calls = []
+
+    async def get_source(self, path, commitid):
+        self.calls.append((path, commitid))
+        if path not in self.sources:
+            raise TorngitObjectNotFoundError(None, None)
+        return {"content": self.sources[path]}
+
+
+def test_source_lines_match_splitlines():
+    for content in [
+        "",
+        "\n",
+        "one",
+        "one\ntwo\n",
+        "one\r\ntwo\rthree\n\nfour",
+        "one\x0btwo\x0cthree\x1cfour\x85five\u2028six\u2029",
+        "trailing\r",
+        "é\nü\r\n",
+    ]:
+        lines = SourceLines.from_content(content)
+        assert list(lines) == content.splitlines()
+        assert len(lines) == len(content.splitlines())
+        assert lines[1:] == content.splitlines()[1:]
+        if lines:
+            assert lines[-1] == content.splitlines()[-1]
+
+
+@override_settings(SOURCE_CACHE_ENABLED=True)
+@patch("services.repo_providers.RepoProviderService.get_adapter")
+class SourceCacheTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        patcher = patch("services.source.get_redis_connection", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        source_cache.clear()
+        self.addCleanup(source_cache.clear)
+
+        self.owner = OwnerFactory()
+        self.repository = RepositoryFactory(author=self.owner)
+        self.commit = CommitFactory(repository=self.repository)
+        asyncio.set_event_loop(asyncio.new_event_loop())
+
+    def test_source_is_fetched_once(self, get_adapter_mock):
+        adapter = MockSourceAdapter({"file.py": b"first\nsecond"})
+        get_adapter_mock.return_value = adapter
+
+        for _ in range(2):
+            lines = get_source_lines(
+                self.owner, self.repository, self.commit.commitid, "file.py"
+            )
+            assert list(lines) == ["first", "second"]
+        assert adapter.calls == [("file.py", self.commit.commitid)]
+
+        # only the raw content is stored, the line offsets are rebuilt on load
+        (key,) = self.redis.keys("source_content/*")
+        assert zlib.decompress(self.redis.get(key)) == b"first\nsecond"
+
+        # other processes are served from redis
+        source_cache.clear()
+        lines = get_source_lines(
+            self.owner, self.repository, self.commit.commitid, "file.py"
+        )
+        assert list(lines) == ["first", "second"]
+        assert len(adapter.calls) == 1
+
+    def test_prefetch_sources(self, get_adapter_mock):
+        adapter = MockSourceAdapter({"a.py": "a", "b.py": "b"})
+        get_adapter_mock.return_value = adapter
+
+        prefetch_sources(
+            self.owner,
+            self.repository,
+            self.commit.commitid,
+            ["a.py", "b.py", "a.py", "missing.py"],
+        )
+        assert sorted(adapter.calls) == [
+            ("a.py", self.commit.commitid),
+            ("b.py", self.commit.commitid),
+            ("missing.py", self.commit.commitid),
+        ]
+
+        lines = get_source_lines(
+            self.owner, self.repository, self.commit.commitid, "b.py"
+        )
+        assert list(lines) == ["b"]
+        assert len(adapter.calls) == 3
+
+        # failures are not cached
+        with self.assertRaises(TorngitObjectNotFoundError):
+            get_source_lines(
+                self.owner, self.repository, self.commit.commitid, "missing.py"
+            )
@@ -34,6 +34,8 @@ def test_compute_comparison_task(mocker):
         celery_config.compute_comparison_task_name,
         args=None,
         kwargs=dict(comparison_id=5),
+        owner=None,
+        repoid=None,
     )
     signature_mock.assert_called_with(
         celery_config.compute_comparison_task_name,
@@ -60,6 +62,7 @@ def test_compute_comparisons_task(mocker):
         celery_config.compute_comparison_task_name,
         args=None,
         kwargs=dict(comparison_id=5),
+        repoid=None,
     )
     assert signature_mock.call_count == 2
     signature_mock.assert_any_call(
@@ -83,6 +86,21 @@ def test_compute_comparisons_task(mocker):
     apply_async_mock.assert_called_once_with()
 
 
+def test_compute_comparisons_task_with_repoid(mocker):
+    mocker.patch("services.task.task.signature")
+    mock_route_task = mocker.patch(
+        "services.task.task.route_task", return_value={"queue": "my_queue"}
+    )
+    mocker.patch("celery.group.apply_async")
+    TaskService().compute_comparisons([5, 10], repoid=1)
+    mock_route_task.assert_called_once_with(
+        celery_config.compute_comparison_task_name,
+        args=None,
+        kwargs=dict(comparison_id=5),
+        repoid=1,
+    )
+
+
 @pytest.mark.skipif(
     not settings.TIMESERIES_ENABLED, reason="requires timeseries data storage"
 )
@@ -114,6 +132,8 @@ def test_backfill_repo(mocker):
             end_date="2022-01-25T00:00:00",
             dataset_names=["testing"],
         ),
+        owner=None,
+        repoid=None,
     )
 
     signature_mock.assert_any_call(
@@ -217,6 +237,8 @@ def test_timeseries_delete(mocker):
         celery_config.timeseries_delete_task_name,
         args=None,
         kwargs=dict(repository_id=12345),
+        owner=None,
+        repoid=None,
     )
     signature_mock.assert_called_with(
         celery_config.timeseries_delete_task_name,
@@ -242,6 +264,8 @@ def test_flush_repo(mocker):
         "app.tasks.flush_repo.FlushRepo",
         args=None,
         kwargs=dict(repoid=12345),
+        owner=None,
+        repoid=None,
     )
     signature_mock.assert_called_with(
         "app.tasks.flush_repo.FlushRepo",
@@ -271,6 +295,8 @@ def test_update_commit_task(mocker):
         celery_config.commit_update_task_name,
         args=None,
         kwargs=dict(commitid=1, repoid=2),
+        owner=None,
+        repoid=None,
     )
     signature_mock.assert_called_with(
         celery_config.commit_update_task_name,
@@ -308,6 +334,8 @@ def test_make_http_request_task(mocker):
             data="test body",
             timeout=10,
         ),
+        owner=None,
+        repoid=None,
     )
     signature_mock.assert_called_with(
         "app.tasks.http_request.HTTPRequest",
@@ -343,6 +371,8 @@ def test_backfill_commit_data_task(mocker):
         "app.tasks.archive.BackfillCommitDataToStorage",
         args=None,
         kwargs=dict(commitid=123),
+        owner=None,
+        repoid=None,
     )
     signature_mock.assert_called_with(
         "app.tasks.archive.BackfillCommitDataToStorage",
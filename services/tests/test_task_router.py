@@ -17,6 +17,7 @@ from services.task.task_router import (
     _get_user_plan_from_repoid,
     _get_user_plan_from_suite_id,
     _get_user_plan_from_task,
+    plan_cache,
     route_task,
 )
 from staticanalysis.tests.factories import StaticAnalysisSuiteFactory
@@ -286,3 +287,61 @@ def test_route_task(mocker, fake_repos):
     mock_route_tasks_shared.assert_called_with(
         shared_celery_config.upload_task_name, BillingPlan.pr_monthly.db_name
     )
+
+
+def test_route_task_with_owner(mocker, fake_owners, django_assert_num_queries):
+    mock_route_tasks_shared = mocker.patch(
+        "services.task.task_router.route_tasks_based_on_user_plan"
+    )
+    mock_route_tasks_shared.return_value = {"queue": "correct queue"}
+    owner = fake_owners[1]
+    task_kwargs = dict(ownerid=owner.ownerid)
+    with django_assert_num_queries(0):
+        response = route_task(
+            shared_celery_config.delete_owner_task_name,
+            [],
+            task_kwargs,
+            {},
+            owner=owner,
+        )
+    assert response == {"queue": "correct queue"}
+    mock_route_tasks_shared.assert_called_with(
+        shared_celery_config.delete_owner_task_name,
+        BillingPlan.enterprise_cloud_yearly.db_name,
+    )
+
+
+def test_route_task_plan_cache(
+    mocker, settings, fake_compare_commit, django_assert_num_queries
+):
+    settings.TASK_ROUTING_PLAN_CACHE_ENABLED = True
+    plan_cache.clear()
+    mock_route_tasks_shared = mocker.patch(
+        "services.task.task_router.route_tasks_based_on_user_plan"
+    )
+    compare_commit = fake_compare_commit[0]
+    repo = compare_commit.compare_commit.repository
+
+    with django_assert_num_queries(1):
+        for _ in range(3):
+            route_task(
+                shared_celery_config.compute_comparison_task_name,
+                [],
+                dict(comparison_id=compare_commit.id),
+                {},
+                repoid=repo.repoid,
+            )
+    mock_route_tasks_shared.assert_called_with(
+        shared_celery_config.compute_comparison_task_name,
+        BillingPlan.pr_monthly.db_name,
+    )
+
+    # routing by task kwargs shares the cache
+    with django_assert_num_queries(0):
+        route_task(
+            shared_celery_config.upload_task_name,
+            [],
+            dict(repoid=repo.repoid, commitid=0),
+            {},
+        )
+    plan_cache.clear()
@@ -1,11 +1,19 @@
+import json
 from unittest.mock import patch
 
+import fakeredis
+import redis_lock
 from django.contrib.auth.models import AnonymousUser
-from django.test import TransactionTestCase
-from shared.torngit.exceptions import TorngitObjectNotFoundError
+from django.test import TransactionTestCase, override_settings
+from redis.exceptions import RedisError
+from shared.torngit.exceptions import (
+    TorngitObjectNotFoundError,
+    TorngitServer5xxCodeError,
+)
 
 import services.yaml as yaml
 from codecov_auth.tests.factories import OwnerFactory
+from core.models import Commit
 from core.tests.factories import CommitFactory, RepositoryFactory
 
 
@@ -32,3 +40,116 @@ class YamlServiceTest(TransactionTestCase):
         )
         config = yaml.final_commit_yaml(self.commit, None)
         assert config["codecov"]["require_ci_to_pass"] is True
+
+
+@override_settings(COMMIT_YAML_CACHE_ENABLED=True)
+class FinalCommitYamlCacheTest(TransactionTestCase):
+    def setUp(self):
+        self.org = OwnerFactory()
+        self.repo = RepositoryFactory(author=self.org, private=False)
+        self.commit = CommitFactory(repository=self.repo)
+
+        self.redis = fakeredis.FakeStrictRedis()
+        patcher = patch("services.yaml.get_redis_connection", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch("services.yaml.fetch_current_yaml_from_provider_via_reference")
+    def test_final_yaml_is_cached_across_requests(self, mock_fetch_yaml):
+        mock_fetch_yaml.return_value = """
+        codecov:
+          notify:
+            require_ci_to_pass: no
+        """
+        config = yaml.final_commit_yaml(self.commit, None)
+        assert config["codecov"]["require_ci_to_pass"] is False
+
+        # a different request loads fresh model instances
+        commit = Commit.objects.get(pk=self.commit.pk)
+        config = yaml.final_commit_yaml(commit, None)
+        assert config["codecov"]["require_ci_to_pass"] is False
+        assert mock_fetch_yaml.call_count == 1
+
+    @patch("services.yaml.fetch_current_yaml_from_provider_via_reference")
+    def test_cache_key_changes_with_repo_yaml(self, mock_fetch_yaml):
+        mock_fetch_yaml.return_value = ""
+        key = yaml.final_commit_yaml_cache_key(self.commit)
+        yaml.final_commit_yaml(self.commit, None)
+        assert self.redis.get(key) is not None
+
+        self.repo.yaml = {"codecov": {"require_ci_to_pass": False}}
+        self.repo.save()
+        assert yaml.final_commit_yaml_cache_key(self.commit) != key
+
+        config = yaml.final_commit_yaml(self.commit, None)
+        assert config["codecov"]["require_ci_to_pass"] is False
+        assert mock_fetch_yaml.call_count == 2
+
+    @patch("services.yaml.fetch_current_yaml_from_provider_via_reference")
+    def test_falls_back_to_provider_when_redis_is_down(self, mock_fetch_yaml):
+        mock_fetch_yaml.return_value = ""
+        with patch.object(self.redis, "get", side_effect=RedisError()):
+            config = yaml.final_commit_yaml(self.commit, None)
+        assert config["codecov"]["require_ci_to_pass"] is True
+        assert mock_fetch_yaml.call_count == 1
+
+    @patch("services.yaml.fetch_current_yaml_from_provider_via_reference")
+    def test_provider_errors_are_not_cached(self, mock_fetch_yaml):
+        key = yaml.final_commit_yaml_cache_key(self.commit)
+        mock_fetch_yaml.side_effect = TorngitServer5xxCodeError()
+        config = yaml.final_commit_yaml(self.commit, None)
+        assert config["codecov"]["require_ci_to_pass"] is True
+        assert self.redis.get(key) is None
+
+        mock_fetch_yaml.side_effect = None
+        mock_fetch_yaml.return_value = """
+        codecov:
+          notify:
+            require_ci_to_pass: no
+        """
+        config = yaml.final_commit_yaml(self.commit, None)
+        assert config["codecov"]["require_ci_to_pass"] is False
+        assert self.redis.get(key) is not None
+
+    @patch("services.yaml.fetch_current_yaml_from_provider_via_reference")
+    def test_not_found_without_owner_on_private_repo(self, mock_fetch_yaml):
+        self.repo.private = True
+        self.repo.save()
+        key = yaml.final_commit_yaml_cache_key(self.commit)
+        mock_fetch_yaml.side_effect = TorngitObjectNotFoundError(
+            response_data=404, message="not found"
+        )
+
+        # the yaml may only be missing because we cannot see the repo
+        yaml.final_commit_yaml(self.commit, None)
+        assert self.redis.get(key) is None
+
+        yaml.final_commit_yaml(self.commit, self.org)
+        assert self.redis.get(key) is not None
+
+    @patch("services.yaml.fetch_current_yaml_from_provider_via_reference")
+    def test_waits_for_the_request_holding_the_lock(self, mock_fetch_yaml):
+        key = yaml.final_commit_yaml_cache_key(self.commit)
+
+        def acquire(*args, **kwargs):
+            # the request holding the lock caches the yaml while we wait
+            self.redis.set(key, json.dumps({"codecov": {"require_ci_to_pass": False}}))
+            return True
+
+        with patch.object(redis_lock.Lock, "acquire", side_effect=acquire):
+            config = yaml.final_commit_yaml(self.commit, None)
+        assert config["codecov"]["require_ci_to_pass"] is False
+        assert mock_fetch_yaml.call_count == 0
+
+    @override_settings(COMMIT_YAML_CACHE_LOCK_TIMEOUT=1)
+    @patch("services.yaml.fetch_current_yaml_from_provider_via_reference")
+    def test_falls_back_to_provider_when_the_lock_times_out(self, mock_fetch_yaml):
+        mock_fetch_yaml.return_value = ""
+        key = yaml.final_commit_yaml_cache_key(self.commit)
+        lock = redis_lock.Lock(self.redis, f"{key}/lock", expire=30)
+        assert lock.acquire(blocking=False)
+
+        config = yaml.final_commit_yaml(self.commit, None)
+        assert config["codecov"]["require_ci_to_pass"] is True
+        assert mock_fetch_yaml.call_count == 1
+        assert self.redis.get(key) is None
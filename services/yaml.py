@@ -1,8 +1,14 @@
 import enum
-from functools import lru_cache
-from typing import Dict, Optional
+import hashlib
+import json
+import logging
+from typing import Dict, Optional, Tuple
 
+import redis_lock
 from asgiref.sync import async_to_sync
+from django.conf import settings
+from redis.exceptions import RedisError
+from shared.torngit.exceptions import TorngitObjectNotFoundError
 from shared.yaml import UserYaml, fetch_current_yaml_from_provider_via_reference
 from shared.yaml.user_yaml import UserYaml
 from shared.yaml.validation import validate_yaml
@@ -10,17 +16,24 @@ from yaml import safe_load
 
 from codecov_auth.models import Owner, get_config
 from core.models import Commit
+from services.redis_configuration import get_redis_connection
 from services.repo_providers import RepoProviderService
 
+log = logging.getLogger(__name__)
+
 
 class YamlStates(enum.Enum):
     DEFAULT = "default"
 
 
-def fetch_commit_yaml(commit: Commit, owner: Owner) -> Optional[Dict]:
+def fetch_commit_yaml(commit: Commit, owner: Owner) -> Tuple[Optional[Dict], bool]:
     """
     Fetches the codecov.yaml file for a particular commit from the service provider.
     Service provider API request is made on behalf of the given `owner`.
+
+    Returns the yaml (`None` if the commit has no valid yaml) along with whether it
+    was actually fetched: `False` when the provider request failed, or when it
+    wasn't found but that could mean `owner` cannot see the (private) repository.
     """
     try:
         repository_service = RepoProviderService().get_adapter(
@@ -29,24 +42,118 @@ def fetch_commit_yaml(commit: Commit, owner: Owner) -> Optional[Dict]:
         yaml_str = async_to_sync(fetch_current_yaml_from_provider_via_reference)(
             commit.commitid, repository_service
         )
+    except TorngitObjectNotFoundError:
+        return None, owner is not None or not commit.repository.private
+    except:
+        log.warning(
+            "Unable to fetch commit yaml",
+            extra=dict(commit=commit.commitid, repoid=commit.repository_id),
+            exc_info=True,
+        )
+        return None, False
+
+    try:
         yaml_dict = safe_load(yaml_str)
-        return validate_yaml(yaml_dict, show_secrets_for=None)
+        return validate_yaml(yaml_dict, show_secrets_for=None), True
     except:
-        # fetching, parsing, validating the yaml inside the commit can
-        # have various exceptions, which we do not care about to get the final
-        # yaml used for a commit, as any error here, the codecov.yaml would not
-        # be used, so we return None here
-        return None
+        # parsing, validating the yaml inside the commit can have various
+        # exceptions, which we do not care about to get the final yaml used for
+        # a commit, as any error here, the codecov.yaml would not be used, so we
+        # return None here
+        return None, True
 
 
-@lru_cache()
-# TODO: make this use the Redis cache logic in 'shared' once it's there
-def final_commit_yaml(commit: Commit, owner: Owner) -> UserYaml:
-    return UserYaml.get_final_yaml(
+def _yaml_hash(yaml: Optional[Dict]) -> str:
+    serialized = json.dumps(yaml, sort_keys=True, default=str)
+    return hashlib.sha1(serialized.encode()).hexdigest()
+
+
+def final_commit_yaml_cache_key(commit: Commit) -> str:
+    """
+    The yaml committed at a given commitid cannot change, so the final yaml only
+    changes when the owner or repository yaml (edited in the UI) does.
+    """
+    return "/".join(
+        (
+            "final_commit_yaml",
+            str(commit.repository_id),
+            commit.commitid,
+            _yaml_hash(commit.repository.author.yaml),
+            _yaml_hash(commit.repository.yaml),
+        )
+    )
+
+
+def _get_cached_yaml(redis, key: str) -> Optional[Dict]:
+    cached = redis.get(key)
+    if cached is not None:
+        return json.loads(cached)
+
+
+def _build_final_commit_yaml(commit: Commit, owner: Owner) -> Tuple[UserYaml, bool]:
+    commit_yaml, fetched = fetch_commit_yaml(commit, owner)
+    final_yaml = UserYaml.get_final_yaml(
         owner_yaml=commit.repository.author.yaml,
         repo_yaml=commit.repository.yaml,
-        commit_yaml=fetch_commit_yaml(commit, owner),
+        commit_yaml=commit_yaml,
     )
+    return final_yaml, fetched
+
+
+def final_commit_yaml(commit: Commit, owner: Owner) -> UserYaml:
+    """
+    Returns the final yaml for a commit (owner yaml + repo yaml + commit yaml).
+
+    Fetching the commit yaml requires a round-trip to the service provider so the
+    result is cached in redis across requests, unless the commit yaml could not be
+    fetched.  Concurrent cache misses for the same key are collapsed with a lock:
+    only the request holding it goes to the provider, the others wait for it (up
+    to `COMMIT_YAML_CACHE_LOCK_TIMEOUT` seconds) and then read the cached yaml.
+    """
+    if not settings.COMMIT_YAML_CACHE_ENABLED:
+        final_yaml, _ = _build_final_commit_yaml(commit, owner)
+        return final_yaml
+
+    key = final_commit_yaml_cache_key(commit)
+    try:
+        redis = get_redis_connection()
+        cached = _get_cached_yaml(redis, key)
+        if cached is not None:
+            return UserYaml(cached)
+
+        lock = redis_lock.Lock(redis, f"{key}/lock", expire=30)
+        acquired = lock.acquire(timeout=settings.COMMIT_YAML_CACHE_LOCK_TIMEOUT)
+        if acquired:
+            # the request that held the lock may have cached the yaml meanwhile
+            cached = _get_cached_yaml(redis, key)
+    except RedisError:
+        log.warning("Unable to read final commit yaml from redis", exc_info=True)
+        acquired, cached = False, None
+
+    if not acquired:
+        # timed out waiting for the lock, don't hold the request any longer
+        final_yaml, _ = _build_final_commit_yaml(commit, owner)
+        return final_yaml
+
+    try:
+        if cached is not None:
+            return UserYaml(cached)
+
+        final_yaml, fetched = _build_final_commit_yaml(commit, owner)
+        if fetched:
+            redis.set(
+                key,
+                json.dumps(final_yaml.to_dict()),
+                ex=settings.COMMIT_YAML_CACHE_TTL,
+            )
+    except RedisError:
+        log.warning("Unable to write final commit yaml to redis", exc_info=True)
+    finally:
+        try:
+            lock.release()
+        except (RedisError, redis_lock.NotAcquired):
+            pass
+    return final_yaml
 
 
 def get_yaml_state(yaml: UserYaml) -> YamlStates:
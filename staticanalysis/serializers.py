@@ -31,48 +31,56 @@ class CommitFromShaSerializerField(serializers.Field):
         return commit
 
 
-def _dict_to_suite_filepath(
-    analysis_suite,
-    repository,
-    archive_service,
-    existing_file_snapshots_mapping,
-    file_dict,
-):
-    if file_dict["file_hash"] in existing_file_snapshots_mapping:
-        db_element = existing_file_snapshots_mapping[file_dict["file_hash"]]
-        was_created = False
-    else:
-        path = MinioEndpoints.static_analysis_single_file.get_path(
-            version="v4",
-            repo_hash=archive_service.storage_hash,
-            location=f"{file_dict['file_hash']}.json",
-        )
-        # Using get or create in the case the object was already
-        # created somewhere else first, but also because get_or_create
-        # is internally get_or_create_or_get, so Django handles the conflicts
-        # that can arise on race conditions on the create step
-        # We might choose to change it if the number of extra GETs become too much
-        (
-            db_element,
-            was_created,
-        ) = StaticAnalysisSingleFileSnapshot.objects.get_or_create(
-            file_hash=file_dict["file_hash"],
-            repository=repository,
-            defaults=dict(
+def _get_or_create_file_snapshots(repository, archive_service, file_hashes):
+    """
+    Returns a mapping of file_hash -> StaticAnalysisSingleFileSnapshot for all of
+    the given hashes, creating the missing snapshots, along with the mapping of the
+    snapshots that already existed.
+    """
+    existing_snapshots = StaticAnalysisSingleFileSnapshot.objects.filter(
+        repository=repository, file_hash__in=file_hashes
+    )
+    existing_snapshots_mapping = {
+        snapshot.file_hash: snapshot for snapshot in existing_snapshots
+    }
+    missing_hashes = [
+        file_hash
+        for file_hash in dict.fromkeys(file_hashes)
+        if file_hash not in existing_snapshots_mapping
+    ]
+    if not missing_hashes:
+        return existing_snapshots_mapping, existing_snapshots_mapping
+
+    # `ignore_conflicts` takes care of snapshots created concurrently by another
+    # upload, which is also why we read back the rows instead of relying on the
+    # objects passed to `bulk_create` (they don't get primary keys set)
+    StaticAnalysisSingleFileSnapshot.objects.bulk_create(
+        [
+            StaticAnalysisSingleFileSnapshot(
+                file_hash=file_hash,
+                repository=repository,
                 state_id=StaticAnalysisSingleFileSnapshotState.CREATED.db_id,
-                content_location=path,
-            ),
-        )
-    if was_created:
-        log.debug(
-            "Created new snapshot for repository",
-            extra=dict(repoid=repository.repoid, snapshot_id=db_element.id),
-        )
-    return StaticAnalysisSuiteFilepath(
-        filepath=file_dict["filepath"],
-        file_snapshot=db_element,
-        analysis_suite=analysis_suite,
+                content_location=MinioEndpoints.static_analysis_single_file.get_path(
+                    version="v4",
+                    repo_hash=archive_service.storage_hash,
+                    location=f"{file_hash}.json",
+                ),
+            )
+            for file_hash in missing_hashes
+        ],
+        ignore_conflicts=True,
+    )
+    created_snapshots = StaticAnalysisSingleFileSnapshot.objects.filter(
+        repository=repository, file_hash__in=missing_hashes
     )
+    log.debug(
+        "Created new snapshots for repository",
+        extra=dict(repoid=repository.repoid, count=len(missing_hashes)),
+    )
+    return {
+        **existing_snapshots_mapping,
+        **{snapshot.file_hash: snapshot for snapshot in created_snapshots},
+    }, existing_snapshots_mapping
 
 
 class StaticAnalysisSuiteFilepathField(serializers.ModelSerializer):
@@ -95,12 +103,12 @@ class StaticAnalysisSuiteFilepathField(serializers.ModelSerializer):
         ).name
 
     def get_raw_upload_location(self, obj):
-        # TODO: This has a built-in ttl of 10 seconds.
-        # We have to consider changing it in case customers are doing a few
-        # thousand uploads on the first time
-        return self.context["archive_service"].create_presigned_put(
-            obj.file_snapshot.content_location
-        )
+        location = obj.file_snapshot.content_location
+        # precomputed for the whole suite by `FilepathListField`
+        raw_upload_locations = self.context.get("raw_upload_locations", {})
+        if location in raw_upload_locations:
+            return raw_upload_locations[location]
+        return self.context["archive_service"].create_presigned_put(location)
 
 
 class FilepathListField(serializers.ListField):
@@ -110,6 +118,12 @@ class FilepathListField(serializers.ListField):
         data = data.select_related(
             "file_snapshot",
         ).all()
+        archive_service = self.context.get("archive_service")
+        if archive_service is not None:
+            locations = [filepath.file_snapshot.content_location for filepath in data]
+            self.context[
+                "raw_upload_locations"
+            ] = archive_service.create_presigned_puts(locations)
         return super().to_representation(data)
 
 
@@ -132,18 +146,16 @@ class StaticAnalysisSuiteSerializer(serializers.ModelSerializer):
         # allow 1s per 10 uploads
         ttl = max(math.ceil(len(file_metadata_array) / 10) + 5, 10)
         self.context["archive_service"] = ArchiveService(repository, ttl=ttl)
-        all_hashes = [val["file_hash"] for val in file_metadata_array]
-        existing_values = StaticAnalysisSingleFileSnapshot.objects.filter(
-            repository=repository, file_hash__in=all_hashes
+        snapshots_mapping, existing_values_mapping = _get_or_create_file_snapshots(
+            repository,
+            archive_service,
+            [val["file_hash"] for val in file_metadata_array],
         )
-        existing_values_mapping = {val.file_hash: val for val in existing_values}
         created_filepaths = [
-            _dict_to_suite_filepath(
-                obj,
-                repository,
-                archive_service,
-                existing_values_mapping,
-                file_dict,
+            StaticAnalysisSuiteFilepath(
+                filepath=file_dict["filepath"],
+                file_snapshot=snapshots_mapping[file_dict["file_hash"]],
+                analysis_suite=obj,
             )
             for file_dict in file_metadata_array
         ]
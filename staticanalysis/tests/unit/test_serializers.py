@@ -7,6 +7,7 @@ from rest_framework.exceptions import NotFound, ValidationError
 from core.tests.factories import CommitFactory, RepositoryFactory
 from services.archive import ArchiveService
 from staticanalysis.models import (
+    StaticAnalysisSingleFileSnapshot,
     StaticAnalysisSingleFileSnapshotState,
     StaticAnalysisSuite,
     StaticAnalysisSuiteFilepath,
@@ -18,6 +19,7 @@ from staticanalysis.serializers import (
 )
 from staticanalysis.tests.factories import (
     StaticAnalysisSingleFileSnapshotFactory,
+    StaticAnalysisSuiteFactory,
     StaticAnalysisSuiteFilepathFactory,
 )
 
@@ -329,3 +331,73 @@ class TestStaticAnalysisSuiteSerializer(object):
             fourth_filepath.file_snapshot.state_id
             == StaticAnalysisSingleFileSnapshotState.VALID.db_id
         )
+
+    def test_create_many_files_uses_bulk_queries(
+        self, mocker, db, django_assert_max_num_queries
+    ):
+        repository = RepositoryFactory.create()
+        commit = CommitFactory.create(repository=repository)
+        existing_snapshot = StaticAnalysisSingleFileSnapshotFactory.create(
+            repository=repository,
+            state_id=StaticAnalysisSingleFileSnapshotState.VALID.db_id,
+            content_location="existing_snapshot",
+        )
+        file_hashes = [existing_snapshot.file_hash] + [uuid4() for _ in range(200)]
+        validated_data = {
+            "commit": commit,
+            "filepaths": [
+                {"filepath": f"path/{i}.py", "file_hash": file_hash}
+                for i, file_hash in enumerate(file_hashes)
+            ]
+            # the same file can show up under multiple paths
+            + [{"filepath": "copy.py", "file_hash": file_hashes[1]}],
+        }
+        fake_request = mocker.MagicMock(
+            auth=mocker.MagicMock(
+                get_repositories=mocker.MagicMock(return_value=[repository])
+            )
+        )
+        serializer = StaticAnalysisSuiteSerializer(context={"request": fake_request})
+        with django_assert_max_num_queries(10):
+            res = serializer.create(validated_data)
+
+        assert res.filepaths.count() == 202
+        snapshots = StaticAnalysisSingleFileSnapshot.objects.filter(
+            repository=repository
+        )
+        assert snapshots.count() == 201
+        assert (
+            res.filepaths.get(filepath="copy.py").file_snapshot
+            == res.filepaths.get(filepath="path/1.py").file_snapshot
+        )
+        assert (
+            res.filepaths.get(filepath="path/0.py").file_snapshot == existing_snapshot
+        )
+
+    def test_representation_signs_each_location_once(self, mocker, db):
+        suite = StaticAnalysisSuiteFactory.create()
+        snapshot = StaticAnalysisSingleFileSnapshotFactory.create(
+            state_id=StaticAnalysisSingleFileSnapshotState.CREATED.db_id,
+            content_location="some/location.json",
+        )
+        StaticAnalysisSuiteFilepathFactory.create(
+            analysis_suite=suite, file_snapshot=snapshot, filepath="a.py"
+        )
+        StaticAnalysisSuiteFilepathFactory.create(
+            analysis_suite=suite, file_snapshot=snapshot, filepath="b.py"
+        )
+        fake_archive_service = mocker.MagicMock(
+            create_presigned_puts=mocker.MagicMock(
+                return_value={"some/location.json": "some_url_stuff"}
+            )
+        )
+        serializer = StaticAnalysisSuiteSerializer(
+            context={"archive_service": fake_archive_service}
+        )
+        data = serializer.to_representation(suite)
+        assert [filepath["raw_upload_location"] for filepath in data["filepaths"]] == [
+            "some_url_stuff",
+            "some_url_stuff",
+        ]
+        fake_archive_service.create_presigned_puts.assert_called_once()
+        fake_archive_service.create_presigned_put.assert_not_called()
@@ -1,5 +1,9 @@
+import hashlib
+import json
+import logging
 import math
 from datetime import datetime, timedelta
+from decimal import Decimal
 from typing import Iterable, List, Optional
 
 from django.conf import settings
@@ -20,11 +24,13 @@ from django.db.models import (
 from django.db.models.fields.json import KeyTextTransform
 from django.db.models.functions import Cast
 from django.utils import timezone
+from redis.exceptions import RedisError
 
 import services.report as report_service
 from codecov_auth.models import Owner
 from core.models import Commit, Repository
 from reports.models import RepositoryFlag
+from services.redis_configuration import get_redis_connection
 from services.task import TaskService
 from timeseries.models import (
     Dataset,
@@ -34,6 +40,8 @@ from timeseries.models import (
     MeasurementSummary,
 )
 
+log = logging.getLogger(__name__)
+
 interval_deltas = {
     Interval.INTERVAL_1_DAY: timedelta(days=1),
     Interval.INTERVAL_7_DAY: timedelta(days=7),
@@ -102,6 +110,17 @@ def _filter_repos(
     return queryset
 
 
+def _coverage_summaries(
+    interval: Interval, repos: Optional[List[Repository]] = None, **filters
+) -> QuerySet:
+    queryset = (
+        MeasurementSummary.agg_by(interval)
+        .filter(name=MeasurementName.COVERAGE.value)
+        .filter(**filters)
+    )
+    return _filter_repos(queryset, repos)
+
+
 def coverage_measurements(
     interval: Interval,
     start_date: Optional[datetime] = None,
@@ -115,28 +134,18 @@ def coverage_measurements(
     if end_date is not None:
         timestamp_filters["timestamp_bin__lte"] = end_date
 
-    queryset = (
-        MeasurementSummary.agg_by(interval)
-        .filter(name=MeasurementName.COVERAGE.value, **timestamp_filters)
-        .filter(**filters)
+    queryset = _coverage_summaries(interval, repos, **filters).filter(
+        **timestamp_filters
     )
 
-    queryset = _filter_repos(queryset, repos)
-
     if start_date:
         # The first measurement of the specified range (`start_date` through `end_date`)
         # may be missing the first datapoint.  In order for consumers of this API to have
         # usable data to show we can carry an older datapoint forward to the first time bin.
         # Including this older datapoint in the result set makes that possible.
-        older = (
-            MeasurementSummary.agg_by(interval)
-            .filter(
-                name=MeasurementName.COVERAGE.value,
-                timestamp_bin__lt=start_date,
-            )
-            .filter(**filters)
+        older = _coverage_summaries(interval, repos, **filters).filter(
+            timestamp_bin__lt=start_date
         )
-        older = _filter_repos(older, repos)
         older = aggregate_measurements(older).order_by("-timestamp_bin")[:1]
 
         return older.union(aggregate_measurements(queryset)).order_by("timestamp_bin")
@@ -144,6 +153,148 @@ def coverage_measurements(
         return aggregate_measurements(queryset).order_by("timestamp_bin")
 
 
+def _as_aware_datetime(value) -> Optional[datetime]:
+    if value is None or not isinstance(value, datetime):
+        return value
+    if timezone.is_naive(value):
+        return timezone.make_aware(value, timezone.utc)
+    return value
+
+
+def coverage_measurements_cache_key(
+    interval: Interval, repos: Optional[List[Repository]] = None, **filters
+) -> str:
+    series = (
+        sorted(filters.items()),
+        sorted((repo.repoid, repo.branch) for repo in repos) if repos else None,
+    )
+    digest = hashlib.sha1(repr(series).encode()).hexdigest()
+    return f"timeseries/coverage/{interval.value}/{digest}"
+
+
+def _dump_series(refreshed_at: datetime, measurements: List[dict]) -> str:
+    return json.dumps(
+        dict(
+            refreshed_at=refreshed_at.isoformat(),
+            measurements=[
+                {
+                    **measurement,
+                    "timestamp_bin": measurement["timestamp_bin"].isoformat(),
+                    "avg": None
+                    if measurement["avg"] is None
+                    else str(measurement["avg"]),
+                }
+                for measurement in measurements
+            ],
+        )
+    )
+
+
+def _load_series(cached: bytes) -> dict:
+    series = json.loads(cached)
+    return dict(
+        refreshed_at=datetime.fromisoformat(series["refreshed_at"]),
+        measurements=[
+            {
+                **measurement,
+                "timestamp_bin": datetime.fromisoformat(measurement["timestamp_bin"]),
+                "avg": None
+                if measurement["avg"] is None
+                else Decimal(measurement["avg"]),
+            }
+            for measurement in series["measurements"]
+        ],
+    )
+
+
+def cached_coverage_measurements(
+    interval: Interval,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    repos: Optional[List[Repository]] = None,
+    **filters,
+) -> Iterable[dict]:
+    """
+    Same as `coverage_measurements` but the full aligned series is cached in redis.
+
+    Time bins that ended more than `TIMESERIES_CACHE_AGGREGATE_LAG` seconds before
+    the cached series was last refreshed are considered immutable (the continuous
+    aggregates may still be materializing more recent ones) so a refresh only needs
+    to query the newest bins.  The requested range, along with
+    the older datapoint that `coverage_measurements` carries forward, is then sliced
+    out of the series in memory.
+    """
+    start_date, end_date = _as_aware_datetime(start_date), _as_aware_datetime(end_date)
+    if not all(
+        date is None or isinstance(date, datetime) for date in (start_date, end_date)
+    ):
+        return coverage_measurements(
+            interval, start_date=start_date, end_date=end_date, repos=repos, **filters
+        )
+
+    key = coverage_measurements_cache_key(interval, repos, **filters)
+    try:
+        redis = get_redis_connection()
+        cached = redis.get(key)
+    except RedisError:
+        log.warning("Unable to read coverage measurements from redis", exc_info=True)
+        return coverage_measurements(
+            interval, start_date=start_date, end_date=end_date, repos=repos, **filters
+        )
+
+    refreshed_at = aligned_start_date(
+        interval,
+        timezone.now() - timedelta(seconds=settings.TIMESERIES_CACHE_AGGREGATE_LAG),
+    )
+    queryset = _coverage_summaries(interval, repos, **filters)
+    series = None
+    if cached is not None:
+        try:
+            series = _load_series(cached)
+        except (ValueError, KeyError):
+            log.warning("Unable to decode cached coverage measurements", exc_info=True)
+
+    if series is None:
+        measurements = []
+    else:
+        measurements = [
+            measurement
+            for measurement in series["measurements"]
+            if measurement["timestamp_bin"] < series["refreshed_at"]
+        ]
+        queryset = queryset.filter(timestamp_bin__gte=series["refreshed_at"])
+
+    for measurement in aggregate_measurements(queryset):
+        measurement["timestamp_bin"] = measurement["timestamp_bin"].replace(
+            tzinfo=timezone.utc
+        )
+        measurements.append(measurement)
+
+    try:
+        redis.set(
+            key,
+            _dump_series(refreshed_at, measurements),
+            ex=settings.TIMESERIES_CACHE_TTL,
+        )
+    except RedisError:
+        log.warning("Unable to write coverage measurements to redis", exc_info=True)
+
+    older, in_range = None, []
+    for measurement in measurements:
+        timestamp = measurement["timestamp_bin"]
+        if start_date is not None and timestamp < start_date:
+            older = measurement
+        elif end_date is None or timestamp <= end_date:
+            in_range.append(measurement)
+    return ([older] if older else []) + in_range
+
+
+def _coverage_measurements(*args, cached: bool = True, **kwargs):
+    if cached and settings.TIMESERIES_CACHE_ENABLED:
+        return cached_coverage_measurements(*args, **kwargs)
+    return coverage_measurements(*args, **kwargs)
+
+
 def trigger_backfill(dataset: Dataset):
     """
     Triggers a backfill for the full timespan of the dataset's repo's commits.
@@ -330,11 +481,15 @@ def repository_coverage_measurements_with_fallback(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     branch: str = None,
+    cached: bool = True,
 ):
     """
     Tries to return repository coverage measurements from Timescale.
     If those are not available then we trigger a backfill and return computed results
     directly from the primary database (much slower to query).
+
+    Timescale measurements may come from the redis cache as a list.  Pass
+    `cached=False` when a `QuerySet` is needed (ex. to be filtered and paginated).
     """
     dataset = None
     if settings.TIMESERIES_ENABLED:
@@ -345,8 +500,9 @@ def repository_coverage_measurements_with_fallback(
 
     if settings.TIMESERIES_ENABLED and dataset and dataset.is_backfilled():
         # timeseries data is ready
-        return coverage_measurements(
+        return _coverage_measurements(
             interval,
+            cached=cached,
             start_date=start_date,
             end_date=end_date,
             owner_id=repository.author_id,
@@ -402,7 +558,7 @@ def owner_coverage_measurements_with_fallback(
 
     if settings.TIMESERIES_ENABLED and all_backfilled:
         # timeseries data is ready
-        return coverage_measurements(
+        return _coverage_measurements(
             interval,
             start_date=start_date,
             end_date=end_date,
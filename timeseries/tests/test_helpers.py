@@ -1,9 +1,11 @@
+import json
 from datetime import datetime, timezone
 from unittest.mock import call, patch
 
+import fakeredis
 import pytest
 from django.conf import settings
-from django.test import TransactionTestCase
+from django.test import TransactionTestCase, override_settings
 from django.utils import timezone
 from freezegun import freeze_time
 from freezegun.api import FakeDatetime
@@ -14,7 +16,9 @@ from codecov_auth.tests.factories import OwnerFactory
 from core.tests.factories import CommitFactory, RepositoryFactory
 from reports.tests.factories import RepositoryFlagFactory
 from timeseries.helpers import (
+    cached_coverage_measurements,
     coverage_measurements,
+    coverage_measurements_cache_key,
     fill_sparse_measurements,
     owner_coverage_measurements_with_fallback,
     refresh_measurement_summaries,
@@ -146,6 +150,136 @@ class RepositoryCoverageMeasurementsTest(TransactionTestCase):
             },
         ]
 
+    @freeze_time("2022-01-03T12:00:00")
+    @patch("timeseries.helpers.get_redis_connection")
+    def test_cached_coverage_measurements(self, get_redis_connection):
+        redis = fakeredis.FakeStrictRedis()
+        get_redis_connection.return_value = redis
+        filters = dict(
+            repo_id=self.repo.pk,
+            measurable_id=str(self.repo.pk),
+            branch=self.repo.branch,
+        )
+
+        res = cached_coverage_measurements(
+            Interval.INTERVAL_1_DAY,
+            start_date=datetime(2022, 1, 2, 0, 0, 0),
+            end_date=datetime(2022, 1, 4, 0, 0, 0),
+            **filters,
+        )
+        # same as `coverage_measurements`, including the older datapoint
+        assert res == list(
+            coverage_measurements(
+                Interval.INTERVAL_1_DAY,
+                start_date=datetime(2022, 1, 2, 0, 0, 0),
+                end_date=datetime(2022, 1, 4, 0, 0, 0),
+                **filters,
+            )
+        )
+        assert [measurement["timestamp_bin"] for measurement in res] == [
+            datetime(2022, 1, 1, 0, 0, tzinfo=timezone.utc),
+            datetime(2022, 1, 2, 0, 0, tzinfo=timezone.utc),
+        ]
+        # the series is stored as plain JSON
+        cached = json.loads(
+            redis.get(
+                coverage_measurements_cache_key(Interval.INTERVAL_1_DAY, **filters)
+            )
+        )
+        assert cached["measurements"][0]["timestamp_bin"] == "2022-01-01T00:00:00+00:00"
+
+        MeasurementFactory(
+            name=MeasurementName.COVERAGE.value,
+            owner_id=self.repo.author_id,
+            repo_id=self.repo.pk,
+            measurable_id=str(self.repo.pk),
+            timestamp=datetime(2022, 1, 1, 4, 0, 0),
+            value=10.0,
+            branch="master",
+            commit_sha="commit5",
+        )
+        MeasurementFactory(
+            name=MeasurementName.COVERAGE.value,
+            owner_id=self.repo.author_id,
+            repo_id=self.repo.pk,
+            measurable_id=str(self.repo.pk),
+            timestamp=datetime(2022, 1, 3, 1, 0, 0),
+            value=95.0,
+            branch="master",
+            commit_sha="commit6",
+        )
+
+        res = cached_coverage_measurements(
+            Interval.INTERVAL_1_DAY,
+            start_date=datetime(2021, 12, 30, 0, 0, 0),
+            **filters,
+        )
+        # historical bins are served from the cache, only the newest bin is refreshed
+        assert res == [
+            {
+                "timestamp_bin": datetime(2022, 1, 1, 0, 0, tzinfo=timezone.utc),
+                "avg": 82.5,
+                "min": 80.0,
+                "max": 85.0,
+            },
+            {
+                "timestamp_bin": datetime(2022, 1, 2, 0, 0, tzinfo=timezone.utc),
+                "avg": 80.0,
+                "min": 80.0,
+                "max": 80.0,
+            },
+            {
+                "timestamp_bin": datetime(2022, 1, 3, 0, 0, tzinfo=timezone.utc),
+                "avg": 95.0,
+                "min": 95.0,
+                "max": 95.0,
+            },
+        ]
+
+    @freeze_time("2022-01-03T01:00:00")
+    @override_settings(TIMESERIES_CACHE_AGGREGATE_LAG=2 * 60 * 60)
+    @patch("timeseries.helpers.get_redis_connection")
+    def test_cached_coverage_measurements_aggregate_lag(self, get_redis_connection):
+        get_redis_connection.return_value = fakeredis.FakeStrictRedis()
+        filters = dict(
+            repo_id=self.repo.pk,
+            measurable_id=str(self.repo.pk),
+            branch=self.repo.branch,
+        )
+        cached_coverage_measurements(Interval.INTERVAL_1_DAY, **filters)
+
+        for timestamp, value in [
+            (datetime(2022, 1, 1, 5, 0, 0), 10.0),
+            (datetime(2022, 1, 2, 5, 0, 0), 90.0),
+        ]:
+            MeasurementFactory(
+                name=MeasurementName.COVERAGE.value,
+                owner_id=self.repo.author_id,
+                repo_id=self.repo.pk,
+                measurable_id=str(self.repo.pk),
+                timestamp=timestamp,
+                value=value,
+                branch="master",
+                commit_sha=f"commit-{value}",
+            )
+
+        res = cached_coverage_measurements(Interval.INTERVAL_1_DAY, **filters)
+        # the bin of 2022-01-02 ended less than 2 hours ago so it's queried again
+        assert res == [
+            {
+                "timestamp_bin": datetime(2022, 1, 1, 0, 0, tzinfo=timezone.utc),
+                "avg": 82.5,
+                "min": 80.0,
+                "max": 85.0,
+            },
+            {
+                "timestamp_bin": datetime(2022, 1, 2, 0, 0, tzinfo=timezone.utc),
+                "avg": 85.0,
+                "min": 80.0,
+                "max": 90.0,
+            },
+        ]
+
 
 @pytest.mark.skipif(
     not settings.TIMESERIES_ENABLED, reason="requires timeseries data storage"
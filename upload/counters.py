@@ -0,0 +1,127 @@
+import logging
+from datetime import timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from redis.exceptions import RedisError
+from shared.reports.enums import UploadType
+
+from core.models import Commit, Repository
+from reports.models import ReportSession
+from services.redis_configuration import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+# Upload throttling needs to know how many uploads were made to a commit and how
+# many uploads an owner made to their private repos in the last 30 days.  Both are
+# kept as redis counters that are incremented whenever we create an upload (or, for
+# legacy uploads, dispatch one to the worker which creates it) and recounted from
+# the database when missing.  Counters expire after `UPLOAD_COUNTERS_TTL` seconds
+# which reconciles them with uploads made elsewhere, uploads that errored and
+# uploads that fell out of the 30 day window.
+
+
+def commit_uploads_key(commit: Commit) -> str:
+    return f"upload_counts/commit/{commit.id}"
+
+
+def owner_uploads_key(ownerid: int) -> str:
+    return f"upload_counts/owner/{ownerid}"
+
+
+def _cached_count(key: str, count: Callable[[], int]) -> int:
+    if not settings.UPLOAD_COUNTERS_ENABLED:
+        return count()
+
+    try:
+        redis = get_redis_connection()
+        cached = redis.get(key)
+    except RedisError:
+        log.warning("Unable to read upload counter", extra=dict(key=key))
+        return count()
+    if cached is not None:
+        return int(cached)
+
+    value = count()
+    try:
+        # `nx` so we don't clobber increments made while we were counting
+        redis.set(key, value, ex=settings.UPLOAD_COUNTERS_TTL, nx=True)
+    except RedisError:
+        log.warning("Unable to write upload counter", extra=dict(key=key))
+    return value
+
+
+def _increment(key: str):
+    try:
+        redis = get_redis_connection()
+        if redis.incr(key) == 1:
+            # there was no counter (or nothing had been counted yet): drop the
+            # one we just created, the next check recounts from the database
+            redis.delete(key)
+    except RedisError:
+        log.warning("Unable to increment upload counter", extra=dict(key=key))
+
+
+def commit_upload_count(commit: Commit) -> int:
+    """
+    Number of uploads made to `commit`, not counting errored and carried forward
+    uploads
+    """
+    return _cached_count(
+        commit_uploads_key(commit),
+        lambda: ReportSession.objects.filter(
+            ~Q(state="error"),
+            ~Q(upload_type=UploadType.CARRIEDFORWARD.db_name),
+            report__commit=commit,
+        ).count(),
+    )
+
+
+def monthly_upload_count(ownerid: int, limit: int) -> int:
+    """
+    Number of uploads made to the owner's private repos in the last 30 days.  The
+    database is never asked to count past `limit`.
+    """
+    return _cached_count(
+        owner_uploads_key(ownerid),
+        lambda: ReportSession.objects.filter(
+            report__commit__repository__author_id=ownerid,
+            report__commit__repository__private=True,
+            created_at__gte=timezone.now() - timedelta(days=30),
+            # attempt at making the query more performant by telling the db to not
+            # check old commits, which are unlikely to have recent uploads
+            report__commit__timestamp__gte=timezone.now() - timedelta(days=60),
+            upload_type="uploaded",
+        )[:limit].count(),
+    )
+
+
+def record_upload(repository: Repository, commit: Commit, upload: ReportSession):
+    """
+    Counts a newly created `upload` towards the throttling limits
+    """
+    if not settings.UPLOAD_COUNTERS_ENABLED:
+        return
+
+    if (
+        upload.state != "error"
+        and upload.upload_type != UploadType.CARRIEDFORWARD.db_name
+    ):
+        _increment(commit_uploads_key(commit))
+    if repository.private and upload.upload_type == "uploaded":
+        _increment(owner_uploads_key(repository.author_id))
+
+
+def record_dispatched_upload(repository: Repository, commit: Commit):
+    """
+    Counts an upload that was dispatched to the worker, which creates the upload
+    itself (ex. legacy uploads), towards the throttling limits
+    """
+    if not settings.UPLOAD_COUNTERS_ENABLED:
+        return
+
+    _increment(commit_uploads_key(commit))
+    if repository.private:
+        _increment(owner_uploads_key(repository.author_id))
@@ -1,6 +1,5 @@
 import logging
 import re
-from datetime import timedelta
 from json import dumps
 
 import jwt
@@ -9,12 +8,10 @@ from celery import chain, signature
 from cerberus import Validator
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Q
 from django.utils import timezone
 from jwt import PyJWKClient, PyJWTError
 from rest_framework.exceptions import NotFound, Throttled, ValidationError
 from shared.github import InvalidInstallationError
-from shared.reports.enums import UploadType
 from shared.torngit.exceptions import TorngitClientError, TorngitObjectNotFoundError
 
 from codecov_auth.models import Owner
@@ -24,6 +21,7 @@ from reports.models import ReportSession
 from services.analytics import AnalyticsService
 from services.repo_providers import RepoProviderService
 from services.task import TaskService
+from upload.counters import commit_upload_count, monthly_upload_count
 from upload.tokenless.tokenless import TokenlessUploadHandler
 from utils import is_uuid
 from utils.config import get_config
@@ -471,27 +469,19 @@ def check_commit_upload_constraints(commit: Commit):
         owner = _determine_responsible_owner(commit.repository)
         limit = USER_PLAN_REPRESENTATIONS.get(owner.plan, {}).monthly_uploads_limit
         if limit is not None:
-            did_commit_uploads_start_already = ReportSession.objects.filter(
-                report__commit=commit
-            ).exists()
-            if not did_commit_uploads_start_already:
-                limit = USER_PLAN_REPRESENTATIONS[owner.plan].monthly_uploads_limit
-                uploads_used = ReportSession.objects.filter(
-                    report__commit__repository__author_id=owner.ownerid,
-                    report__commit__repository__private=True,
-                    created_at__gte=timezone.now() - timedelta(days=30),
-                    # attempt at making the query more performant by telling the db to not
-                    # check old commits, which are unlikely to have recent uploads
-                    report__commit__timestamp__gte=timezone.now() - timedelta(days=60),
-                    upload_type="uploaded",
-                )[:limit].count()
-                if uploads_used >= limit:
-                    log.warning(
-                        "User exceeded its limits for usage",
-                        extra=dict(ownerid=owner.ownerid, repoid=commit.repository_id),
-                    )
-                    message = "Request was throttled. Throttled due to limit on private repository coverage uploads to Codecov on a free plan. Please upgrade your plan if you require additional uploads this month."
-                    raise Throttled(detail=message)
+            # the counter is cheap so only check whether the commit's uploads
+            # started already once the owner is over the limit
+            uploads_used = monthly_upload_count(owner.ownerid, limit)
+            if (
+                uploads_used >= limit
+                and not ReportSession.objects.filter(report__commit=commit).exists()
+            ):
+                log.warning(
+                    "User exceeded its limits for usage",
+                    extra=dict(ownerid=owner.ownerid, repoid=commit.repository_id),
+                )
+                message = "Request was throttled. Throttled due to limit on private repository coverage uploads to Codecov on a free plan. Please upgrade your plan if you require additional uploads this month."
+                raise Throttled(detail=message)
 
 
 def validate_upload(upload_params, repository, redis):
@@ -511,11 +501,7 @@ def validate_upload(upload_params, repository, redis):
         commit = Commit.objects.get(
             commitid=upload_params.get("commit"), repository=repository
         )
-        new_session_count = ReportSession.objects.filter(
-            ~Q(state="error"),
-            ~Q(upload_type=UploadType.CARRIEDFORWARD.db_name),
-            report__commit=commit,
-        ).count()
+        new_session_count = commit_upload_count(commit)
         session_count = (commit.totals.get("s") if commit.totals else 0) or 0
         current_upload_limit = get_config("setup", "max_sessions") or 150
         if new_session_count > current_upload_limit:
@@ -666,6 +652,7 @@ def dispatch_upload_task(task_arguments, repository, redis):
         countdown=max(
             countdown, int(get_config("setup", "upload_processing_delay") or 0)
         ),
+        owner=repository.author,
     )
 
 
@@ -1,11 +1,20 @@
-from unittest.mock import MagicMock, Mock
+from unittest.mock import MagicMock, Mock, patch
 
+import fakeredis
 from django.test import override_settings
 from rest_framework.test import APITestCase
 
 from core.tests.factories import CommitFactory, OwnerFactory, RepositoryFactory
 from plan.constants import PlanName
 from reports.tests.factories import CommitReportFactory, UploadFactory
+from upload.counters import (
+    commit_upload_count,
+    commit_uploads_key,
+    monthly_upload_count,
+    owner_uploads_key,
+    record_dispatched_upload,
+    record_upload,
+)
 from upload.throttles import UploadsPerCommitThrottle, UploadsPerWindowThrottle
 
 
@@ -127,3 +136,91 @@ class ThrottlesUnitTests(APITestCase):
                 self.uploads_per_commit_throttled(commit)
             else:
                 self.request_should_not_throttle(commit)
+
+
+@override_settings(
+    UPLOAD_THROTTLING_ENABLED=True,
+    UPLOAD_COUNTERS_ENABLED=True,
+    UPLOAD_COUNTERS_TTL=300,
+)
+class ThrottlesCountersTests(APITestCase):
+    def setUp(self):
+        self.owner = OwnerFactory(
+            plan=PlanName.BASIC_PLAN_NAME.value, max_upload_limit=150
+        )
+        self.redis = fakeredis.FakeStrictRedis()
+        patcher = patch("upload.counters.get_redis_connection", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def allow_request(self, throttle_class, commit):
+        view = MagicMock()
+        view.get_repo.return_value = commit.repository
+        view.get_commit.return_value = commit
+        return throttle_class().allow_request(Mock(), view)
+
+    def test_commit_count_is_served_from_redis(self):
+        repository = RepositoryFactory(author=self.owner)
+        commit = CommitFactory(repository=repository)
+        report = CommitReportFactory(commit=commit)
+        for i in range(151):
+            UploadFactory(report=report)
+
+        assert not self.allow_request(UploadsPerCommitThrottle, commit)
+        assert self.redis.get(commit_uploads_key(commit)) == b"151"
+        assert 0 < self.redis.ttl(commit_uploads_key(commit)) <= 300
+        with self.assertNumQueries(0):
+            assert not self.allow_request(UploadsPerCommitThrottle, commit)
+
+    def test_record_upload_increments_counters(self):
+        repository = RepositoryFactory(author=self.owner, private=True)
+        commit = CommitFactory(repository=repository)
+        report = CommitReportFactory(commit=commit)
+        UploadFactory(report=report)
+
+        assert commit_upload_count(commit) == 1
+        assert monthly_upload_count(self.owner.ownerid, 250) == 1
+
+        upload = UploadFactory(report=report)
+        record_upload(repository, commit, upload)
+        assert self.redis.get(commit_uploads_key(commit)) == b"2"
+        assert self.redis.get(owner_uploads_key(self.owner.ownerid)) == b"2"
+
+        carriedforward = UploadFactory(report=report, upload_type="carriedforward")
+        record_upload(repository, commit, carriedforward)
+        assert self.redis.get(commit_uploads_key(commit)) == b"2"
+        assert self.redis.get(owner_uploads_key(self.owner.ownerid)) == b"2"
+
+    def test_record_dispatched_upload_increments_counters(self):
+        repository = RepositoryFactory(author=self.owner, private=True)
+        commit = CommitFactory(repository=repository)
+        UploadFactory(report__commit=commit)
+
+        assert commit_upload_count(commit) == 1
+        assert monthly_upload_count(self.owner.ownerid, 250) == 1
+
+        record_dispatched_upload(repository, commit)
+        assert self.redis.get(commit_uploads_key(commit)) == b"2"
+        assert self.redis.get(owner_uploads_key(self.owner.ownerid)) == b"2"
+
+    def test_record_upload_without_counter(self):
+        repository = RepositoryFactory(author=self.owner, private=True)
+        commit = CommitFactory(repository=repository)
+        upload = UploadFactory(report__commit=commit)
+        record_upload(repository, commit, upload)
+
+        # nothing was counted yet so the counters are left for the next check
+        assert self.redis.get(commit_uploads_key(commit)) is None
+        assert self.redis.get(owner_uploads_key(self.owner.ownerid)) is None
+        assert commit_upload_count(commit) == 1
+
+    def test_owner_over_limit(self):
+        repository = RepositoryFactory(author=self.owner, private=True)
+        new_commit = CommitFactory(repository=repository)
+        started_commit = CommitFactory(repository=repository)
+        UploadFactory(report__commit=started_commit)
+        self.redis.set(owner_uploads_key(self.owner.ownerid), 250)
+
+        assert not self.allow_request(UploadsPerWindowThrottle, new_commit)
+        # commits whose uploads started already are never blocked
+        assert self.allow_request(UploadsPerWindowThrottle, started_commit)
@@ -897,6 +897,7 @@ class UploadHandlerHelpersTest(TestCase):
             commitid=task_arguments.get("commit"),
             report_code="local_report",
             countdown=4,
+            owner=repo.author,
         )
 
 
@@ -1265,12 +1266,14 @@ class UploadHandlerRouteTest(APITestCase):
     @patch("services.archive.ArchiveService.get_archive_hash")
     @patch("upload.views.legacy.get_redis_connection")
     @patch("upload.views.legacy.uuid4")
+    @patch("upload.views.legacy.record_dispatched_upload")
     @patch("upload.views.legacy.dispatch_upload_task")
     @patch("services.repo_providers.RepoProviderService.get_adapter")
     def test_upload_v4(
         self,
         mock_repo_provider_service,
         mock_dispatch_upload,
+        mock_record_dispatched_upload,
         mock_uuid4,
         mock_get_redis,
         mock_hash,
@@ -1311,6 +1314,7 @@ class UploadHandlerRouteTest(APITestCase):
         )
 
         assert response.status_code == 200
+        mock_record_dispatched_upload.assert_called_once()
 
     @patch("services.storage.MINIO_CLIENT.presigned_put_object")
     @patch("services.archive.ArchiveService.get_archive_hash")
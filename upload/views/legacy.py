@@ -27,6 +27,7 @@ from core.commands.repository import RepositoryCommands
 from services.analytics import AnalyticsService
 from services.archive import ArchiveService
 from services.redis_configuration import get_redis_connection
+from upload.counters import record_dispatched_upload
 from upload.helpers import (
     check_commit_upload_constraints,
     determine_repo_for_upload,
@@ -322,6 +323,7 @@ class UploadHandler(APIView, ShelterMixin):
 
         # Send task to worker
         dispatch_upload_task(task_arguments, repository, redis)
+        record_dispatched_upload(repository, commit)
 
         # Analytics Tracking
         analytics_upload_data = upload_params.copy()
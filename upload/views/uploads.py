@@ -20,6 +20,7 @@ from reports.models import CommitReport, ReportSession
 from services.analytics import AnalyticsService
 from services.archive import ArchiveService, MinioEndpoints
 from services.redis_configuration import get_redis_connection
+from upload.counters import record_upload
 from upload.helpers import dispatch_upload_task, validate_activated_repo
 from upload.serializers import UploadSerializer
 from upload.throttles import UploadsPerCommitThrottle, UploadsPerWindowThrottle
@@ -88,6 +89,7 @@ class UploadViews(ListCreateAPIView, GetterMixin):
             )
             instance.storage_path = path
             instance.save()
+        record_upload(repository, commit, instance)
         self.trigger_upload_task(repository, commit.commitid, instance, report)
         metrics.incr("uploads.accepted", 1)
         self.activate_repo(repository)
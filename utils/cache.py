@@ -1,3 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
 from shared.helpers.cache import OurOwnCache, RedisBackend
 
 cache = OurOwnCache()
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    A thread-safe, process-local LRU cache bounded by the total size of its
+    values rather than by the number of entries.
+
+    max_size -- the budget for the sum of `sizeof(value)` across all entries
+    sizeof -- computes the size of a value (defaults to counting entries)
+    ttl -- optional number of seconds after which an entry is considered stale
+    on_evict -- optional callback invoked with the key of every entry that is
+        dropped to make room for new entries
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        sizeof: Callable[[Any], int] = lambda value: 1,
+        ttl: Optional[float] = None,
+        on_evict: Optional[Callable[[Hashable], None]] = None,
+    ):
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> bool:
+        """
+        Stores `value` under `key`, evicting the least recently used entries
+        if necessary.  Values larger than the whole budget are not stored and
+        `False` is returned.
+        """
+        size = self.sizeof(value)
+        if size > self.max_size:
+            return False
+
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self.size += size
+            while self.size > self.max_size:
+                evicted_key = next(iter(self._entries))
+                self._remove(evicted_key)
+                evicted.append(evicted_key)
+
+        if self.on_evict:
+            for evicted_key in evicted:
+                self.on_evict(evicted_key)
+        return True
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.size -= size
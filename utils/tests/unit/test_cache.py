@@ -0,0 +1,67 @@
+from unittest.mock import MagicMock
+
+from freezegun import freeze_time
+
+from utils.cache import LRUCache
+
+
+def test_lru_cache_get_set():
+    cache = LRUCache(max_size=10)
+    assert cache.get("a") is None
+    assert cache.get("a", "default") == "default"
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert "a" in cache
+    assert len(cache) == 1
+
+
+def test_lru_cache_evicts_least_recently_used_by_size():
+    on_evict = MagicMock()
+    cache = LRUCache(max_size=10, sizeof=len, on_evict=on_evict)
+    cache.set("a", "aaaa")
+    cache.set("b", "bbbb")
+    cache.get("a")
+    cache.set("c", "cccc")
+
+    assert "b" not in cache
+    assert cache.get("a") == "aaaa"
+    assert cache.get("c") == "cccc"
+    assert cache.size == 8
+    on_evict.assert_called_once_with("b")
+
+
+def test_lru_cache_rejects_values_larger_than_budget():
+    cache = LRUCache(max_size=3, sizeof=len)
+    cache.set("a", "aa")
+    assert cache.set("b", "bbbb") is False
+    assert "b" not in cache
+    assert cache.get("a") == "aa"
+
+
+def test_lru_cache_replaces_existing_key():
+    cache = LRUCache(max_size=10, sizeof=len)
+    cache.set("a", "aaaa")
+    cache.set("a", "aa")
+    assert cache.get("a") == "aa"
+    assert cache.size == 2
+
+
+def test_lru_cache_ttl():
+    cache = LRUCache(max_size=10, ttl=60)
+    with freeze_time("2023-01-01T00:00:00") as frozen_time:
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        frozen_time.tick(61)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+def test_lru_cache_delete_and_clear():
+    cache = LRUCache(max_size=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.delete("a")
+    assert "a" not in cache
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0